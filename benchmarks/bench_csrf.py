@@ -0,0 +1,49 @@
+# Benchmark: fast CSRF tag scan vs. full BeautifulSoup parse
+#
+#   python benchmarks/bench_csrf.py
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from httpcraft import HttpCraft
+
+
+def build_page(rows: int, token_at_end: bool):
+    parts = ["<html><head><meta charset='utf-8'><title>bench</title></head><body><table>"]
+    for i in range(rows):
+        parts.append(f"<tr><td class='c{i % 7}'><a href='/item/{i}'>Item {i}</a></td>"
+                     f"<td><input type='text' name='q{i}' value='{i}'></td></tr>")
+    form = '<form method="POST"><input type="hidden" name="csrf_token" value="secure123"></form>'
+    if token_at_end:
+        parts.append("</table>" + form)
+    else:
+        parts.insert(1, form)
+        parts.append("</table>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def bench(label, html, client, number):
+    fast = timeit.timeit(lambda: client.extract_csrf_token(html), number=number) / number
+    soup = timeit.timeit(lambda: client._extract_csrf_token_soup(html), number=number) / number
+    assert client.extract_csrf_token(html) == client._extract_csrf_token_soup(html)
+    print(f"{label:<32} {len(html) / 1024:>8.0f} KB  soup {soup * 1000:>9.3f} ms  "
+          f"fast {fast * 1000:>8.3f} ms  x{soup / fast:>7.1f}")
+
+
+def main():
+    client = HttpCraft("http://127.0.0.1:5000")
+    client.set_csrf("input", field="csrf_token")
+    for rows in [100, 2000, 10000]:
+        number = max(1, 1000 // rows)
+        bench(f"token first, {rows} rows", build_page(rows, False), client, number)
+        bench(f"token last, {rows} rows", build_page(rows, True), client, number)
+    no_token = build_page(2000, False).replace("csrf_token", "other_field")
+    bench("no token field, 2000 rows", no_token, client, 5)
+
+
+if __name__ == "__main__":
+    main()
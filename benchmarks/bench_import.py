@@ -0,0 +1,92 @@
+# Benchmark: import and CLI startup time
+#
+#   python benchmarks/bench_import.py [runs] [--max-ms MS]
+#
+# Each scenario runs in fresh interpreters (best of `runs`):
+#   import     time spent importing modules, from `python -X importtime` (modules already
+#              imported by interpreter startup excluded), and the heavy dependencies loaded
+#   wall       whole process time, minus an empty `python -c pass`
+# With --max-ms, exits with status 1 when `from httpcraft import HttpCraft` takes longer
+# than MS milliseconds to import or loads any heavy dependency, so it can guard CI.
+
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+SCENARIOS = [
+    ("import httpcraft", "import httpcraft"),
+    ("from httpcraft import HttpCraft", "from httpcraft import HttpCraft"),
+    ("HttpCraft(url)", "from httpcraft import HttpCraft; HttpCraft('http://127.0.0.1:5000')"),
+    ("first session (requests)", "from httpcraft import HttpCraft; HttpCraft('http://127.0.0.1:5000').session"),
+    ("httpcraft --help", "import sys; sys.argv = ['httpcraft', '--help']; from httpcraft.cli import main\n"
+                         "try:\n    main()\nexcept SystemExit:\n    pass"),
+]
+GUARDED = "from httpcraft import HttpCraft"
+HEAVY = ["requests", "urllib3", "bs4", "aiohttp", "numpy", "pyarrow", "mimetypes", "asyncio"]
+
+
+def run(code, importtime=False):
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    start = time.perf_counter()
+    result = subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                            universal_newlines=True, check=True)
+    return time.perf_counter() - start, result.stderr
+
+
+# Modules imported and total import time in seconds of the top-level imports not in
+# `startup`, from -X importtime output
+def parse_importtime(stderr, startup=()):
+    modules, total = set(), 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        modules.add(name.strip())
+        # nested imports are included in their parent's time
+        if not name.startswith("  ") and name.strip() not in startup:
+            total += int(cumulative)
+    return modules, total / 1e6
+
+
+def measure(code, runs, startup=()):
+    best_wall, best_import, modules = float("inf"), float("inf"), set()
+    for _ in range(runs):
+        wall, _ = run(code)
+        best_wall = min(best_wall, wall)
+        _, stderr = run(code, importtime=True)
+        modules, total = parse_importtime(stderr, startup)
+        best_import = min(best_import, total)
+    return best_wall, best_import, modules
+
+
+def main():
+    args = sys.argv[1:]
+    max_ms = None
+    if "--max-ms" in args:
+        index = args.index("--max-ms")
+        max_ms = float(args[index + 1])
+        del args[index:index + 2]
+    runs = int(args[0]) if args else 20
+
+    base_wall, _, base_modules = measure("pass", runs)
+    print(f"{'scenario':<34}{'import':>10}{'wall':>10}   heavy modules loaded")
+    failed = False
+    for name, code in SCENARIOS:
+        wall, imported, modules = measure(code, runs, base_modules)
+        heavy = [module for module in HEAVY if module in modules - base_modules]
+        imported_ms = imported * 1000
+        print(f"{name:<34}{imported_ms:>8.1f}ms{(wall - base_wall) * 1000:>8.1f}ms   {', '.join(heavy) or '-'}")
+        if max_ms is not None and code == GUARDED and (imported_ms > max_ms or heavy):
+            failed = True
+
+    if max_ms is not None:
+        print(f"\n'{GUARDED}': " + ("FAILED" if failed else "ok") + f" (limit {max_ms} ms, no heavy modules)")
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
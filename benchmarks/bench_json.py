@@ -0,0 +1,104 @@
+# Benchmark: JSON codecs on every JSON path of the client
+#
+#   python benchmarks/bench_json.py [exchanges]
+#
+# For each available codec ("json" = standard library, "orjson" when installed):
+#   encode    request payload -> body bytes (what post()/put() send)
+#   decode    response body bytes -> dict (HttpCraftResponse.response_body)
+#   save      history -> JSONL log (save_history_to_file)
+#   load      JSONL log -> exchanges (iter_history_log)
+#   config    save_config_to_file + load_config_from_file round trip
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from httpcraft import HttpCraft, HttpCraftResponse, iter_history_log
+from httpcraft.codec import CODECS, get_codec
+
+
+def payload(i):
+    return {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "active": i % 2 == 0,
+            "score": i * 1.5, "tags": ["alpha", "beta", "gamma"], "profile": {"city": "Torino", "zip": "10100"}}
+
+
+def body(i):
+    return get_codec("json").dumpb({"items": [payload(i * 10 + j) for j in range(10)], "page": i, "total": 1000})
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def client(codec, exchanges, bodies):
+    c = HttpCraft("http://127.0.0.1:5000")
+    c.set_json_codec(codec)
+    c.set_headers({"Authorization": "Bearer " + "x" * 40})
+    c.set_payload(payload(0))
+    for i in range(exchanges):
+        response = HttpCraftResponse(200, 0.01, "json", raw_headers={"Content-Type": "application/json"},
+                                     raw_body=bodies[i % len(bodies)], codec=c.json_codec)
+        c._record_exchange("/api/items", None, "POST", {"Content-Type": "application/json"}, payload(i), "json",
+                           response, False)
+    return c
+
+
+def bench(name, exchanges, bodies, tmpdir):
+    c = client(name, exchanges, bodies)
+    codec = c.json_codec
+    payloads = [payload(i) for i in range(exchanges)]
+    log_path = os.path.join(tmpdir, f"{name}.jsonl")
+    config_path = os.path.join(tmpdir, f"{name}.config.json")
+
+    def decode():
+        for raw in bodies:
+            HttpCraftResponse(200, 0.0, "json", raw_body=raw, codec=codec).response_body
+
+    def config():
+        for _ in range(200):
+            c.save_config_to_file(config_path)
+            c.load_config_from_file(config_path)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = {
+            "encode": timed(lambda: [codec.dumpb(p) for p in payloads]),
+            "decode": timed(decode),
+            "save": timed(lambda: c.save_history_to_file(log_path)),
+            "load": timed(lambda: sum(1 for _ in iter_history_log(log_path, codec))),
+            "config": timed(config)
+        }
+    return results
+
+
+def main():
+    exchanges = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    bodies = [body(i) for i in range(exchanges)]
+    print(f"{exchanges} payloads / response bodies ({len(bodies[0])} B each) / history entries")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name in CODECS:
+            try:
+                get_codec(name)
+            except ImportError:
+                print(f"{name}: not installed")
+                continue
+            results[name] = bench(name, exchanges, bodies, tmpdir)
+
+    print(f"{'path':<8}" + "".join(f"{name:>12}" for name in results) + "     speed-up")
+    for path in ["encode", "decode", "save", "load", "config"]:
+        row = f"{path:<8}" + "".join(f"{results[name][path] * 1000:>10.1f}ms" for name in results)
+        if "json" in results and "orjson" in results:
+            row += f"    x{results['json'][path] / results['orjson'][path]:.2f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# Benchmark: memory used by a large history, default vs. compact mode
+#
+#   python benchmarks/bench_memory.py [entries]
+#
+# "legacy" rebuilds the layout used before __slots__ and epoch timestamps
+# (plain dataclass-style objects, formatted timestamp string, fresh copies of
+# every header and cookie dict) as a reference point; the response objects are
+# the same in all three modes.
+
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from httpcraft import HttpCraft, HttpCraftResponse
+from requests.structures import CaseInsensitiveDict
+
+
+class _LegacyObject:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+def request_headers():
+    return CaseInsensitiveDict({
+        "User-Agent": "python-requests/2.32.3",
+        "Accept-Encoding": "gzip, deflate",
+        "Accept": "*/*",
+        "Connection": "keep-alive",
+        "Authorization": "Bearer " + "x" * 40,
+        "Content-Type": "application/json"
+    })
+
+
+def response_headers(i):
+    return {
+        "Server": "nginx/1.25.3",
+        "Date": "Fri, 16 Oct 2026 12:00:%02d GMT" % (i % 60),
+        "Content-Type": "application/json",
+        "Content-Length": "17",
+        "Connection": "keep-alive",
+        "Cache-Control": "no-cache"
+    }
+
+
+def response(i):
+    return HttpCraftResponse(200, 0.01, "json", raw_headers=response_headers(i), raw_body=b'{"ok": true, "n": 1}')
+
+
+def fill(client, entries):
+    for i in range(entries):
+        client._record_exchange("/api/items", None, "GET", request_headers(), {}, "form", response(i), False)
+
+
+def fill_legacy(entries, store):
+    cookies = {"sessionid": "abc123", "csrf_token": "secure123"}
+    for i in range(entries):
+        request = _LegacyObject(url="http://127.0.0.1", port=5000, path="/api/items", method="GET",
+                                headers=dict(request_headers()), cookies=cookies.copy(), payload={},
+                                payload_type="form")
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        store.append(_LegacyObject(timestamp=timestamp, request=request, response=response(i),
+                                   csrf_token_updated=False))
+
+
+def measure(label, build, entries, baseline=None):
+    tracemalloc.start()
+    keep = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    ratio = f"  x{baseline / current:.2f} smaller" if baseline else ""
+    print(f"{label:<10} {current / 1024 / 1024:>8.1f} MiB  {current / entries:>7.0f} B/exchange{ratio}")
+    del keep
+    return current
+
+
+def client(compact):
+    c = HttpCraft("http://127.0.0.1:5000")
+    c.set_cookies({"sessionid": "abc123", "csrf_token": "secure123"})
+    c.set_history_policy(compact=compact)
+    return c
+
+
+def main():
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(f"{entries} exchanges")
+
+    def legacy():
+        store = []
+        fill_legacy(entries, store)
+        return store
+
+    def default():
+        c = client(False)
+        fill(c, entries)
+        return c
+
+    def compact():
+        c = client(True)
+        fill(c, entries)
+        return c
+
+    baseline = measure("legacy", legacy, entries)
+    measure("default", default, entries, baseline)
+    measure("compact", compact, entries, baseline)
+
+
+if __name__ == "__main__":
+    main()
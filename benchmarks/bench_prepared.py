@@ -0,0 +1,68 @@
+# Benchmark: per-request client overhead, client.post() vs. a prepared template
+#
+#   python benchmarks/bench_prepared.py [requests]
+#
+# The session is pointed at an in-process adapter that answers every request
+# with a canned JSON response, so the numbers are pure client-side work
+# (building the URL, merging headers/cookies, serializing the payload,
+# wrapping the response and recording the exchange) without any network I/O.
+
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from httpcraft import HttpCraft
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+BODY = b'{"ok": true}'
+
+
+class CannedAdapter(HTTPAdapter):
+    def send(self, request, stream=False, **kwargs):
+        raw = HTTPResponse(body=io.BytesIO(BODY), status=200, preload_content=False,
+                           headers={"Content-Type": "application/json", "Content-Length": str(len(BODY))})
+        return self.build_response(request, raw)
+
+
+def client():
+    c = HttpCraft("http://bench.local")
+    c.session.mount("http://bench.local", CannedAdapter())
+    c.set_headers({"Authorization": "Bearer " + "x" * 40, "X-Client": "bench"})
+    c.set_cookies({"sessionid": "abc123", "csrf_token": "secure123"})
+    c.set_history_policy(max_entries=1000)
+    return c
+
+
+def template():
+    return {"username": "admin", "password": "", "remember": True, "scope": ["read", "write"],
+            "device": {"os": "linux", "version": "6.1"}}
+
+
+def bench(label, send, count):
+    start = time.perf_counter()
+    for i in range(count):
+        send(i)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {elapsed / count * 1e6:>8.1f} us/request  {count / elapsed:>9.0f} req/s")
+    return elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"{count} POST requests")
+
+    plain = client()
+    payload = template()
+    baseline = bench("post()", lambda i: plain.post("/login", json=dict(payload, password=f"pw{i}")), count)
+
+    prepared = client().prepare("POST", "/login", template())
+    elapsed = bench("prepared", lambda i: prepared.send(password=f"pw{i}"), count)
+    print(f"speed-up   x{baseline / elapsed:.2f}")
+
+
+if __name__ == "__main__":
+    main()
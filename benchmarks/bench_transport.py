@@ -0,0 +1,96 @@
+# Benchmark: per-request overhead of the transports, requests.Session vs. urllib3
+#
+#   python benchmarks/bench_transport.py [requests]
+#
+# A keep-alive HTTP/1.1 server answering every request with a small JSON body runs
+# in a child process; each transport then sends the same GET and POST requests one
+# after the other over a single reused connection. "cpu" is the client process CPU
+# time per request (the server is not counted), the closest measure of client-side
+# overhead; "wall" includes the server and the loopback round trip.
+
+import multiprocessing
+import os
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from httpcraft import HttpCraft
+
+BODY = b'{"ok": true, "items": [1, 2, 3], "message": "hello"}'
+TRANSPORTS = ["requests", "urllib3"]
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    do_GET = do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port_sender):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    port_sender.send(server.server_address[1])
+    server.serve_forever()
+
+
+def client(url, transport):
+    c = HttpCraft(url)
+    c.set_transport(transport)
+    c.set_headers({"Authorization": "Bearer " + "x" * 40, "X-Client": "bench"})
+    c.set_cookies({"sessionid": "abc123", "csrf_token": "secure123"})
+    c.set_history_policy(max_entries=1000)
+    return c
+
+
+def bench(label, send, count):
+    for i in range(min(200, count)):  # warm up: connection opened, caches filled
+        send(i)
+    wall, cpu = time.perf_counter(), time.process_time()
+    for i in range(count):
+        send(i)
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    print(f"{label:<18} cpu {cpu / count * 1e6:>7.1f} us/request   wall {wall / count * 1e6:>7.1f} us/request"
+          f"   {count / wall:>7.0f} req/s")
+    return cpu
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    server = multiprocessing.Process(target=serve, args=(sender,), daemon=True)
+    server.start()
+    url = f"http://127.0.0.1:{receiver.recv()}"
+    print(f"{count} requests per run against {url}")
+
+    try:
+        for method in ["GET", "POST"]:
+            cpu = {}
+            for transport in TRANSPORTS:
+                c = client(url, transport)
+                if method == "GET":
+                    send = lambda i: c.get("/items", params={"page": i})
+                else:
+                    send = lambda i: c.post("/items", json={"name": f"item{i}", "tags": ["a", "b"], "count": i})
+                cpu[transport] = bench(f"{method} {transport}", send, count)
+                assert c.get_pool_stats()["new_connections"] == 1, "the connection was not reused"
+            print(f"{method} speed-up (cpu) x{cpu['requests'] / cpu['urllib3']:.2f}\n")
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,37 @@
-from .core import HttpCraft
\ No newline at end of file
+# subnet_musk
+
+import importlib
+
+# Public names and the module defining each one. They are imported on first access
+# (PEP 562), so "import httpcraft" costs next to nothing and a program only pays for
+# what it uses: e.g. requests is loaded with the first HttpCraft session, aiohttp with
+# the first AsyncHttpCraft session.
+_EXPORTS = {
+    "HttpCraft": "core",
+    "AsyncHttpCraft": "aio",
+    "HttpCraftRequest": "models",
+    "HttpCraftResponse": "models",
+    "HttpCraftExchange": "models",
+    "HttpCraftHistory": "history",
+    "HttpCraftHistoryLog": "history",
+    "iter_history_log": "history",
+    "write_har": "har",
+    "iter_har_entries": "har",
+    "iter_har_exchanges": "har",
+    "iter_har_requests": "har",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value  # later accesses skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
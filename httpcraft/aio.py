@@ -0,0 +1,338 @@
+# subnet_musk
+
+import asyncio
+import time
+from collections import deque
+
+from .core import HttpCraft
+from .models import HttpCraftResponse
+
+
+# asyncio flavour of HttpCraft built on aiohttp.
+# Configuration (target, headers, payload, cookies, CSRF, retry policy) and
+# history are shared with HttpCraft; only the verb methods become awaitable.
+# The synchronous request engines (downloads, prepared requests, sweeps,
+# replays, sharded runs, pool warm-up) have no async counterpart and raise
+# TypeError.
+class AsyncHttpCraft(HttpCraft):
+    def __init__(self, base_url: str, max_concurrency: int = 100, **pool_options):
+        super().__init__(base_url, **pool_options)
+        self.max_concurrency = max_concurrency
+        self._aio_session = None
+        self._semaphore = None
+
+    ''' ------- CONCURRENCY ------- '''
+    # Set the maximum number of requests in flight at the same time
+    def set_concurrency(self, limit: int):
+        assert limit > 0, "Concurrency limit must be a positive integer"
+        self.max_concurrency = limit
+        self._semaphore = None
+
+    # Get the current concurrency limit
+    def get_concurrency(self):
+        return self.max_concurrency
+
+    # Lazily create the aiohttp session (must run inside the event loop)
+    def _get_aio_session(self):
+        if self._aio_session is None or self._aio_session.closed:
+            try:
+                import aiohttp
+            except ImportError:
+                raise ImportError("AsyncHttpCraft requires aiohttp: pip install httpcraft[async]")
+            connector_options = {"limit": self.max_concurrency}
+            if self.keepalive_timeout is not None:
+                connector_options["keepalive_timeout"] = self.keepalive_timeout
+            connector = aiohttp.TCPConnector(**connector_options)
+            self._aio_session = aiohttp.ClientSession(
+                connector=connector,
+                cookie_jar=aiohttp.CookieJar(unsafe=True),
+                trace_configs=[self._timing_trace_config(aiohttp)]
+            )
+        return self._aio_session
+
+    # aiohttp trace hooks filling the per-request phase dict passed as trace_request_ctx
+    @staticmethod
+    def _timing_trace_config(aiohttp):
+        async def on_queued_start(session, context, params):
+            context.trace_request_ctx["_queued"] = time.perf_counter()
+
+        async def on_queued_end(session, context, params):
+            phase = context.trace_request_ctx
+            phase["connect"] += time.perf_counter() - phase.pop("_queued")
+
+        async def on_create_start(session, context, params):
+            context.trace_request_ctx["_connecting"] = time.perf_counter()
+
+        async def on_create_end(session, context, params):
+            phase = context.trace_request_ctx
+            phase["connect"] += time.perf_counter() - phase.pop("_connecting")
+            phase["connection_reused"] = False
+
+        async def on_reuse(session, context, params):
+            context.trace_request_ctx["connection_reused"] = True
+
+        async def on_chunk_sent(session, context, params):
+            context.trace_request_ctx["body_bytes"] += len(params.chunk)
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_queued_start.append(on_queued_start)
+        trace_config.on_connection_queued_end.append(on_queued_end)
+        trace_config.on_connection_create_start.append(on_create_start)
+        trace_config.on_connection_create_end.append(on_create_end)
+        trace_config.on_connection_reuseconn.append(on_reuse)
+        trace_config.on_request_chunk_sent.append(on_chunk_sent)
+        return trace_config
+
+    # Close the underlying aiohttp session
+    async def close(self):
+        if self._aio_session is not None and not self._aio_session.closed:
+            await self._aio_session.close()
+        self._aio_session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    ''' -------------------------- '''
+
+    ''' ----- SYNC-ONLY APIS ----- '''
+    # Raise for a synchronous HttpCraft API that AsyncHttpCraft cannot run
+    def _sync_only(self, name):
+        raise TypeError(f"{name}() is not supported on AsyncHttpCraft: use HttpCraft for it")
+
+    def download(self, *args, **kwargs):
+        self._sync_only("download")
+
+    def prepare(self, *args, **kwargs):
+        self._sync_only("prepare")
+
+    def sweep(self, *args, **kwargs):
+        self._sync_only("sweep")
+
+    def replay_history(self, *args, **kwargs):
+        self._sync_only("replay_history")
+
+    def send_sharded(self, *args, **kwargs):
+        self._sync_only("send_sharded")
+
+    def warm_up(self, *args, **kwargs):
+        self._sync_only("warm_up")
+    ''' -------------------------- '''
+
+    ''' -------- REQUESTS -------- '''
+    # Send a GET request to the specified path
+    async def get(self, path="", params=None, port=None):
+        return await self._send_request("GET", path, json=None, data=params, port=port)
+
+    # Send a POST request to the specified path
+    async def post(self, path="", json=None, data=None, port=None):
+        return await self._send_request("POST", path, json=json, data=data, port=port)
+
+    # Send a PUT request to the specified path
+    async def put(self, path="", json=None, data=None, port=None):
+        return await self._send_request("PUT", path, json=json, data=data, port=port)
+
+    # Send a DELETE request to the specified path
+    async def delete(self, path="", json=None, data=None, port=None):
+        return await self._send_request("DELETE", path, json=json, data=data, port=port)
+
+    # Send a PATCH request to the specified path
+    async def patch(self, path="", json=None, data=None, port=None):
+        return await self._send_request("PATCH", path, json=json, data=data, port=port)
+
+    # Send a HEAD request to the specified path
+    async def head(self, path="", port=None):
+        return await self._send_request("HEAD", path, json=None, data=None, port=port)
+
+    # Send a request over aiohttp and wrap the reply; returns (response, sent headers)
+    async def _fetch(self, session, method, url, kwargs):
+        waited = None
+        if self.rate_limiter is not None:
+            waited = await self.rate_limiter.acquire_async(self._rate_limit_target(url))
+        phase = {"connect": 0.0, "connection_reused": None, "body_bytes": 0}
+        start = time.perf_counter()
+        async with session.request(method, url, trace_request_ctx=phase, **kwargs) as response:
+            headers_received = time.perf_counter()
+            content = await response.read()
+            end = time.perf_counter()
+            info = response.request_info
+            sent_headers = info.headers
+            # aiohttp decodes compressed bodies while reading: the size on the wire is only
+            # known from Content-Length (chunked compressed bodies count as decoded)
+            wire_body_bytes = len(content)
+            if response.headers.get("Content-Encoding") and response.content_length is not None:
+                wire_body_bytes = response.content_length
+            http_response = HttpCraftResponse(
+                status_code=response.status,
+                elapsed_time=end - start,
+                response_type=self._detect_response_type(response.headers.get("Content-Type", "")),
+                raw_headers=dict(response.headers),
+                raw_body=content,
+                encoding=response.charset,
+                codec=self.json_codec,
+                timings={
+                    "connect": phase["connect"],
+                    "connection_reused": phase["connection_reused"],
+                    "ttfb": max(0.0, headers_received - start - phase["connect"]),
+                    "transfer": end - headers_received
+                },
+                request_bytes=len(f"{info.method} {info.url.raw_path_qs} HTTP/1.1\r\n") + 2 + phase["body_bytes"] +
+                              sum(len(f"{key}: {value}\r\n") for key, value in sent_headers.items()),
+                response_bytes=len(f"HTTP/{response.version.major}.{response.version.minor} "
+                                   f"{response.status} {response.reason or ''}\r\n") + 2 + wire_body_bytes +
+                               sum(len(key) + len(value) + 4 for key, value in response.raw_headers),
+                body_bytes=len(content),
+                wire_body_bytes=wire_body_bytes
+            )
+        if waited is not None:
+            http_response.timings["rate_limit_wait"] = waited
+        return http_response, sent_headers
+
+    # Whether a failed attempt deserves another one. aiohttp errors stand for the requests
+    # exceptions the policy is written against: connection errors for ConnectionError (never
+    # sent when the connection could not be opened), timeouts for Timeout
+    def _should_retry_error(self, method, error):
+        policy = self.retry_policy
+        if policy.should_retry_error(method, error):
+            return True
+        import aiohttp
+        import requests
+        if isinstance(error, asyncio.TimeoutError):
+            equivalent = requests.exceptions.Timeout
+        elif isinstance(error, aiohttp.ClientConnectionError):
+            equivalent = requests.exceptions.ConnectionError
+        else:
+            return False
+        if not issubclass(equivalent, policy.retry_exceptions):
+            return False
+        return policy.is_idempotent(method) or isinstance(error, aiohttp.ClientConnectorError)
+
+    # One attempt holding a concurrency slot
+    async def _fetch_limited(self, session, method, url, kwargs):
+        async with self._semaphore:
+            return await self._fetch(session, method, url, kwargs)
+
+    # Fetch with a duplicate request sent after hedge_after seconds (see HttpCraft._fetch_hedged)
+    async def _fetch_hedged(self, session, method, url, kwargs):
+        from .retry import hedge_winner
+        primary = asyncio.ensure_future(self._fetch_limited(session, method, url, kwargs))
+        done, _ = await asyncio.wait([primary], timeout=self.retry_policy.hedge_after)
+        if done:
+            return primary.result() + ("primary",)
+        hedge = asyncio.ensure_future(self._fetch_limited(session, method, url, kwargs))
+        pending = {primary, hedge}
+        while True:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            settled = hedge_winner(primary, hedge, done, pending)
+            if settled is not None:
+                for task in pending:
+                    task.cancel()
+                task, winner = settled
+                return task.result() + (winner,)
+
+    # Fetch, retrying according to the retry policy (see HttpCraft._fetch_with_retry).
+    # Returns (response, sent headers, attempts)
+    async def _fetch_with_retry(self, session, method, url, kwargs):
+        from .retry import HttpCraftRetryAttempts
+        attempts = HttpCraftRetryAttempts(self.retry_policy, method, should_retry_error=self._should_retry_error)
+        for record in attempts:
+            if record["delay"]:
+                await asyncio.sleep(record["delay"])
+            start = time.perf_counter()
+            try:
+                if self.retry_policy.can_hedge(method):
+                    http_response, sent_headers, winner = await self._fetch_hedged(session, method, url, kwargs)
+                    attempts.settled_by(record, winner)
+                else:
+                    http_response, sent_headers = await self._fetch_limited(session, method, url, kwargs)
+            except Exception as e:
+                if not attempts.failed(record, e, time.perf_counter() - start):
+                    raise
+            else:
+                if not attempts.answered(record, http_response, time.perf_counter() - start):
+                    return http_response, sent_headers, attempts.records
+
+    # Core coroutine used by all HTTP verb wrappers
+    async def _send_request(self, method, path, json=None, data=None, port=None, record=True):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        session = self._get_aio_session()
+
+        url = self._build_url(path, override_port=port)
+        kwargs = {
+            "headers": dict(self.headers),
+            "cookies": self.cookies
+        }
+        if self.accept_encoding is not None and not any(key.lower() == "accept-encoding" for key in self.headers):
+            kwargs["headers"]["Accept-Encoding"] = self.accept_encoding
+
+        payload_used, payload_type = self._resolve_payload(method, json=json, data=data)
+        if method in ["GET", "HEAD"]:
+            kwargs["params"] = payload_used
+        elif payload_type == "json":
+            self._encode_json_body(kwargs, payload_used)
+        else:
+            kwargs["data"] = payload_used
+        self._compress_body(kwargs)
+
+        attempts = None
+        start = time.perf_counter()
+        cache_key, cache_entry, fresh = self._cache_lookup(method, url, payload_used, kwargs["headers"])
+        if fresh:
+            http_response = self._cache_hit(cache_entry, start)
+            cache_status = "hit"
+            sent_headers = kwargs["headers"]
+        else:
+            if cache_entry is not None:
+                kwargs["headers"].update(cache_entry.validators())
+            if self.retry_policy is not None:
+                http_response, sent_headers, attempts = await self._fetch_with_retry(session, method, url, kwargs)
+            else:
+                http_response, sent_headers = await self._fetch_limited(session, method, url, kwargs)
+            http_response, cache_status = self._cache_update(method, url, cache_key, cache_entry,
+                                                             kwargs["headers"], http_response)
+
+        csrf_token_updated = False
+        if self.csrf_mode != "none" and http_response.response_type == "html":
+            csrf_token_updated = self._update_csrf_token(http_response.text)
+
+        return self._record_exchange(
+            path, port, method, sent_headers, payload_used, payload_type,
+            http_response, csrf_token_updated, cache_status, attempts, record
+        )
+
+    # Send many (method, path[, payload[, payload_type]]) specs concurrently and yield their exchanges,
+    # in submission order (ordered=True) or as soon as each one completes
+    async def send_many(self, requests, ordered: bool = True):
+        specs = iter(requests)
+        max_pending = self.max_concurrency * 2  # bound memory on very large iterables
+        pending = deque() if ordered else set()
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < max_pending:
+                    try:
+                        spec = next(specs)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    task = asyncio.ensure_future(self._send_spec(spec))
+                    if ordered:
+                        pending.append(task)
+                    else:
+                        pending.add(task)
+
+                if not pending:
+                    return
+
+                if ordered:
+                    yield await pending.popleft()
+                else:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+    ''' -------------------------- '''
@@ -0,0 +1,179 @@
+# subnet_musk
+
+import contextlib
+import io
+import itertools
+import math
+import threading
+import time
+
+
+# Compact latency histogram with log-linear buckets (HdrHistogram style).
+# Values are recorded in microseconds; every bucket spans at most 1/64 of its
+# value, so percentiles are accurate to ~1.6% while memory stays bounded by the
+# number of distinct buckets (a few hundred), not by the number of samples.
+class LatencyHistogram:
+    SUB_BUCKET_BITS = 7                   # 2^7 = 128 exact values before buckets start to widen
+    HALF = 1 << (SUB_BUCKET_BITS - 1)     # sub-buckets per power of two
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self._lock = threading.Lock()
+
+    # Bucket index of a value in microseconds
+    @classmethod
+    def _index(cls, value):
+        shift = value.bit_length() - cls.SUB_BUCKET_BITS
+        if shift <= 0:
+            return value
+        return shift * cls.HALF + (value >> shift)
+
+    # Highest value (microseconds) that falls into a bucket
+    @classmethod
+    def _upper(cls, index):
+        if index < 2 * cls.HALF:
+            return index
+        shift = index // cls.HALF - 1
+        return ((index - shift * cls.HALF + 1) << shift) - 1
+
+    # Record one latency in seconds
+    def record(self, seconds: float):
+        value = max(0, int(seconds * 1_000_000))
+        index = self._index(value)
+        with self._lock:
+            self.counts[index] = self.counts.get(index, 0) + 1
+            self.count += 1
+            self.total += value
+            self.min = value if self.min is None else min(self.min, value)
+            self.max = value if self.max is None else max(self.max, value)
+
+    # Latency (seconds) below which `percent` % of the samples fall
+    def percentile(self, percent: float):
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(self.count * percent / 100.0))  # nearest-rank
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._upper(index), self.max) / 1_000_000
+        return self.max / 1_000_000
+
+    # Mean latency in seconds
+    def mean(self):
+        return self.total / self.count / 1_000_000 if self.count else 0.0
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "min": (self.min or 0) / 1_000_000,
+            "mean": self.mean(),
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "p99.9": self.percentile(99.9),
+            "max": (self.max or 0) / 1_000_000
+        }
+
+
+# Build a client from a file written by save_config_to_file
+def load_client(config_path: str):
+    from .codec import get_codec
+    from .compression import open_file
+    from .core import HttpCraft
+
+    with open_file(config_path, "rb") as f:  # plain or gzip-compressed, like load_config_from_file
+        base_url = get_codec().load(f).get("base_url")
+    if not base_url:
+        raise ValueError(f"'{config_path}' has no base_url")
+    client = HttpCraft(base_url)
+    with contextlib.redirect_stdout(io.StringIO()):  # keep machine-readable output clean
+        client.load_config_from_file(config_path)
+    client.set_history_policy(max_entries=1)  # a benchmark must not grow history
+    return client
+
+
+# Fire `method path` at a fixed `rate` (requests/s, None = as fast as possible)
+# with `concurrency` workers, for `duration` seconds and/or `requests` requests
+def run_bench(client, method: str = "GET", path: str = "", concurrency: int = 1, rate: float = None,
+              duration: float = None, requests: int = None):
+    assert concurrency > 0, "concurrency must be a positive integer"
+    assert duration is not None or requests is not None, "Give a duration and/or a request count"
+    method = method.upper()
+    client._ensure_pool_size(concurrency)
+
+    histogram = LatencyHistogram()
+    status_counts = {}
+    error_counts = {}
+    counts_lock = threading.Lock()
+    tickets = itertools.count()
+    start = time.perf_counter()
+    deadline = start + duration if duration is not None else None
+
+    def worker():
+        while True:
+            ticket = next(tickets)
+            if requests is not None and ticket >= requests:
+                return
+            if rate:
+                delay = start + ticket / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            sent = time.perf_counter()
+            try:
+                exchange = client._send_spec((method, path))
+            except Exception as e:
+                with counts_lock:
+                    name = type(e).__name__
+                    error_counts[name] = error_counts.get(name, 0) + 1
+                continue
+            histogram.record(time.perf_counter() - sent)
+            with counts_lock:
+                code = exchange.response.status_code
+                status_counts[code] = status_counts.get(code, 0) + 1
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    completed = sum(status_counts.values())
+    return {
+        "target": client._build_url(path),
+        "method": method,
+        "concurrency": concurrency,
+        "rate": rate,
+        "duration": elapsed,
+        "requests": completed + sum(error_counts.values()),
+        "throughput": completed / elapsed if elapsed > 0 else 0.0,
+        "status_codes": {str(code): n for code, n in sorted(status_counts.items())},
+        "http_errors": sum(n for code, n in status_counts.items() if code >= 400),
+        "exceptions": error_counts,
+        "latency": histogram.to_dict()
+    }
+
+
+# Human-readable benchmark report
+def format_report(result: dict):
+    latency = result["latency"]
+    lines = [
+        f"Target:        {result['method']} {result['target']}",
+        f"Concurrency:   {result['concurrency']}" + (f" @ {result['rate']} req/s" if result["rate"] else ""),
+        f"Requests:      {result['requests']} in {result['duration']:.2f} s",
+        f"Throughput:    {result['throughput']:.1f} req/s",
+        "Status codes:  " + (", ".join(f"{code}: {n}" for code, n in result["status_codes"].items()) or "-"),
+        f"HTTP errors:   {result['http_errors']}",
+        "Exceptions:    " + (", ".join(f"{name}: {n}" for name, n in result["exceptions"].items()) or "-"),
+        "Latency (ms):  " + "  ".join(
+            f"{key} {latency[key] * 1000:.2f}" for key in ["min", "p50", "p90", "p99", "p99.9", "max", "mean"]
+        )
+    ]
+    return "\n".join(lines)
@@ -0,0 +1,343 @@
+# subnet_musk
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from email.utils import mktime_tz, parsedate_tz
+
+from .codec import get_codec
+from .models import HttpCraftResponse
+
+CACHEABLE_STATUS = {200, 203}
+
+
+# Parse an HTTP date into an epoch timestamp (None if missing or invalid)
+def parse_http_date(value):
+    if not value:
+        return None
+    parsed = parsedate_tz(value)
+    if parsed is None:
+        return None
+    try:
+        return mktime_tz(parsed)
+    except (OverflowError, ValueError):
+        return None
+
+
+# Parse a Cache-Control header into {directive: value or None}
+def parse_cache_control(value):
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip().strip('"') or None
+    return directives
+
+
+# Case-insensitive header lookup on a plain dict
+def get_header(headers, name):
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+# Seconds a response may be served without revalidation (0 = always revalidate)
+def freshness_lifetime(headers, now=None):
+    directives = parse_cache_control(get_header(headers, "Cache-Control"))
+    if "no-cache" in directives:
+        return 0
+    lifetime = None
+    if directives.get("max-age") is not None:
+        try:
+            lifetime = int(directives["max-age"])
+        except ValueError:
+            lifetime = 0
+    elif get_header(headers, "Expires") is not None:
+        expires = parse_http_date(get_header(headers, "Expires"))  # invalid Expires means "already expired"
+        date = parse_http_date(get_header(headers, "Date")) or (now if now is not None else time.time())
+        lifetime = expires - date if expires is not None else 0
+    if lifetime is None:
+        return 0
+    try:
+        age = int(get_header(headers, "Age") or 0)
+    except ValueError:
+        age = 0
+    return max(0, lifetime - age)
+
+
+# Whether a response may be stored at all
+def is_storable(status_code, headers):
+    if status_code not in CACHEABLE_STATUS:
+        return False
+    if "no-store" in parse_cache_control(get_header(headers, "Cache-Control")):
+        return False
+    if (get_header(headers, "Vary") or "").strip() == "*":
+        return False
+    # without freshness information or validators a stored copy could never be reused
+    return (freshness_lifetime(headers) > 0 or get_header(headers, "ETag") is not None
+            or get_header(headers, "Last-Modified") is not None)
+
+
+# One cached response with its freshness and validators
+class HttpCraftCacheEntry:
+    def __init__(self, url: str, status_code: int, headers: dict, body: bytes, encoding: str = None,
+                 response_type: str = "unknown", stored_at: float = None, expires_at: float = None,
+                 vary: dict = None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        self.encoding = encoding
+        self.response_type = response_type
+        self.stored_at = stored_at if stored_at is not None else time.time()
+        self.expires_at = expires_at if expires_at is not None else self.stored_at + freshness_lifetime(headers)
+        self.vary = vary if vary is not None else {}  # request header values the response depends on
+
+    # Approximate memory footprint
+    @property
+    def size(self):
+        return len(self.body) + sum(len(k) + len(v) for k, v in self.headers.items())
+
+    # Whether the entry can be served without contacting the server
+    def is_fresh(self, now: float = None):
+        return (now if now is not None else time.time()) < self.expires_at
+
+    # Conditional request headers revalidating this entry
+    def validators(self):
+        conditional = {}
+        etag = get_header(self.headers, "ETag")
+        last_modified = get_header(self.headers, "Last-Modified")
+        if etag is not None:
+            conditional["If-None-Match"] = etag
+        if last_modified is not None:
+            conditional["If-Modified-Since"] = last_modified
+        return conditional
+
+    # Whether the Vary'd request headers match the ones the entry was stored for
+    def matches(self, request_headers: dict):
+        return all(get_header(request_headers, name) == value for name, value in self.vary.items())
+
+    # Build a HttpCraftResponse serving this entry
+    def to_response(self, elapsed_time: float, timings: dict = None, request_bytes: int = 0,
+                    response_bytes: int = 0):
+        return HttpCraftResponse(
+            status_code=self.status_code,
+            elapsed_time=elapsed_time,
+            response_type=self.response_type,
+            raw_headers=dict(self.headers),
+            raw_body=self.body,
+            encoding=self.encoding,
+            timings=timings,
+            request_bytes=request_bytes,
+            response_bytes=response_bytes,
+            body_bytes=len(self.body),
+            wire_body_bytes=0  # served from the cache (a 304 revalidation carries no body)
+        )
+
+    # Metadata stored next to the body in the disk store
+    def to_dict(self):
+        return {
+            "url": self.url,
+            "status_code": self.status_code,
+            "headers": self.headers,
+            "encoding": self.encoding,
+            "response_type": self.response_type,
+            "stored_at": self.stored_at,
+            "expires_at": self.expires_at,
+            "vary": self.vary
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, body: bytes):
+        return cls(
+            url=data.get("url"),
+            status_code=data.get("status_code"),
+            headers=data.get("headers", {}),
+            body=body,
+            encoding=data.get("encoding"),
+            response_type=data.get("response_type", "unknown"),
+            stored_at=data.get("stored_at"),
+            expires_at=data.get("expires_at"),
+            vary=data.get("vary", {})
+        )
+
+
+# Private HTTP cache for GET responses.
+# Entries live in an in-memory LRU bounded by `max_bytes`; with a `cache_dir`
+# every entry is also written to disk (one "<sha256>.json" metadata file and
+# one "<sha256>.body" file per URL), so entries evicted from memory, or stored
+# by a previous run, are loaded back on demand. One entry is kept per URL.
+class HttpCraftCache:
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, cache_dir: str = None):
+        assert max_bytes > 0, "max_bytes must be a positive integer"
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.reset_stats()
+
+    ''' ---------- STATS ---------- '''
+    # Zero the hit/miss counters
+    def reset_stats(self):
+        self.hits = 0         # served from cache without a request
+        self.revalidated = 0  # served from cache after a 304
+        self.misses = 0       # fetched from the server
+        self.evictions = 0    # entries dropped from memory to respect max_bytes
+
+    # Count one cached request outcome ("hit", "revalidated" or "miss")
+    def record(self, status: str):
+        with self._lock:
+            if status == "hit":
+                self.hits += 1
+            elif status == "revalidated":
+                self.revalidated += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes
+            }
+    ''' -------------------------- '''
+
+    ''' ---------- DISK ---------- '''
+    # Paths of the metadata and body files of a URL in the disk store
+    def _disk_paths(self, url):
+        name = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, name + ".json"), os.path.join(self.cache_dir, name + ".body")
+
+    # Atomically replace `path` with `data`
+    def _write_atomic(self, path, data: bytes):
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    # Write an entry to the disk store (body first, so metadata never points at a missing body)
+    def _save(self, entry):
+        meta_path, body_path = self._disk_paths(entry.url)
+        self._write_atomic(body_path, entry.body)
+        self._write_atomic(meta_path, get_codec().dumpb(entry.to_dict()))
+
+    # Read an entry back from the disk store
+    def _load(self, url):
+        meta_path, body_path = self._disk_paths(url)
+        try:
+            with open(meta_path, "rb") as f:
+                meta = get_codec().load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        return HttpCraftCacheEntry.from_dict(meta, body)
+
+    # Delete an entry from the disk store
+    def _unlink(self, url):
+        for path in self._disk_paths(url):
+            if os.path.exists(path):
+                os.remove(path)
+    ''' -------------------------- '''
+
+    ''' ---------- LRU ----------- '''
+    # Put an entry in memory as most recently used, evicting the least recently used ones
+    def _remember(self, entry):
+        old = self._entries.pop(entry.url, None)
+        if old is not None:
+            self._bytes -= old.size
+        if entry.size > self.max_bytes:
+            return  # too large for memory (still reachable from disk)
+        self._entries[entry.url] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+    # Cached entry for `url` matching the request headers, fresh or stale (None if absent)
+    def lookup(self, url: str, request_headers: dict = None):
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            elif self.cache_dir is not None:
+                entry = self._load(url)
+                if entry is not None:
+                    self._remember(entry)
+        if entry is None or not entry.matches(request_headers or {}):
+            return None
+        return entry
+
+    # Store a response for `url` if it is cacheable; returns the entry (or None)
+    def store(self, url: str, request_headers: dict, response):
+        headers = dict(response.raw_headers)
+        if not isinstance(response.raw_body, (bytes, bytearray)) or not is_storable(response.status_code, headers):
+            return None
+        vary = {}
+        for name in (get_header(headers, "Vary") or "").split(","):
+            name = name.strip()
+            if name:
+                vary[name] = get_header(request_headers or {}, name)
+        entry = HttpCraftCacheEntry(url, response.status_code, headers, bytes(response.raw_body),
+                                    response.encoding, response.response_type, vary=vary)
+        with self._lock:
+            self._remember(entry)
+            if self.cache_dir is not None:
+                self._save(entry)
+        return entry
+
+    # Update a stale entry with the headers of a 304 Not Modified and make it fresh again
+    def refresh(self, entry, not_modified_headers: dict):
+        headers = dict(entry.headers)
+        for name, value in not_modified_headers.items():
+            if name.lower() in ("content-length", "content-encoding", "transfer-encoding"):
+                continue  # describe the (empty) 304 body, not the cached one
+            for key in [k for k in headers if k.lower() == name.lower()]:
+                del headers[key]
+            headers[name] = value
+        refreshed = HttpCraftCacheEntry(entry.url, entry.status_code, headers, entry.body, entry.encoding,
+                                        entry.response_type, vary=entry.vary)
+        with self._lock:
+            self._remember(refreshed)
+            if self.cache_dir is not None:
+                self._save(refreshed)
+        return refreshed
+
+    # Drop the entry stored for `url`
+    def invalidate(self, url: str):
+        with self._lock:
+            entry = self._entries.pop(url, None)
+            if entry is not None:
+                self._bytes -= entry.size
+            if self.cache_dir is not None:
+                self._unlink(url)
+
+    # Drop every entry from memory and from the disk store
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self.cache_dir is None:
+                return
+            for name in os.listdir(self.cache_dir):
+                stem, ext = os.path.splitext(name)
+                if ext in (".json", ".body") and len(stem) == 64:
+                    os.remove(os.path.join(self.cache_dir, name))
+
+    def __len__(self):
+        return len(self._entries)
+    ''' -------------------------- '''
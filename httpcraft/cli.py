@@ -4,6 +4,91 @@ import sys, os
 # Aggiungiamo la root del progetto al path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
+# Run the load generator and print (or save) its report
+def run_bench_command(args):
+    import json
+    from httpcraft.bench import load_client, run_bench, format_report
+
+    if args.duration is None and args.requests is None:
+        args.duration = 10.0
+    client = load_client(args.config)
+    result = run_bench(
+        client,
+        method=args.method,
+        path=args.path,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        duration=args.duration,
+        requests=args.requests
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(format_report(result))
+
+# Parse a --match-size value: "N" (exact size) or a "MIN:MAX" range where either end may be
+# left out ("100:", ":2048")
+def parse_size_range(value):
+    try:
+        if ":" not in value:
+            return int(value)
+        low, high = value.split(":", 1)
+        size_range = (int(low) if low else None, int(high) if high else None)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size '{value}': expected N or MIN:MAX")
+    if size_range == (None, None):
+        raise argparse.ArgumentTypeError("a size range needs at least one end")
+    return size_range
+
+# Run a wordlist sweep and print its summary (matches go to stdout as JSONL unless -o is given)
+def run_sweep_command(args):
+    import json
+    from httpcraft.bench import load_client
+    from httpcraft.history import body_size
+
+    client = load_client(args.config)
+    output = args.output
+
+    def print_match(value, exchange):
+        print(json.dumps({"value": value, "status": exchange.response.status_code,
+                          "size": body_size(exchange.response), "path": exchange.request.path}), flush=True)
+
+    summary = client.sweep(
+        args.method.upper(),
+        args.path,
+        args.wordlist,
+        field=args.field,
+        position=args.position,
+        max_workers=args.concurrency,
+        match_status=args.match_status,
+        match_size=args.match_size,
+        match_regex=args.match_regex,
+        callback=print_match if output is None else None,
+        output=output,
+        max_matches=args.max_matches
+    )
+    print(f"[+] Sent {summary['sent']} requests in {summary['duration']:.2f} s "
+          f"({summary['throughput']:.1f} req/s): {summary['matched']} matches, {summary['errors']} errors",
+          file=sys.stderr)
+
+# Replay a saved history against the target of a config file and print the diff report
+def run_replay_command(args):
+    import json
+    from httpcraft.bench import load_client
+    from httpcraft.replay import format_replay_report
+
+    client = load_client(args.config)
+    report = client.replay_history(args.history, mode=args.mode, speed=args.speed,
+                                   max_workers=args.concurrency, output=args.diff)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_replay_report(report))
+
 def main():
     parser = argparse.ArgumentParser(
     description="HttpCraft - HTTP request crafting and inspection tool"
@@ -11,18 +96,65 @@ def main():
     parser.add_argument("--run-tests", action="store_true", help="Run internal test suite")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose output for --run-tests")
 
+    subparsers = parser.add_subparsers(dest="command")
+    bench = subparsers.add_parser("bench", help="Load-test a target described by a saved config file")
+    bench.add_argument("config", help="Config file written by save_config_to_file")
+    bench.add_argument("--method", default="GET", help="HTTP method (default: GET)")
+    bench.add_argument("--path", default="", help="Request path (default: /)")
+    bench.add_argument("-c", "--concurrency", type=int, default=1, help="Concurrent workers (default: 1)")
+    bench.add_argument("-r", "--rate", type=float, default=None, help="Target rate in requests/s (default: unbounded)")
+    bench.add_argument("-d", "--duration", type=float, default=None, help="Run time in seconds (default: 10 if -n is not given)")
+    bench.add_argument("-n", "--requests", type=int, default=None, help="Total number of requests")
+    bench.add_argument("--json", action="store_true", help="Print the report as JSON")
+    bench.add_argument("-o", "--output", help="Also write the JSON report to this file")
+
+    sweep = subparsers.add_parser("sweep", help="Sweep a wordlist through the target of a saved config file")
+    sweep.add_argument("config", help="Config file written by save_config_to_file")
+    sweep.add_argument("wordlist", help="Wordlist file, one value per line (read lazily)")
+    sweep.add_argument("field", help="Payload field, path placeholder or header that receives each value")
+    sweep.add_argument("--method", default="POST", help="HTTP method (default: POST)")
+    sweep.add_argument("--path", default="", help="Request path, may contain {field} (default: /)")
+    sweep.add_argument("--position", choices=["payload", "path", "header"], default="payload",
+                       help="Where the value goes (default: payload)")
+    sweep.add_argument("-c", "--concurrency", type=int, default=10, help="Concurrent workers (default: 10)")
+    sweep.add_argument("--match-status", type=int, nargs="+", default=None, help="Keep responses with these statuses")
+    sweep.add_argument("--match-size", type=parse_size_range, default=None,
+                       help="Keep responses with this body size, or a size range MIN:MAX (either end optional)")
+    sweep.add_argument("--match-regex", default=None, help="Keep responses whose body matches this regex")
+    sweep.add_argument("--max-matches", type=int, default=None, help="Stop after this many matches")
+    sweep.add_argument("-o", "--output", help="Write matches as JSONL to this file instead of stdout")
+
+    replay = subparsers.add_parser("replay", help="Replay a saved history against the target of a saved config file")
+    replay.add_argument("config", help="Config file written by save_config_to_file (the new target)")
+    replay.add_argument("history", help="History file written by save_history_to_file (.json or .jsonl)")
+    replay.add_argument("--mode", choices=["original", "scaled", "max"], default="max",
+                        help="Recorded timing, scaled timing or max throughput (default: max)")
+    replay.add_argument("--speed", type=float, default=1.0, help="Speed-up factor for --mode scaled (default: 1)")
+    replay.add_argument("-c", "--concurrency", type=int, default=10, help="Max requests in flight (default: 10)")
+    replay.add_argument("--diff", help="Write one JSONL diff record per request to this file")
+    replay.add_argument("--json", action="store_true", help="Print the report as JSON")
+
     args = parser.parse_args()
 
-    if args.run_tests:
+    if args.command == "bench":
+        run_bench_command(args)
+    elif args.command == "sweep":
+        run_sweep_command(args)
+    elif args.command == "replay":
+        run_replay_command(args)
+    elif args.run_tests:
         from httpcraft.tests.runtests import run_from_cli        
         run_from_cli(verbose=args.verbose)
     else:
         print("HttpCraft - HTTP client library\n")
         print("This tool is meant to be imported and used in Python code.")
-        print("\nAvailable CLI option:")
+        print("\nAvailable CLI options:")
         print("  --run-tests     Run internal tests and check installation")
+        print("  bench CONFIG    Load-test the target of a saved config (see 'httpcraft bench --help')")
+        print("  sweep CONFIG WORDLIST FIELD   Sweep a wordlist through a saved config (see 'httpcraft sweep --help')")
+        print("  replay CONFIG HISTORY         Replay a saved history against a new target (see 'httpcraft replay --help')")
         print("\nExample:")
         print("  from httpcraft import HttpCraft\n  client = HttpCraft('http://example.com')")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,96 @@
+# subnet_musk
+
+import json
+
+
+# JSON codec built on the standard library, and the interface of every codec.
+# Compact output uses "," and ":" without spaces and writes non-ASCII characters
+# as UTF-8; pretty output is indented by `indent` spaces (two by default).
+class HttpCraftJsonCodec:
+    name = "json"
+    separator = ","  # between the members of a compact object
+
+    # Serialize to str
+    def dumps(self, obj, default=None, pretty: bool = False, sort_keys: bool = False, indent: int = 2):
+        if pretty:
+            return json.dumps(obj, default=default, indent=indent, sort_keys=sort_keys, ensure_ascii=False)
+        return json.dumps(obj, default=default, separators=(",", ":"), sort_keys=sort_keys, ensure_ascii=False)
+
+    # Serialize to UTF-8 bytes
+    def dumpb(self, obj, default=None, pretty: bool = False, sort_keys: bool = False, indent: int = 2):
+        return self.dumps(obj, default=default, pretty=pretty, sort_keys=sort_keys, indent=indent).encode("utf-8")
+
+    # Parse a str or bytes document (bytes may be UTF-8, UTF-16 or UTF-32). `object_hook` is
+    # called on every object; with `hook_key`, only documents containing that key need it
+    def loads(self, data, object_hook=None, hook_key: str = None):
+        return json.loads(data, object_hook=object_hook)
+
+    # Serialize to a text file
+    def dump(self, obj, f, default=None, pretty: bool = False, indent: int = 2):
+        f.write(self.dumps(obj, default=default, pretty=pretty, indent=indent))
+
+    # Parse a text or binary file
+    def load(self, f, object_hook=None, hook_key: str = None):
+        return self.loads(f.read(), object_hook=object_hook, hook_key=hook_key)
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+
+# JSON codec built on orjson (several times faster than the standard library).
+# Documents orjson cannot handle (non-str keys, integers over 64 bits, non-UTF-8
+# input) fall back to the standard library, so both codecs accept the same input.
+# orjson has no object_hook: documents that need one are parsed by the standard
+# library, which applies hooks in C (faster than walking orjson's output).
+# orjson only indents by two spaces: other indents are written by the standard library.
+class HttpCraftOrjsonCodec(HttpCraftJsonCodec):
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def dumpb(self, obj, default=None, pretty: bool = False, sort_keys: bool = False, indent: int = 2):
+        orjson = self._orjson
+        if not pretty or indent == 2:
+            option = (orjson.OPT_INDENT_2 if pretty else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+            try:
+                return orjson.dumps(obj, default=default, option=option)
+            except TypeError:
+                pass
+        return HttpCraftJsonCodec.dumps(self, obj, default=default, pretty=pretty, sort_keys=sort_keys,
+                                        indent=indent).encode("utf-8")
+
+    def dumps(self, obj, default=None, pretty: bool = False, sort_keys: bool = False, indent: int = 2):
+        return self.dumpb(obj, default=default, pretty=pretty, sort_keys=sort_keys, indent=indent).decode("utf-8")
+
+    def loads(self, data, object_hook=None, hook_key: str = None):
+        if object_hook is not None:
+            if hook_key is None:
+                return json.loads(data, object_hook=object_hook)
+            marker = '"%s"' % hook_key
+            if (marker if isinstance(data, str) else marker.encode("utf-8")) in data:
+                return json.loads(data, object_hook=object_hook)
+        try:
+            return self._orjson.loads(data)
+        except self._orjson.JSONDecodeError:
+            return json.loads(data, object_hook=object_hook)
+
+
+CODECS = {"json": HttpCraftJsonCodec, "orjson": HttpCraftOrjsonCodec}
+_instances = {}
+
+
+# Codec by name: "json", "orjson" or "auto" (orjson when installed, else the standard library)
+def get_codec(name: str = "auto"):
+    if name not in _instances:
+        if name == "auto":
+            try:
+                codec = get_codec("orjson")
+            except ImportError:
+                codec = get_codec("json")
+        else:
+            assert name in CODECS, f"JSON codec must be one of: auto, {', '.join(CODECS)}"
+            codec = CODECS[name]()  # ImportError if the library is missing
+        _instances[name] = codec
+    return _instances[name]
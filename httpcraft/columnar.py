@@ -0,0 +1,170 @@
+# subnet_musk
+
+import math
+from array import array
+
+from .codec import get_codec
+from .spool import HttpCraftSpooledBody
+
+STRING_COLUMNS = ("method", "path", "response_type")
+PERCENTILES = (50, 90, 99)
+
+
+# Import an optional dependency with an install hint
+def _require(module):
+    try:
+        return __import__(module)
+    except ImportError:
+        raise ImportError(f"Columnar export requires {module}: pip install httpcraft[columnar]")
+
+
+# Raw bytes of a response body (bodies loaded from files are re-encoded)
+def response_body_bytes(response):
+    raw = response.raw_body
+    if isinstance(raw, HttpCraftSpooledBody):
+        return raw.read()
+    if isinstance(raw, (bytes, bytearray)):
+        return bytes(raw)
+    body = response.response_body
+    if body is None:
+        return b""
+    if isinstance(body, (bytes, bytearray)):
+        return bytes(body)
+    if isinstance(body, (dict, list)):
+        return get_codec().dumpb(body)
+    return str(body).encode("utf-8")
+
+
+# Collect the history into columns in a single pass:
+# timestamp (epoch seconds), method, path, status, elapsed (seconds), request_bytes,
+# response_bytes (-1 when unknown), response_type and, optionally, body
+def history_columns(history, include_bodies: bool = False):
+    columns = {
+        "timestamp": array("d"),
+        "method": [],
+        "path": [],
+        "status": array("i"),
+        "elapsed": array("d"),
+        "request_bytes": array("q"),
+        "response_bytes": array("q"),
+        "response_type": []
+    }
+    if include_bodies:
+        columns["body"] = []
+    for exchange in history:
+        request, response = exchange.request, exchange.response
+        epoch = exchange.epoch
+        columns["timestamp"].append(math.nan if epoch is None else epoch)
+        columns["method"].append(request.method)
+        columns["path"].append(request.path)
+        columns["status"].append(response.status_code or 0)
+        columns["elapsed"].append(response.elapsed_time or 0.0)
+        columns["request_bytes"].append(-1 if response.request_bytes is None else response.request_bytes)
+        columns["response_bytes"].append(-1 if response.response_bytes is None else response.response_bytes)
+        columns["response_type"].append(response.response_type)
+        if include_bodies:
+            columns["body"].append(response_body_bytes(response))
+    return columns
+
+
+# Write columns as an Arrow IPC file (.arrow/.feather) or Parquet file (.parquet).
+# String columns are dictionary-encoded.
+def export_arrow(columns: dict, filepath: str):
+    pa = _require("pyarrow")
+    fields = {}
+    for name, values in columns.items():
+        if name in STRING_COLUMNS:
+            fields[name] = pa.array(values, type=pa.string()).dictionary_encode()
+        elif name == "body":
+            fields[name] = pa.array(values, type=pa.large_binary())
+        else:
+            arrow_type = {"d": pa.float64(), "i": pa.int32(), "q": pa.int64()}[values.typecode]
+            fields[name] = pa.Array.from_buffers(arrow_type, len(values), [None, pa.py_buffer(values)])  # zero-copy
+    table = pa.table(fields)
+    if filepath.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        pq.write_table(table, filepath)
+    else:
+        import pyarrow.feather as feather
+        feather.write_feather(table, filepath, compression="uncompressed")
+    return table.num_rows
+
+
+# Write columns as a NumPy .npz archive, without pickled objects: string columns are stored
+# as int32 codes plus a "<name>_labels" array, bodies as one uint8 "body" buffer plus
+# "body_offsets" (body i is body[body_offsets[i]:body_offsets[i + 1]])
+def export_npz(columns: dict, filepath: str):
+    np = _require("numpy")
+    arrays = {}
+    for name, values in columns.items():
+        if name in STRING_COLUMNS:
+            labels, codes = np.unique(np.array(values, dtype=str), return_inverse=True)
+            arrays[name] = codes.astype(np.int32)
+            arrays[name + "_labels"] = labels
+        elif name == "body":
+            offsets = np.zeros(len(values) + 1, dtype=np.int64)
+            np.cumsum([len(body) for body in values], out=offsets[1:])
+            arrays["body"] = np.frombuffer(b"".join(values), dtype=np.uint8)
+            arrays["body_offsets"] = offsets
+        else:
+            arrays[name] = np.frombuffer(values, dtype=values.typecode)
+    np.savez(filepath, **arrays)
+    return len(columns["status"])
+
+
+# Latency summaries per group, fully vectorized: rows are sorted by (group, elapsed) once and
+# the nearest-rank percentiles of every group are gathered with index arithmetic
+def _group_stats(np, keys, elapsed, duration):
+    labels, groups = np.unique(keys, return_inverse=True)
+    order = np.lexsort((elapsed, groups))
+    sorted_elapsed = elapsed[order]
+    counts = np.bincount(groups, minlength=len(labels))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    sums = np.bincount(groups, weights=elapsed, minlength=len(labels))
+
+    summary = {
+        "count": counts,
+        "throughput": counts / duration if duration > 0 else np.zeros(len(labels)),
+        "mean": sums / counts,
+        "max": sorted_elapsed[starts + counts - 1]
+    }
+    for percent in PERCENTILES:
+        rank = np.maximum(1, np.ceil(counts * percent / 100.0).astype(np.int64))
+        summary[f"p{percent}"] = sorted_elapsed[starts + rank - 1]
+
+    result = {}
+    for i, label in enumerate(labels.tolist()):
+        result[str(label)] = {key: values[i].item() for key, values in summary.items()}
+    return result
+
+
+# Latency percentiles (seconds) and throughput (requests/s over the history's time span),
+# overall, per status code and per path
+def history_stats(columns: dict):
+    np = _require("numpy")
+    elapsed = np.frombuffer(columns["elapsed"], dtype=np.float64)
+    timestamps = np.frombuffer(columns["timestamp"], dtype=np.float64)
+    count = len(elapsed)
+    if count == 0:
+        return {"count": 0, "duration": 0.0, "throughput": 0.0, "latency": {}, "by_status": {}, "by_path": {}}
+
+    # exchanges are timestamped when recorded: the window runs from the first request sent
+    # (timestamp - elapsed) to the last response recorded
+    valid = ~np.isnan(timestamps)
+    duration = 0.0
+    if valid.any():
+        duration = float(np.max(timestamps[valid]) - np.min(timestamps[valid] - elapsed[valid]))
+
+    ordered = np.sort(elapsed)
+    latency = {"mean": float(elapsed.mean()), "max": float(ordered[-1])}
+    for percent in PERCENTILES:
+        latency[f"p{percent}"] = float(ordered[max(1, math.ceil(count * percent / 100.0)) - 1])
+
+    return {
+        "count": count,
+        "duration": duration,
+        "throughput": count / duration if duration > 0 else 0.0,
+        "latency": latency,
+        "by_status": _group_stats(np, np.frombuffer(columns["status"], dtype=np.int32), elapsed, duration),
+        "by_path": _group_stats(np, np.array(columns["path"], dtype=str), elapsed, duration)
+    }
@@ -0,0 +1,64 @@
+# subnet_musk
+
+import gzip
+import zlib
+
+REQUEST_ENCODINGS = ("gzip", "deflate")  # Content-Encoding values HttpCraft can compress request bodies with
+GZIP_MAGIC = b"\x1f\x8b"
+GZIP_LEVEL = 6  # gzip's own default (9) costs much more time for a few percent of size
+
+
+# Compress a request body for the given Content-Encoding. "deflate" is the zlib format
+# (RFC 9110), not raw deflate; gzip output has no timestamp, so equal bodies give equal bytes
+def compress_body(data: bytes, encoding: str = "gzip", level: int = GZIP_LEVEL):
+    assert encoding in REQUEST_ENCODINGS, f"Request compression must be one of: {', '.join(REQUEST_ENCODINGS)}"
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31 if encoding == "gzip" else 15)
+    return compressor.compress(data) + compressor.flush()
+
+
+# Incremental decoder of a gzip or deflate response body fed chunk by chunk
+# (servers sending "deflate" as raw deflate data are accepted too)
+class BodyDecoder:
+    def __init__(self, encoding: str):
+        assert encoding in REQUEST_ENCODINGS, f"Cannot decode Content-Encoding '{encoding}'"
+        self.encoding = encoding
+        self._first = True
+        self._obj = zlib.decompressobj(47 if encoding == "gzip" else 15)  # 47: gzip or zlib header
+
+    def decompress(self, data: bytes):
+        if self._first and data:
+            self._first = False
+            if self.encoding == "deflate":
+                try:
+                    return self._obj.decompress(data)
+                except zlib.error:
+                    self._obj = zlib.decompressobj(-15)  # raw deflate stream without zlib header
+        return self._obj.decompress(data)
+
+    def flush(self):
+        return self._obj.flush()
+
+
+# Whether a file written to `path` is gzip-compressed (decided by the ".gz" suffix)
+def is_gzip_path(path: str):
+    return path.endswith(".gz")
+
+
+# Whether the file at `path` starts with the gzip magic number
+def is_gzip_file(path: str):
+    with open(path, "rb") as f:
+        return f.read(2) == GZIP_MAGIC
+
+
+# open() for the files HttpCraft reads and writes: files are written gzip-compressed when
+# their name ends with ".gz" and read through a streaming gzip decoder whenever they are
+# gzip data, whatever their name. JSON and text files never start with the gzip magic number
+def open_file(path: str, mode: str = "r", encoding: str = None, errors: str = None):
+    binary = "b" in mode
+    if not binary and encoding is None:
+        encoding = "utf-8"
+    compressed = is_gzip_file(path) if mode.startswith("r") else is_gzip_path(path)
+    if not compressed:
+        return open(path, mode, encoding=encoding, errors=errors)
+    mode = mode if binary or "t" in mode else mode + "t"  # gzip.open defaults to binary
+    return gzip.open(path, mode, compresslevel=GZIP_LEVEL, encoding=encoding, errors=errors)
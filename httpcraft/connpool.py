@@ -0,0 +1,86 @@
+# subnet_musk
+
+import time
+
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from .poolstats import current_phase_timing
+
+
+# Connection mixin timing DNS + TCP (+ TLS) setup
+class _TimedConnectionMixin:
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            timing = current_phase_timing()
+            if timing is not None:
+                timing["connect"] += time.perf_counter() - start
+
+
+# Whether a pooled connection still holds an open socket
+def _is_connected(conn):
+    connected = getattr(conn, "is_connected", None)
+    if connected is not None:
+        return connected
+    return getattr(conn, "sock", None) is not None  # urllib3 < 2
+
+
+# Connection pool mixin adding statistics and an idle timeout for kept-alive connections
+class _HttpCraftPoolMixin:
+    stats = None
+    keepalive_timeout = None
+
+    def _get_conn(self, timeout=None):
+        start = time.perf_counter()
+        conn = super()._get_conn(timeout=timeout)
+        idle_closed = False
+        if self.keepalive_timeout is not None and _is_connected(conn):
+            last_used = getattr(conn, "_httpcraft_last_used", None)
+            if last_used is not None and time.monotonic() - last_used > self.keepalive_timeout:
+                conn.close()
+                idle_closed = True
+        reused = _is_connected(conn)
+        self.stats.record(reused=reused, idle_closed=idle_closed)
+        timing = current_phase_timing()
+        if timing is not None:
+            timing["connect"] += time.perf_counter() - start  # time spent waiting for a pooled connection
+            timing["connection_reused"] = reused
+        return conn
+
+    def _put_conn(self, conn):
+        if conn is not None:
+            conn._httpcraft_last_used = time.monotonic()
+        super()._put_conn(conn)
+
+
+_TIMED_HTTP_CONNECTION = type("HttpCraftHTTPConnection", (_TimedConnectionMixin, HTTPConnectionPool.ConnectionCls), {})
+_TIMED_HTTPS_CONNECTION = type("HttpCraftHTTPSConnection", (_TimedConnectionMixin, HTTPSConnectionPool.ConnectionCls), {})
+
+
+# urllib3 pool classes by scheme sharing `stats` and closing connections idle for more than
+# `keepalive_timeout` seconds, for a PoolManager's pool_classes_by_scheme
+def pool_classes(stats, keepalive_timeout: float = None):
+    attrs = {"stats": stats, "keepalive_timeout": keepalive_timeout}
+    http_attrs = dict(attrs, ConnectionCls=_TIMED_HTTP_CONNECTION)
+    https_attrs = dict(attrs, ConnectionCls=_TIMED_HTTPS_CONNECTION)
+    return {
+        "http": type("HttpCraftConnectionPool", (_HttpCraftPoolMixin, HTTPConnectionPool), http_attrs),
+        "https": type("HttpCraftHTTPSConnectionPool", (_HttpCraftPoolMixin, HTTPSConnectionPool), https_attrs)
+    }
+
+
+# Open up to `connections` connections in `pool` and park them there; returns how many
+def warm_up_pool(pool, connections: int):
+    conns = []
+    try:
+        for _ in range(connections):
+            conn = super(_HttpCraftPoolMixin, pool)._get_conn()  # not counted in the stats
+            if not _is_connected(conn):
+                conn.connect()
+            conns.append(conn)
+    finally:
+        for conn in conns:
+            pool._put_conn(conn)
+    return len(conns)
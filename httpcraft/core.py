@@ -1,79 +1,34 @@
 # subnet_musk
 
-import requests
-import json
+# requests, urllib3, BeautifulSoup, mimetypes and the modules of optional features (cache,
+# retries, prepared requests, sweeps, replay, HAR, columnar export) are imported where they
+# are first needed: they make up most of the import time, which matters for short scripts
+# and the CLI
 from urllib.parse import urlparse
-from bs4 import BeautifulSoup
-from dataclasses import dataclass
+import functools
 import time
 import os
-from datetime import datetime
-import mimetypes
 import re
-
-@dataclass
-class HttpCraftRequest:
-    url: str
-    port: int
-    path: str
-    method: str
-    headers: dict
-    cookies: dict
-    payload: dict
-    payload_type: str
-
-    def to_dict(self):
-        return {
-            "url": self.url,
-            "port": self.port,
-            "path": self.path,
-            "method": self.method,
-            "headers": self.headers,
-            "cookies": self.cookies,
-            "payload": self.payload,
-            "payload_type": self.payload_type
-        }
-    
-    def was_json(self):
-        return self.payload_type == "json"
-
-    def was_form(self):
-        return self.payload_type == "form"
-
-@dataclass
-class HttpCraftResponse:
-    status_code: int
-    elapsed_time: float
-    response_type: str
-    response_body: any
-    raw_headers: dict
-
-    def to_dict(self):
-        return {
-            "status_code": self.status_code,
-            "elapsed_time": self.elapsed_time,
-            "response_type": self.response_type,
-            "response_body": self.response_body,
-            "raw_headers": self.raw_headers
-        }
-
-@dataclass
-class HttpCraftExchange:
-    timestamp: str
-    request: HttpCraftRequest
-    response: HttpCraftResponse
-    csrf_token_updated: bool = False  # default to False
-
-    def to_dict(self):
-        return {
-            "timestamp": self.timestamp,
-            "request": self.request.to_dict(),
-            "response": self.response.to_dict(),
-            "csrf_token_updated": self.csrf_token_updated
-        }
+import shutil
+import sys
+import threading
+import tempfile
+import zlib
+from collections import deque
+
+from .models import HttpCraftRequest, HttpCraftResponse, HttpCraftExchange, detect_response_type
+from .history import HttpCraftHistory, HttpCraftHistoryLog, json_default
+from .spool import HttpCraftSpooledBody
+from .poolstats import HttpCraftPoolStats, begin_phase_timing
+from .ratelimit import HttpCraftRateLimiter
+from .codec import get_codec
+from .compression import REQUEST_ENCODINGS, GZIP_LEVEL, BodyDecoder, compress_body, open_file, is_gzip_path
 
 class HttpCraft:
-    def __init__(self, base_url: str):
+    STREAM_CHUNK_SIZE = 64 * 1024  # bytes written per chunk in streaming mode
+
+    def __init__(self, base_url: str, pool_connections: int = 10, pool_maxsize: int = 10,
+                 pool_block: bool = False, keepalive_timeout: float = None):
         parsed = urlparse(base_url)
         if not parsed.scheme:
             raise ValueError("URL must include a scheme (http:// or https://)")
@@ -87,11 +42,28 @@ class HttpCraft:
         self.payload = {}
         self.payload_mode = "json"  # default mode
         self.cookies = {}
-        self.history = []
-        self.session = requests.Session()
+        self.history = HttpCraftHistory()
+        self._lock = threading.RLock()  # guards history, cookies and CSRF updates
+
+        self.pool_connections = pool_connections  # number of per-host pools kept
+        self.pool_maxsize = pool_maxsize          # max connections kept per host
+        self.pool_block = pool_block              # wait for a free connection instead of opening extra ones
+        self.keepalive_timeout = keepalive_timeout  # close kept-alive connections idle for longer (seconds)
+        self.pool_stats = HttpCraftPoolStats()
+        self._session = None  # requests.Session, created on first use (see session)
+        self.transport_name = "requests"  # see set_transport
+        self._transport = None
 
         self.csrf_mode = "none"
         self.csrf_field = "csrf_token"
+        self.spool_dir = None  # directory for streamed bodies (system temp dir if None)
+        self.cache = None      # HttpCraftCache, see enable_cache
+        self.retry_policy = None  # HttpCraftRetryPolicy, see set_retry_policy
+        self.rate_limiter = None  # HttpCraftRateLimiter, see set_rate_limit
+        self._hedge_executor = None
+        self.json_codec = get_codec()  # JSON codec, see set_json_codec
+        self.request_compression = None  # {"encoding", "min_size", "level"}, see set_request_compression
+        self.accept_encoding = None      # Accept-Encoding sent (None = requests' default), see set_accept_encoding
 
     # Print the current configuration
     def print_config(self):
@@ -102,12 +74,18 @@ class HttpCraft:
         print("CSRF Mode:", self.csrf_mode)
         print("CSRF Field:", self.csrf_field)
         print("Headers:")
-        print(json.dumps(self.headers, indent=2))
+        print(self.json_codec.dumps(self.headers, pretty=True))
         print("Cookies:")
-        print(json.dumps(self.cookies, indent=2))
+        print(self.json_codec.dumps(self.cookies, pretty=True))
         print("Payload Mode:", self.payload_mode)
+        print("JSON Codec:", self.json_codec.name)
+        print("Transport:", self.transport_name)
+        compression = self.request_compression
+        print("Request Compression:", f"{compression['encoding']} (bodies of {compression['min_size']}+ bytes)"
+              if compression else "none")
+        print("Accept-Encoding:", self.get_accept_encoding())
         print("Payload:")
-        print(json.dumps(self.payload, indent=2))
+        print(self.json_codec.dumps(self.payload, pretty=True))
 
     # Reset all configuration and state
     def reset(self):
@@ -120,11 +98,20 @@ class HttpCraft:
         self.payload = {}
         self.payload_mode = "json"  # default mode
         self.cookies = {}
-        self.history = []
-        self.session = requests.Session()
+        self.history = HttpCraftHistory()
+        self._session = None
+        self.transport_name = "requests"
+        self._transport = None
 
         self.csrf_mode = "none"
         self.csrf_field = "csrf_token"
+        self.spool_dir = None
+        self.cache = None
+        self.retry_policy = None
+        self.rate_limiter = None
+        self.json_codec = get_codec()
+        self.request_compression = None
+        self.accept_encoding = None
 
     ''' --------- TARGET --------- '''
     # Build full URL using base, host, and optional override port
@@ -163,6 +150,288 @@ class HttpCraft:
         self.port = None
     ''' -------------------------- '''
 
+    ''' ---------- POOL ---------- '''
+    # The requests.Session sending every request, created with its adapter on first use
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    session = requests.Session()
+                    if self.accept_encoding is not None:
+                        session.headers["Accept-Encoding"] = self.accept_encoding
+                    self._mount_adapter(session)
+                    self._session = session
+        return self._session
+
+    @session.setter
+    def session(self, session):
+        self._session = session
+
+    # Mount a HttpCraftAdapter built from the current pool options on the session
+    # (nothing to do before the session exists: it gets one when it is created)
+    def _mount_adapter(self, session=None):
+        session = session if session is not None else self._session
+        if session is None:
+            return
+        from .pool import HttpCraftAdapter
+        adapter = HttpCraftAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+            keepalive_timeout=self.keepalive_timeout,
+            stats=self.pool_stats
+        )
+        old_adapter = session.adapters.get("https://")
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if old_adapter is not None:
+            old_adapter.close()
+
+    # Configure connection pooling and keep-alive (None leaves an option unchanged)
+    def set_pool_options(self, pool_connections: int = None, pool_maxsize: int = None,
+                         pool_block: bool = None, keepalive_timeout: float = None):
+        if pool_connections is not None:
+            assert pool_connections > 0, "pool_connections must be a positive integer"
+            self.pool_connections = pool_connections
+        if pool_maxsize is not None:
+            assert pool_maxsize > 0, "pool_maxsize must be a positive integer"
+            self.pool_maxsize = pool_maxsize
+        if pool_block is not None:
+            self.pool_block = pool_block
+        if keepalive_timeout is not None:
+            self.keepalive_timeout = keepalive_timeout
+        self._mount_adapter()
+        if self._transport is not None:
+            self._transport.configure_pool()
+
+    # Get the current pool options
+    def get_pool_options(self):
+        return {
+            "pool_connections": self.pool_connections,
+            "pool_maxsize": self.pool_maxsize,
+            "pool_block": self.pool_block,
+            "keepalive_timeout": self.keepalive_timeout
+        }
+
+    # Pre-open `connections` connections to the target (default: the full pool size)
+    def warm_up(self, connections: int = None, port: int = None):
+        url = self._build_url("", override_port=port)
+        opened = self.transport.warm_up(url, connections or self.pool_maxsize)
+        print(f"[+] {opened} connection(s) opened to '{url}'")
+        return opened
+
+    # Get connection pool statistics (acquisitions, reused, new_connections, idle_closed, reuse_ratio)
+    def get_pool_stats(self):
+        return self.pool_stats.to_dict()
+
+    # Reset connection pool statistics
+    def reset_pool_stats(self):
+        self.pool_stats.reset()
+    ''' -------------------------- '''
+
+    ''' -------- TRANSPORT ------- '''
+    # The transport sending every request, created on first use (see set_transport)
+    @property
+    def transport(self):
+        if self._transport is None:
+            with self._lock:
+                if self._transport is None:
+                    from .transport import TRANSPORTS
+                    self._transport = TRANSPORTS[self.transport_name](self)
+        return self._transport
+
+    # Choose how requests are sent: "requests" (the default, through the requests.Session) or
+    # "urllib3" (a lean backend on urllib3 connection pools, without requests' per-request
+    # machinery: no cookie jar, environment proxies or hooks). Exchanges are filled the same way
+    def set_transport(self, name: str = "requests"):
+        from .transport import TRANSPORTS
+        assert name in TRANSPORTS, f"Transport must be one of: {', '.join(TRANSPORTS)}"
+        with self._lock:
+            if self._transport is not None and self._transport.name != name:
+                self._transport.close()
+                self._transport = None
+            self.transport_name = name
+
+    # Get the name of the transport in use
+    def get_transport(self):
+        return self.transport_name
+    ''' -------------------------- '''
+
+    ''' -------- RATE LIMIT ------- '''
+    # Limit requests to `rate` per second with bursts of up to `burst` requests (default: one
+    # second worth), per "host:port" target; with `target`, only that target gets this limit
+    def set_rate_limit(self, rate: float, burst: float = None, target: str = None):
+        with self._lock:
+            if self.rate_limiter is None:
+                self.rate_limiter = HttpCraftRateLimiter()
+            if target is None:
+                self.rate_limiter.set_default(rate, burst)
+            else:
+                self.rate_limiter.set_limit(target, rate, burst)
+
+    # Send requests as fast as the caller does
+    def clear_rate_limit(self):
+        self.rate_limiter = None
+
+    # Wait statistics per target (None when no rate limit is set)
+    def get_rate_limit_stats(self):
+        return self.rate_limiter.stats() if self.rate_limiter is not None else None
+
+    # Rate limiter key of a URL: "host:port", with the scheme's default port when none is given
+    @staticmethod
+    def _rate_limit_target(url):
+        parsed = urlparse(url)
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        return f"{parsed.hostname}:{port}"
+    ''' -------------------------- '''
+
+    ''' ---------- RETRY --------- '''
+    # Retry failed requests (see HttpCraftRetryPolicy for the options)
+    def set_retry_policy(self, max_attempts: int = 3, backoff_base: float = 0.1, backoff_max: float = 10.0,
+                         jitter: bool = True, retry_statuses=(429, 502, 503, 504), retry_exceptions=None,
+                         respect_retry_after: bool = True, max_retry_after: float = 60.0,
+                         retry_non_idempotent: bool = False, hedge_after: float = None):
+        from .retry import HttpCraftRetryPolicy
+        self.retry_policy = HttpCraftRetryPolicy(
+            max_attempts=max_attempts, backoff_base=backoff_base, backoff_max=backoff_max, jitter=jitter,
+            retry_statuses=retry_statuses, retry_exceptions=retry_exceptions,
+            respect_retry_after=respect_retry_after, max_retry_after=max_retry_after,
+            retry_non_idempotent=retry_non_idempotent, hedge_after=hedge_after
+        )
+
+    # Get the current retry policy (None when requests are sent once)
+    def get_retry_policy(self):
+        return self.retry_policy.to_dict() if self.retry_policy is not None else None
+
+    # Send every request exactly once again
+    def clear_retry_policy(self):
+        self.retry_policy = None
+
+    # Threads running hedged requests (created on first use)
+    def _get_hedge_executor(self):
+        with self._lock:
+            if self._hedge_executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self._hedge_executor = ThreadPoolExecutor(max_workers=max(32, 4 * self.pool_maxsize),
+                                                          thread_name_prefix="httpcraft-hedge")
+            return self._hedge_executor
+
+    # Fetch with a duplicate request sent after hedge_after seconds; the first successful
+    # answer wins and the other one is discarded when it completes.
+    # Returns (response, prepared request, winner) with winner "primary" or "hedge"
+    def _fetch_hedged(self, request_func, url, kwargs):
+        from concurrent.futures import wait, FIRST_COMPLETED
+        from .retry import hedge_winner
+        executor = self._get_hedge_executor()
+        primary = executor.submit(self._fetch, request_func, url, kwargs)
+        done, _ = wait([primary], timeout=self.retry_policy.hedge_after)
+        if done:
+            return primary.result() + ("primary",)
+        hedge = executor.submit(self._fetch, request_func, url, kwargs)
+        pending = {primary, hedge}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            settled = hedge_winner(primary, hedge, done, pending)
+            if settled is not None:
+                future, winner = settled
+                return future.result() + (winner,)
+
+    # Fetch, retrying according to the retry policy. Returns (response, prepared request, attempts)
+    # where attempts lists {attempt, delay, elapsed, status_code, error, hedged, winner} per attempt
+    def _fetch_with_retry(self, method, request_func, url, kwargs, stream=False, filepath=None):
+        from .retry import HttpCraftRetryAttempts
+        attempts = HttpCraftRetryAttempts(self.retry_policy, method)
+        for record in attempts:
+            if record["delay"]:
+                time.sleep(record["delay"])
+            start = time.perf_counter()
+            try:
+                if self.retry_policy.can_hedge(method) and not stream:
+                    http_response, sent, winner = self._fetch_hedged(request_func, url, kwargs)
+                    attempts.settled_by(record, winner)
+                else:
+                    http_response, sent = self._fetch(request_func, url, kwargs, stream, filepath)
+            except Exception as e:
+                if not attempts.failed(record, e, time.perf_counter() - start):
+                    raise
+            else:
+                if not attempts.answered(record, http_response, time.perf_counter() - start):
+                    return http_response, sent, attempts.records
+    ''' -------------------------- '''
+
+    ''' ---------- CACHE --------- '''
+    # Cache GET responses in memory (LRU bounded by `max_bytes`), optionally backed by `cache_dir`
+    def enable_cache(self, max_bytes: int = 64 * 1024 * 1024, cache_dir: str = None):
+        from .cache import HttpCraftCache
+        self.cache = HttpCraftCache(max_bytes=max_bytes, cache_dir=cache_dir)
+        print(f"[+] Response cache enabled ({max_bytes} bytes" + (f", stored in '{cache_dir}')" if cache_dir else ")"))
+
+    # Stop caching responses (a disk store is left in place)
+    def disable_cache(self):
+        self.cache = None
+        print("[+] Response cache disabled")
+
+    # Drop every cached response
+    def clear_cache(self):
+        if self.cache is not None:
+            self.cache.clear()
+
+    # Hit/revalidation/miss counters of the cache (None when disabled)
+    def get_cache_stats(self):
+        return self.cache.stats() if self.cache is not None else None
+
+    # Cache key of a GET request: its full URL including the query string
+    def _cache_key(self, url, params=None):
+        import requests
+        return requests.Request("GET", url, params=params).prepare().url
+
+    # Find the cached entry usable for a request: returns (key, entry, fresh); key is None
+    # when the request bypasses the cache, entry is None on a miss, and fresh tells whether
+    # the entry can be served without revalidation
+    def _cache_lookup(self, method, url, params, headers, stream=False):
+        if self.cache is None or method != "GET" or stream:
+            return None, None, False
+        from .cache import parse_cache_control
+        directives = parse_cache_control(headers.get("Cache-Control"))
+        if "no-store" in directives or any(h.lower().startswith("if-") for h in headers):
+            return None, None, False  # explicit conditional requests are sent as they are
+        key = self._cache_key(url, params)
+        entry = self.cache.lookup(key, headers)
+        if entry is None:
+            return key, None, False
+        revalidate = "no-cache" in directives or directives.get("max-age") == "0"  # asked by the caller
+        return key, entry, entry.is_fresh() and not revalidate
+
+    # Serve a fresh entry without touching the network
+    def _cache_hit(self, entry, start):
+        self.cache.record("hit")
+        return entry.to_response(elapsed_time=time.perf_counter() - start, timings={})
+
+    # Update the cache with a response received from the server; returns the response to
+    # record (the cached one after a 304) and the cache status of the exchange
+    def _cache_update(self, method, url, key, entry, request_headers, http_response):
+        if self.cache is None:
+            return http_response, None
+        if key is None:
+            if method not in ["GET", "HEAD"] and http_response.status_code < 400:
+                self.cache.invalidate(self._cache_key(url))  # unsafe methods invalidate the resource
+            return http_response, None
+        if http_response.status_code == 304 and entry is not None:
+            entry = self.cache.refresh(entry, http_response.raw_headers)
+            self.cache.record("revalidated")
+            return entry.to_response(
+                elapsed_time=http_response.elapsed_time,
+                timings=http_response.timings,
+                request_bytes=http_response.request_bytes,
+                response_bytes=http_response.response_bytes
+            ), "revalidated"
+        self.cache.store(key, request_headers, http_response)
+        self.cache.record("miss")
+        return http_response, "miss"
+    ''' -------------------------- '''
+
     ''' ---------- CSRF ---------- '''
     # Configure CSRF handling and token field name
     def set_csrf(self, mode="input", field="csrf_token"):
@@ -170,8 +439,20 @@ class HttpCraft:
         self.csrf_mode = mode
         self.csrf_field = field
 
-    # Extract CSRF token from HTML based on mode
+    # Extract CSRF token from HTML based on mode: a fast tag scan first, and a full
+    # BeautifulSoup parse only when the field name shows up but the scan found nothing
     def extract_csrf_token(self, html):
+        if self.csrf_mode not in ["input", "meta"] or self.csrf_field not in html:
+            return None
+        from .csrf import find_csrf_token
+        token = find_csrf_token(html, self.csrf_mode, self.csrf_field)
+        if token is not None:
+            return token
+        return self._extract_csrf_token_soup(html)
+
+    # Extract CSRF token by parsing the whole document with BeautifulSoup
+    def _extract_csrf_token_soup(self, html):
+        from bs4 import BeautifulSoup
         soup = BeautifulSoup(html, "html.parser")
         if self.csrf_mode == "input":
             tag = soup.find("input", {"type": "hidden", "name": self.csrf_field})
@@ -249,6 +530,89 @@ class HttpCraft:
     def clear_payload(self):
         self.payload = {}
         self.payload_mode = "json"  # reset to default mode
+
+    # Choose the JSON implementation used to encode payloads, decode responses and read/write
+    # files: "orjson", "json" (standard library) or "auto" (orjson when installed)
+    def set_json_codec(self, name: str = "auto"):
+        self.json_codec = get_codec(name)
+
+    # Get the name of the JSON codec in use
+    def get_json_codec(self):
+        return self.json_codec.name
+
+    # Serialize a JSON payload with the client's codec into the request body
+    def _encode_json_body(self, kwargs, payload):
+        kwargs["data"] = self.json_codec.dumpb(payload)
+        if not any(key.lower() == "content-type" for key in kwargs["headers"]):
+            kwargs["headers"]["Content-Type"] = "application/json"
+    ''' -------------------------- '''
+
+    ''' ------- COMPRESSION ------ '''
+    # Compress request bodies of at least `min_size` bytes with `encoding` ("gzip" or "deflate")
+    # and send them with a matching Content-Encoding header. Only for servers known to accept
+    # compressed bodies: HTTP has no way to negotiate request compression
+    def set_request_compression(self, encoding: str = "gzip", min_size: int = 1024, level: int = GZIP_LEVEL):
+        assert encoding in REQUEST_ENCODINGS, f"Request compression must be one of: {', '.join(REQUEST_ENCODINGS)}"
+        assert min_size >= 0, "min_size must be a non-negative integer"
+        assert 0 <= level <= 9, "Compression level must be between 0 and 9"
+        self.request_compression = {"encoding": encoding, "min_size": min_size, "level": level}
+
+    # Get the request compression settings (None when bodies are sent as they are)
+    def get_request_compression(self):
+        return dict(self.request_compression) if self.request_compression is not None else None
+
+    # Send request bodies uncompressed
+    def clear_request_compression(self):
+        self.request_compression = None
+
+    # Content codings accepted in responses, sent as Accept-Encoding: e.g. "gzip" or ["gzip", "br"];
+    # "identity" asks for uncompressed bodies and None restores the default (every coding urllib3
+    # can decode). Compressed responses are decoded transparently, see HttpCraftResponse.body_bytes
+    def set_accept_encoding(self, encodings=None):
+        if encodings is None:
+            self.accept_encoding = None
+            if self._session is not None:
+                import requests
+                self._session.headers["Accept-Encoding"] = requests.utils.default_headers()["Accept-Encoding"]
+            return
+        from urllib3.util.request import ACCEPT_ENCODING
+        if not isinstance(encodings, str):
+            encodings = ", ".join(encodings)
+        supported = {coding.strip() for coding in ACCEPT_ENCODING.split(",")} | {"identity", "*"}
+        for coding in encodings.split(","):
+            name = coding.split(";")[0].strip().lower()
+            assert name in supported, f"Cannot decode '{name}' responses (supported: {', '.join(sorted(supported))})"
+        self.accept_encoding = encodings
+        if self._session is not None:
+            self._session.headers["Accept-Encoding"] = encodings
+
+    # Get the Accept-Encoding header sent with every request
+    def get_accept_encoding(self):
+        return self.transport.default_headers().get("Accept-Encoding")
+
+    # Compress the body in `kwargs` according to the request compression settings. Form payloads
+    # are URL-encoded first, as requests would; bodies already carrying a Content-Encoding,
+    # streams and bodies under the size threshold are left alone
+    def _compress_body(self, kwargs):
+        compression = self.request_compression
+        body = kwargs.get("data")
+        if compression is None or body is None:
+            return
+        headers = kwargs["headers"]
+        if any(key.lower() == "content-encoding" for key in headers):
+            return
+        form = isinstance(body, (dict, list, tuple))
+        if form:
+            import requests
+            body = requests.models.RequestEncodingMixin._encode_params(body)
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if not isinstance(body, (bytes, bytearray)) or len(body) < compression["min_size"]:
+            return
+        kwargs["data"] = compress_body(bytes(body), compression["encoding"], compression["level"])
+        headers["Content-Encoding"] = compression["encoding"]
+        if form and not any(key.lower() == "content-type" for key in headers):
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
     ''' -------------------------- '''
 
     ''' -------- COOKIES --------- '''
@@ -283,22 +647,49 @@ class HttpCraft:
     ''' -------------------------- '''
 
     ''' -------- FILE IMPORT/EXPORT -------- '''
-    # Save the current configuration to a JSON file
-    def save_config_to_file(self, filepath):
-        try:
-            config = {
+    # Files whose name ends with ".gz" are written gzip-compressed, one chunk at a time;
+    # every loader reads gzip-compressed files transparently, whatever their name
+
+    # Configuration as saved by save_config_to_file (also used to clone the client in worker processes)
+    def _config_dict(self):
+        with self._lock:
+            return {
                 "base_url": self.base_url,
                 "host": self.host,
                 "port": self.port,
                 "csrf_mode": self.csrf_mode,
                 "csrf_field": self.csrf_field,
-                "headers": self.headers,
-                "cookies": self.cookies,
-                "payload": self.payload,
-                "payload_mode": self.payload_mode
+                "headers": dict(self.headers),
+                "cookies": dict(self.cookies),
+                "payload": dict(self.payload),
+                "payload_mode": self.payload_mode,
+                "request_compression": self.get_request_compression(),
+                "accept_encoding": self.accept_encoding,
+                "transport": self.transport_name
             }
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
+
+    # Apply a configuration read by load_config_from_file
+    def _apply_config(self, config: dict):
+        self.base_url = config.get("base_url", "")
+        self.host = config.get("host", "")
+        self.port = config.get("port")
+        self.csrf_mode = config.get("csrf_mode", "none")
+        self.csrf_field = config.get("csrf_field", "csrf_token")
+        self.headers = config.get("headers", {}) if isinstance(config.get("headers"), dict) else {}
+        self.cookies = config.get("cookies", {}) if isinstance(config.get("cookies"), dict) else {}
+        self.payload = config.get("payload", {}) if isinstance(config.get("payload"), dict) else {}
+        self.payload_mode = config.get("payload_mode", "json")  # fallback to json if missing
+        compression = config.get("request_compression")
+        self.request_compression = dict(compression) if isinstance(compression, dict) else None
+        self.set_accept_encoding(config.get("accept_encoding"))
+        self.set_transport(config.get("transport", "requests"))
+
+    # Save the current configuration to a JSON file
+    def save_config_to_file(self, filepath):
+        try:
+            config = self._config_dict()
+            with open_file(filepath, 'w', encoding='utf-8') as f:
+                self.json_codec.dump(config, f, pretty=True)
             print(f"[+] Configuration saved to '{filepath}'")
         except Exception as e:
             print(f"[!] Error saving configuration: {e}")
@@ -309,62 +700,119 @@ class HttpCraft:
             print(f"[!] File '{filepath}' does not exist.")
             return
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                self.base_url = config.get("base_url", "")
-                self.host = config.get("host", "")
-                self.port = config.get("port")
-                self.csrf_mode = config.get("csrf_mode", "none")
-                self.csrf_field = config.get("csrf_field", "csrf_token")
-                self.headers = config.get("headers", {}) if isinstance(config.get("headers"), dict) else {}
-                self.cookies = config.get("cookies", {}) if isinstance(config.get("cookies"), dict) else {}
-                self.payload = config.get("payload", {}) if isinstance(config.get("payload"), dict) else {}
-                self.payload_mode = config.get("payload_mode", "json")  # fallback to json if missing
+            with open_file(filepath, 'rb') as f:
+                self._apply_config(self.json_codec.load(f))
             print(f"[+] Configuration loaded from '{filepath}'")
         except Exception as e:
             print(f"[!] Error loading configuration: {e}")
 
     # Load payload from file (JSON only)
     def load_payload_from_file(self, filepath):
-        with open(filepath, 'r', encoding='utf-8') as f:
-            self.payload = json.load(f)
+        with open_file(filepath, 'rb') as f:
+            self.payload = self.json_codec.load(f)
 
     # Save payload to file
     def save_payload_to_file(self, filepath):
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(self.payload, f, indent=4, ensure_ascii=False)
+        with open_file(filepath, 'w', encoding='utf-8') as f:
+            self.json_codec.dump(self.payload, f, pretty=True, indent=4)
 
     # Load headers from file
     def load_headers_from_file(self, filepath):
-        with open(filepath, 'r', encoding='utf-8') as f:
-            self.headers = json.load(f)
+        with open_file(filepath, 'rb') as f:
+            self.headers = self.json_codec.load(f)
 
     # Save headers to file
     def save_headers_to_file(self, filepath):
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(self.headers, f, indent=4, ensure_ascii=False)
+        with open_file(filepath, 'w', encoding='utf-8') as f:
+            self.json_codec.dump(self.headers, f, pretty=True, indent=4)
 
     # Load cookies from file
     def load_cookies_from_file(self, filepath):
-        with open(filepath, 'r', encoding='utf-8') as f:
-            self.cookies = json.load(f)
+        with open_file(filepath, 'rb') as f:
+            self.cookies = self.json_codec.load(f)
 
     # Save cookies to file
     def save_cookies_to_file(self, filepath):
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(self.cookies, f, indent=4, ensure_ascii=False)
+        with open_file(filepath, 'w', encoding='utf-8') as f:
+            self.json_codec.dump(self.cookies, f, pretty=True, indent=4)
 
-    # Save the full request history to a JSON file
+    # Save the full request history to a JSON file (or to a JSONL log with its
+    # offset index when the path ends with ".jsonl"), one exchange at a time.
+    # The JSON file is a machine file: an array with one compact exchange per line.
+    # A ".jsonl.gz" path gives a gzip-compressed JSONL stream (no index: it cannot be seeked)
     def save_history_to_file(self, filepath):
         try:
-            history_list = [exchange.to_dict() for exchange in self.history]
-            with open(filepath, "w", encoding="utf-8") as f:
-                json.dump(history_list, f, indent=2, ensure_ascii=False)
+            if filepath.endswith(".jsonl"):
+                log = HttpCraftHistoryLog(filepath, codec=self.json_codec)
+                try:
+                    for exchange in self.history:
+                        log.append(exchange)
+                finally:
+                    log.close()
+            elif filepath.endswith(".jsonl.gz"):
+                with open_file(filepath, "wb") as f:
+                    for exchange in self.history:
+                        f.write(self.json_codec.dumpb(exchange.to_dict(), default=json_default) + b"\n")
+            else:
+                with open_file(filepath, "wb") as f:
+                    f.write(b"[")
+                    separator = b"\n"
+                    for exchange in self.history:
+                        f.write(separator + self.json_codec.dumpb(exchange.to_dict(), default=json_default))
+                        separator = b",\n"
+                    f.write(b"\n]" if separator != b"\n" else b"]")
             print(f"[+] Request history successfully saved to '{filepath}'")
         except Exception as e:
             print(f"[!] Error saving request history: {e}")
  
+    # Export the history as columns (timestamp, method, path, status, elapsed, request/response
+    # bytes, response_type, optionally body) to Parquet (.parquet), Arrow IPC (.arrow/.feather)
+    # or NumPy (.npz)
+    def export_history(self, filepath: str, include_bodies: bool = False):
+        try:
+            if not filepath.endswith((".parquet", ".arrow", ".feather", ".npz")):
+                raise ValueError("Use a .parquet, .arrow, .feather or .npz file")
+            from . import columnar
+            columns = columnar.history_columns(self.history, include_bodies=include_bodies)
+            if filepath.endswith(".npz"):
+                rows = columnar.export_npz(columns, filepath)
+            else:
+                rows = columnar.export_arrow(columns, filepath)
+            print(f"[+] {rows} exchanges exported to '{filepath}'")
+        except Exception as e:
+            print(f"[!] Error exporting request history: {e}")
+
+    # Export the history as a HAR 1.2 file, streamed one entry at a time; binary bodies are
+    # base64-encoded and HttpCraft-specific data is kept in "_httpcraft" entry fields
+    def save_history_to_har(self, filepath: str, include_bodies: bool = True):
+        try:
+            from . import har
+            count = har.write_har(self.history, filepath, include_bodies=include_bodies)
+            print(f"[+] {count} exchanges exported to HAR file '{filepath}'")
+        except Exception as e:
+            print(f"[!] Error exporting HAR file: {e}")
+
+    # Append the entries of a HAR file (e.g. exported from browser devtools) to the history,
+    # parsing the file incrementally; the history policy applies as for live exchanges
+    def load_history_from_har(self, filepath: str):
+        try:
+            from . import har
+            count = 0
+            for exchange in har.iter_har_exchanges(filepath):
+                with self._lock:
+                    self.history.append(exchange)
+                count += 1
+            print(f"[+] {count} exchanges imported from HAR file '{filepath}'")
+        except Exception as e:
+            print(f"[!] Error importing HAR file: {e}")
+
+    # Latency percentiles and throughput of the history, overall, per status code and per path
+    def history_stats(self):
+        from . import columnar
+        return columnar.history_stats(columnar.history_columns(self.history))
+
     # Guess the file extension based on the first few bytes of the response body
+    @staticmethod
     def guess_extension_from_bytes(body: bytes):
         signatures = [
             (b"\x89PNG\r\n\x1a\n", ".png"),
@@ -392,6 +840,7 @@ class HttpCraft:
         content_type = res.raw_headers.get("Content-Type", "").split(";")[0].strip().lower()
 
         # Estensione da MIME (mimetypes + mapping manuale)
+        import mimetypes
         extension = mimetypes.guess_extension(content_type)
 
         ext_map = {
@@ -457,7 +906,7 @@ class HttpCraft:
             body_preview = res.response_body
             if isinstance(body_preview, str):
                 body_preview = body_preview.encode("utf-8", errors="ignore")
-            extension = guess_extension_from_bytes(body_preview[:32])
+            extension = self.guess_extension_from_bytes(bytes(body_preview[:32]))
 
         # Filename automatico se non fornito
         if filepath is None:
@@ -467,15 +916,22 @@ class HttpCraft:
             os.makedirs(os.path.dirname(filepath), exist_ok=True)
 
         try:
+            # Body spooled on disk: move/hardlink the file instead of copying it
+            if isinstance(res.response_body, HttpCraftSpooledBody) and not is_gzip_path(filepath):
+                res.response_body.save_to(filepath)
+            # ... or compress it chunk by chunk
+            elif isinstance(res.response_body, HttpCraftSpooledBody):
+                with res.response_body.open() as source, open_file(filepath, "wb") as f:
+                    shutil.copyfileobj(source, f, self.STREAM_CHUNK_SIZE)
             # Testuale o JSON
-            if res.response_type in ["json", "html", "text"] or "text" in content_type or "json" in content_type:
-                with open(filepath, "w", encoding="utf-8") as f:
+            elif res.response_type in ["json", "html", "text"] or "text" in content_type or "json" in content_type:
+                with open_file(filepath, "w", encoding="utf-8") as f:
                     if isinstance(res.response_body, (dict, list)):
-                        json.dump(res.response_body, f, indent=2, ensure_ascii=False)
+                        self.json_codec.dump(res.response_body, f, pretty=True)
                     else:
                         f.write(str(res.response_body))
             else:
-                with open(filepath, "wb") as f:
+                with open_file(filepath, "wb") as f:
                     body = res.response_body
                     if isinstance(body, str):
                         body = body.encode("utf-8", errors="ignore")
@@ -509,127 +965,379 @@ class HttpCraft:
 
     ''' -------- REQUESTS -------- '''
     # Send a GET request to the specified path
-    def get(self, path="", params=None, port=None):
-        return self._send_request("GET", path, json=None, data=params, port=port)
+    def get(self, path="", params=None, port=None, stream=False):
+        return self._send_request("GET", path, json=None, data=params, port=port, stream=stream)
 
     # Send a POST request to the specified path
-    def post(self, path="", json=None, data=None, port=None):
-        return self._send_request("POST", path, json=json, data=data, port=port)
+    def post(self, path="", json=None, data=None, port=None, stream=False):
+        return self._send_request("POST", path, json=json, data=data, port=port, stream=stream)
 
     # Send a PUT request to the specified path
-    def put(self, path="", json=None, data=None, port=None):
-        return self._send_request("PUT", path, json=json, data=data, port=port)
+    def put(self, path="", json=None, data=None, port=None, stream=False):
+        return self._send_request("PUT", path, json=json, data=data, port=port, stream=stream)
 
     # Send a DELETE request to the specified path
-    def delete(self, path="", json=None, data=None, port=None):
-        return self._send_request("DELETE", path, json=json, data=data, port=port)
+    def delete(self, path="", json=None, data=None, port=None, stream=False):
+        return self._send_request("DELETE", path, json=json, data=data, port=port, stream=stream)
 
     # Send a PATCH request to the specified path
-    def patch(self, path="", json=None, data=None, port=None):
-        return self._send_request("PATCH", path, json=json, data=data, port=port)
+    def patch(self, path="", json=None, data=None, port=None, stream=False):
+        return self._send_request("PATCH", path, json=json, data=data, port=port, stream=stream)
 
     # Send a HEAD request to the specified path
     def head(self, path="", port=None):
         return self._send_request("HEAD", path, json=None, data=None, port=port)
 
-    # Core method used by all HTTP verb wrappers
-    def _send_request(self, method, path, json=None, data=None, port=None):
-        url = self._build_url(path, override_port=port)
-        start = time.time()
+    # Stream a GET response straight to `filepath` (or a temp spool file if None)
+    def download(self, path="", filepath: str = None, params=None, port=None):
+        return self._send_request("GET", path, json=None, data=params, port=port, stream=True, filepath=filepath)
 
-        request_func = getattr(self.session, method.lower())
-        kwargs = {
-            "headers": self.headers,
-            "cookies": self.cookies
-        }
+    # Prepare a reusable request template for parameter sweeps: URL, headers, cookies and the
+    # serialized payload are built once and prepared.send(field=value) only substitutes the
+    # varying fields ("{name}" placeholders in the path are filled from fields of the same name)
+    def prepare(self, method: str, path="", template_payload: dict = None, port=None):
+        from .prepared import HttpCraftPreparedRequest
+        return HttpCraftPreparedRequest(self, method, path, template_payload, port)
 
-        if method in ["GET", "HEAD"]:
-            kwargs["params"] = data or self.payload
-            payload_used = data or self.payload
-            payload_type = "form"
-        else:
-            if json is not None:
-                kwargs["json"] = json
-                payload_used = json
-                payload_type = "json"
-            elif data is not None:
-                kwargs["data"] = data
-                payload_used = data
-                payload_type = "form"
-            else:
-                if self.payload_mode == "json":
-                    kwargs["json"] = self.payload
-                    payload_used = self.payload
-                    payload_type = "json"
-                else:
-                    kwargs["data"] = self.payload
-                    payload_used = self.payload
-                    payload_type = "form"
+    # Set the directory used for temporary spool files
+    def set_spool_dir(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.spool_dir = directory
 
-        response = request_func(url, **kwargs)
-        elapsed = time.time() - start
-
-        # Detect response type and body format (updated to handle binary content)
-        content_type = response.headers.get("Content-Type", "").lower()
-        if "application/json" in content_type:
-            response_type = "json"
-            try:
-                response_body = response.json()
-            except Exception:
-                response_body = response.text
-        elif "text/html" in content_type:
-            response_type = "html"
-            response_body = response.text
-        elif "text" in content_type:
-            response_type = "text"
-            response_body = response.text
-        elif "image" in content_type or "application/octet-stream" in content_type:
-            response_type = "binary"
-            response_body = response.content
+    # Write a streamed response body to disk chunk by chunk
+    def _spool_response(self, chunks, filepath=None):
+        if filepath is None:
+            fd, filepath = tempfile.mkstemp(prefix="httpcraft-", suffix=".body", dir=self.spool_dir)
+            f = os.fdopen(fd, "wb")
+            temporary = True
         else:
-            response_type = "unknown"
-            response_body = response.content
+            directory = os.path.dirname(filepath)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            f = open(filepath, "wb")
+            temporary = False
+
+        size = 0
+        with f:
+            for chunk in chunks:
+                f.write(chunk)
+                size += len(chunk)
+        return HttpCraftSpooledBody(filepath, size, temporary=temporary)
+
+    # Approximate size on the wire of a prepared request (request line, headers and body)
+    @staticmethod
+    def _request_bytes(prepared):
+        host = urlparse(prepared.url).netloc
+        size = len(f"{prepared.method} {prepared.path_url} HTTP/1.1\r\n") + len(f"Host: {host}\r\n") + 2
+        size += sum(len(f"{key}: {value}\r\n") for key, value in prepared.headers.items())
+        body = prepared.body
+        if isinstance(body, str):
+            size += len(body.encode("utf-8"))
+        elif isinstance(body, (bytes, bytearray)):
+            size += len(body)
+        return size
+
+    # Size of the status line and headers of a received response
+    @staticmethod
+    def _response_head_bytes(response):
+        version = {10: "HTTP/1.0", 11: "HTTP/1.1"}.get(getattr(response.raw, "version", 11), "HTTP/1.1")
+        size = len(f"{version} {response.status_code} {response.reason or ''}\r\n") + 2
+        return size + sum(len(f"{key}: {value}\r\n") for key, value in response.headers.items())
+
+    # Decoded body chunks of a response, and a one-item list counting the body bytes read from
+    # the socket where urllib3 cannot (None otherwise, see _wire_body_bytes): urllib3 does not
+    # count chunked bodies, so gzip/deflate chunked bodies are read raw and decoded here
+    def _body_chunks(self, response):
+        encoding = response.headers.get("Content-Encoding", "").strip().lower()
+        if not getattr(response.raw, "chunked", False) or encoding not in REQUEST_ENCODINGS:
+            return response.iter_content(chunk_size=self.STREAM_CHUNK_SIZE), None
+        import requests
+        from urllib3.exceptions import ProtocolError
+        counter = [0]
+
+        def chunks():
+            decoder = BodyDecoder(encoding)
+            try:
+                for chunk in response.raw.stream(self.STREAM_CHUNK_SIZE, decode_content=False):
+                    counter[0] += len(chunk)
+                    yield decoder.decompress(chunk)
+                yield decoder.flush()
+            except ProtocolError as e:  # same exceptions as requests' own decoding
+                raise requests.exceptions.ChunkedEncodingError(e)
+            except zlib.error as e:
+                raise requests.exceptions.ContentDecodingError(e)
+        return chunks(), counter
+
+    # Body bytes read from the socket (before any content decoding): counted by _body_chunks,
+    # else by urllib3, else (chunked bodies in other codings) the decoded size
+    @staticmethod
+    def _wire_body_bytes(response, raw_body, counter=None):
+        if counter is not None:
+            return counter[0]
+        try:
+            read = int(response.raw.tell())
+        except Exception:
+            read = 0
+        return read or (len(raw_body) if raw_body is not None else 0)
 
-        # CSRF token update
-        csrf_token_updated = False
-        if self.csrf_mode != "none":
-            token = self.extract_csrf_token(response.text)
-            if token:
+    # Resolve the payload actually sent and its type ("json" or "form")
+    def _resolve_payload(self, method, json=None, data=None):
+        if method in ["GET", "HEAD"]:
+            return data or self.payload, "form"
+        if json is not None:
+            return json, "json"
+        if data is not None:
+            return data, "form"
+        if self.payload_mode == "json":
+            return self.payload, "json"
+        return self.payload, "form"
+
+    # Map a Content-Type header to one of "json", "html", "text", "binary", "unknown"
+    def _detect_response_type(self, content_type):
+        return detect_response_type(content_type)
+
+    # Extract the CSRF token from a response and store it as a cookie
+    def _update_csrf_token(self, html):
+        if self.csrf_mode == "none":
+            return False
+        token = self.extract_csrf_token(html)
+        if token:
+            with self._lock:
                 self.add_cookie(self.csrf_field, token)
-                csrf_token_updated = True
-
-        sent = response.request
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-
-        http_request = HttpCraftRequest(
-            url=self.base_url,
-            port=port or self.port,
-            path=path,
-            method=sent.method,
-            headers=dict(sent.headers),
-            cookies=self.cookies.copy(),
-            payload=payload_used,
-            payload_type=payload_type
-        )
+            return True
+        return False
+
+    # Store an exchange in the history. Compact histories first replace its cookies and headers
+    # with shared snapshots and intern its path and method. Call with self._lock held
+    def _store_exchange(self, exchange):
+        history = self.history
+        if history.compact:
+            request, response = exchange.request, exchange.response
+            request.cookies = history.share("cookies", request.cookies)
+            request.headers = history.share("request_headers", request.headers)
+            response.raw_headers = history.share("response_headers", response.raw_headers)
+            request.path, request.method = sys.intern(request.path), sys.intern(request.method)
+        history.append(exchange)
+
+    # Build a HttpCraftExchange from the sent request and the received response, then store it
+    # (record=False only builds it, for callers that stream results instead of keeping them)
+    def _record_exchange(self, path, port, method, sent_headers, payload_used, payload_type,
+                         http_response, csrf_token_updated, cache_status=None, attempts=None, record=True):
+        timestamp = time.time()
+
+        with self._lock:
+            # compact histories take shared snapshots instead of copies (see _store_exchange)
+            shared = record and self.history.compact
+            http_request = HttpCraftRequest(
+                url=self.base_url,
+                port=port or self.port,
+                path=path,
+                method=method,
+                headers=sent_headers if shared else dict(sent_headers),
+                cookies=self.cookies if shared else self.cookies.copy(),
+                payload=payload_used,
+                payload_type=payload_type
+            )
+            http_exchange = HttpCraftExchange(
+                timestamp=timestamp,
+                request=http_request,
+                response=http_response,
+                csrf_token_updated=csrf_token_updated,
+                cache_status=cache_status,
+                attempts=attempts
+            )
+            if record:
+                self._store_exchange(http_exchange)
+
+        return http_exchange
 
+    # Send a request over the network and wrap the reply; returns (response, prepared request).
+    # The body is always read separately from the headers so that the time to first
+    # byte and the body transfer can be told apart
+    def _fetch(self, request_func, url, kwargs, stream=False, filepath=None):
+        waited = None
+        if self.rate_limiter is not None:
+            waited = self.rate_limiter.acquire(self._rate_limit_target(url))
+        phase = begin_phase_timing()
+        start = time.perf_counter()
+        with request_func(url, stream=True, **kwargs) as response:
+            headers_received = time.perf_counter()
+            chunks, counter = self._body_chunks(response)
+            if stream:
+                raw_body = self._spool_response(chunks, filepath)
+            elif counter is None:
+                raw_body = response.content
+            else:
+                raw_body = b"".join(chunks)
+            end = time.perf_counter()
+            wire_body_bytes = self._wire_body_bytes(response, raw_body, counter)
+
+        # Keep the raw body: it is only decoded when text or response_body is read
         http_response = HttpCraftResponse(
             status_code=response.status_code,
-            elapsed_time=elapsed,
-            response_type=response_type,
-            response_body=response_body,
-            raw_headers=dict(response.headers)
+            elapsed_time=end - start,
+            response_type=self._detect_response_type(response.headers.get("Content-Type", "")),
+            raw_headers=dict(response.headers),
+            raw_body=raw_body,
+            encoding=response.encoding,
+            codec=self.json_codec,
+            timings={
+                "connect": phase["connect"],
+                "connection_reused": phase["connection_reused"],
+                "ttfb": max(0.0, headers_received - start - phase["connect"]),
+                "transfer": end - headers_received
+            },
+            request_bytes=self._request_bytes(response.request),
+            response_bytes=self._response_head_bytes(response) + wire_body_bytes,
+            body_bytes=len(raw_body) if raw_body is not None else 0,
+            wire_body_bytes=wire_body_bytes
         )
+        if waited is not None:
+            http_response.timings["rate_limit_wait"] = waited
+        return http_response, response.request
+
+    # Core method used by all HTTP verb wrappers (record=False returns the exchange without storing it)
+    def _send_request(self, method, path, json=None, data=None, port=None, stream=False, filepath=None,
+                      record=True):
+        url = self._build_url(path, override_port=port)
+
+        request_func = functools.partial(self.transport.request, method)
+        with self._lock:
+            kwargs = {
+                "headers": dict(self.headers),
+                "cookies": dict(self.cookies)
+            }
+
+        payload_used, payload_type = self._resolve_payload(method, json=json, data=data)
+        if method in ["GET", "HEAD"]:
+            kwargs["params"] = payload_used
+        elif payload_type == "json":
+            self._encode_json_body(kwargs, payload_used)
+        else:
+            kwargs["data"] = payload_used
+        self._compress_body(kwargs)
+
+        attempts = None
+        start = time.perf_counter()
+        cache_key, cache_entry, fresh = self._cache_lookup(method, url, payload_used, kwargs["headers"], stream)
+        if fresh:
+            http_response = self._cache_hit(cache_entry, start)
+            cache_status = "hit"
+            sent_method, sent_headers = method, kwargs["headers"]
+        else:
+            if cache_entry is not None:
+                kwargs["headers"].update(cache_entry.validators())
+            if self.retry_policy is not None:
+                http_response, sent, attempts = self._fetch_with_retry(method, request_func, url, kwargs,
+                                                                        stream, filepath)
+            else:
+                http_response, sent = self._fetch(request_func, url, kwargs, stream, filepath)
+            http_response, cache_status = self._cache_update(method, url, cache_key, cache_entry,
+                                                             kwargs["headers"], http_response)
+            sent_method, sent_headers = sent.method, sent.headers
+
+        # CSRF token update (only HTML documents can carry the token; streamed bodies are
+        # not loaded in memory, so they are not scanned)
+        csrf_token_updated = False
+        if self.csrf_mode != "none" and http_response.response_type == "html" and not stream:
+            csrf_token_updated = self._update_csrf_token(http_response.text)
 
-        http_exchange = HttpCraftExchange(
-            timestamp=timestamp,
-            request=http_request,
-            response=http_response,
-            csrf_token_updated=csrf_token_updated
+        return self._record_exchange(
+            path, port, sent_method, sent_headers, payload_used, payload_type,
+            http_response, csrf_token_updated, cache_status, attempts, record
         )
 
-        self.history.append(http_exchange)
+    ''' --------- BATCH ---------- '''
+    # Make sure the session can keep at least `size` connections per host open
+    def _ensure_pool_size(self, size):
+        if self.pool_maxsize < size:
+            self.set_pool_options(pool_maxsize=size)
+
+    # Send a single (method, path[, payload[, payload_type]]) spec, routing the payload like the
+    # verb methods; payload_type ("json" or "form") defaults to the client's payload mode
+    def _send_spec(self, spec, record=True):
+        method, path = spec[0].upper(), spec[1]
+        payload = spec[2] if len(spec) > 2 else None
+        payload_type = (spec[3] if len(spec) > 3 else None) or self.payload_mode
+        if payload is None or method in ["GET", "HEAD"]:
+            return self._send_request(method, path, json=None, data=payload, record=record)
+        if payload_type == "json":
+            return self._send_request(method, path, json=payload, record=record)
+        return self._send_request(method, path, data=payload, record=record)
+
+    # Send many (method, path[, payload[, payload_type]]) specs concurrently and yield their exchanges,
+    # in submission order (ordered=True) or as soon as each one completes
+    def send_many(self, requests, max_workers: int = 10, ordered: bool = True):
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+        assert max_workers > 0, "max_workers must be a positive integer"
+        self._ensure_pool_size(max_workers)
+        specs = iter(requests)
+        max_pending = max_workers * 2  # bound memory on very large iterables
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = deque() if ordered else set()
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < max_pending:
+                    try:
+                        spec = next(specs)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    future = executor.submit(self._send_spec, spec)
+                    if ordered:
+                        pending.append(future)
+                    else:
+                        pending.add(future)
 
-        return http_exchange
+                if not pending:
+                    return
+
+                if ordered:
+                    yield pending.popleft().result()
+                else:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+
+    # Send many (method, path[, payload[, payload_type]]) specs from `processes` worker processes (default: one per
+    # CPU), each running `max_workers` threads, for workloads where parsing and bookkeeping saturate
+    # one core before the network. Every worker clones this client's configuration (as saved by
+    # save_config_to_file); exchanges come back as compact records and are yielded, and stored in
+    # the history when `record` is set, in submission order. See HttpCraftShardRunner
+    def send_sharded(self, requests, processes: int = None, max_workers: int = 10, chunk_size: int = 64,
+                     record: bool = True, start_method: str = None):
+        from .shard import HttpCraftShardRunner
+        runner = HttpCraftShardRunner(self, processes=processes, max_workers=max_workers,
+                                      chunk_size=chunk_size, start_method=start_method)
+        return runner.run(requests, record=record)
+
+    # Sweep `values` (an iterable, or a wordlist file path read line by line) through
+    # `method path`, substituting each one into the payload, path or headers at `field`,
+    # with at most `max_workers` requests in flight. Only matching responses are kept
+    # (written as JSONL to `output` and/or passed to callback(value, exchange)); the
+    # history does not grow unless `record` is set. Returns the run summary.
+    def sweep(self, method: str, path: str, values, field: str = None, position: str = "payload",
+              template_payload: dict = None, port=None, max_workers: int = 10, match_status=None,
+              match_size=None, match_regex=None, callback=None, output: str = None, max_matches: int = None,
+              record: bool = False):
+        from .sweep import HttpCraftSweep
+        sweep = HttpCraftSweep(self, method, path, field, position, template_payload, port,
+                               match_status, match_size, match_regex)
+        return sweep.run(values, max_workers=max_workers, callback=callback, output=output,
+                         max_matches=max_matches, record=record)
+
+    # Replay a saved history (a file written by save_history_to_file, read lazily, or an
+    # iterable of exchanges) against this client's target, with the recorded timing
+    # ("original"), the recorded timing sped up by `speed` ("scaled") or as fast as
+    # `max_workers` allow ("max"). Returns a report of status, latency and body-hash
+    # changes; per-request diffs are written as JSONL to `output` and/or passed to callback
+    def replay_history(self, source, mode: str = "max", speed: float = 1.0, max_workers: int = 10,
+                       output: str = None, callback=None, record: bool = False):
+        from .replay import HttpCraftReplay
+        replay = HttpCraftReplay(self, source, mode=mode, speed=speed, max_workers=max_workers, record=record)
+        return replay.run(output=output, callback=callback)
+    ''' -------------------------- '''
 
     # Print detailed information about a single HttpCraftExchange
     def print_exchange(self, exchange, limit_body: bool = True):
@@ -646,18 +1354,40 @@ class HttpCraft:
         print(f"Response Type: {res.response_type}")
         print(f"Payload Mode:  {req.payload_type}")
         print(f"CSRF Updated:  {exchange.csrf_token_updated}")
+        if exchange.cache_status is not None:
+            print(f"Cache:         {exchange.cache_status}")
+        if exchange.attempts:
+            print("Attempts:")
+            for a in exchange.attempts:
+                outcome = a["status_code"] if a["error"] is None else a["error"]
+                hedge = f" (hedged, {a['winner']} won)" if a["hedged"] else ""
+                print(f"  #{a['attempt']}: {outcome} in {round(a['elapsed'] * 1000, 2)} ms "
+                      f"after {round(a['delay'] * 1000, 2)} ms backoff{hedge}")
         print("Headers:")
-        print(json.dumps(req.headers, indent=2))
+        print(self.json_codec.dumps(req.headers, pretty=True))
         print("Cookies:")
-        print(json.dumps(req.cookies, indent=2))
+        print(self.json_codec.dumps(req.cookies, pretty=True))
         print("Payload:")
-        print(json.dumps(req.payload, indent=2))
+        print(self.json_codec.dumps(req.payload, pretty=True, default=json_default))
         print(f"Elapsed Time:  {round(res.elapsed_time * 1000, 2)} ms")
+        if res.timings:
+            reused = res.timings.get("connection_reused")
+            state = "reused" if reused else "new" if reused is not None else "unknown"
+            print(f"  Connect:     {round(res.timings.get('connect', 0.0) * 1000, 2)} ms ({state} connection)")
+            print(f"  TTFB:        {round(res.timings.get('ttfb', 0.0) * 1000, 2)} ms")
+            print(f"  Transfer:    {round(res.timings.get('transfer', 0.0) * 1000, 2)} ms")
+            if "rate_limit_wait" in res.timings:
+                print(f"  Rate limit:  {round(res.timings['rate_limit_wait'] * 1000, 2)} ms waited before sending")
+        if res.request_bytes is not None or res.response_bytes is not None:
+            print(f"Bytes:         {res.request_bytes} sent, {res.response_bytes} received")
+        if res.body_bytes is not None and res.wire_body_bytes is not None:
+            print(f"Body:          {res.wire_body_bytes} bytes on the wire ({res.content_encoding or 'identity'}), "
+                  f"{res.body_bytes} decoded")
 
         print("Response Body:")
         body = res.response_body
         if isinstance(body, dict):
-            print(json.dumps(body, indent=2))
+            print(self.json_codec.dumps(body, pretty=True))
         else:
             body_str = str(body)
             print(body_str[:500] + ("..." if limit_body and len(body_str) > 500 else ""))
@@ -695,7 +1425,7 @@ class HttpCraft:
         if not exchange:
             print("[!] No exchange found at this index.")
             return
-        print_exchange(exchange, True)
+        self.print_exchange(exchange, True)
 
     # Return a specific request from the history
     def get_exchange(self, index):
@@ -705,10 +1435,40 @@ class HttpCraft:
 
         return self.history[index]
 
-    # Clear the request history
+    # Find exchanges in the history by status, method, path, path prefix and time range
+    def find_exchanges(self, status=None, method=None, path: str = None, path_prefix: str = None,
+                       since=None, until=None, limit: int = None):
+        return self.history.find(status=status, method=method, path=path, path_prefix=path_prefix,
+                                 since=since, until=until, limit=limit)
+
+    # Clear the request history (the history policy is kept)
     def reset_history(self):
-        self.history = []
+        self.history.clear()
         print("[+] Request history cleared.")
 
+    # Bound the history by entry count and/or total body bytes; evicted exchanges
+    # are spilled to `spill_dir` when given, dropped otherwise. With `log_path`,
+    # every exchange is appended to that JSONL log (plus offset index) when created.
+    # `compact` interns headers and shares unchanged header/cookie snapshots between exchanges
+    def set_history_policy(self, max_entries: int = None, max_body_bytes: int = None, spill_dir: str = None,
+                           log_path: str = None, compact: bool = False):
+        history = HttpCraftHistory(max_entries=max_entries, max_body_bytes=max_body_bytes,
+                                   spill_dir=spill_dir, log_path=log_path, compact=compact)
+        with self._lock:
+            for exchange in self.history:
+                history.append(exchange)
+            self.history.close()
+            self.history = history
+
+    # Get the current history policy
+    def get_history_policy(self):
+        return {
+            "max_entries": self.history.max_entries,
+            "max_body_bytes": self.history.max_body_bytes,
+            "spill_dir": self.history.spill_dir,
+            "log_path": self.history.log_path,
+            "compact": self.history.compact
+        }
+
     ''' -------------------------- '''
 
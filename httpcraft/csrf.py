@@ -0,0 +1,47 @@
+# subnet_musk
+
+import re
+from html import unescape
+
+# <input ...> / <meta ...> start tags; quoted attribute values may contain '>'
+_TAG_RE = re.compile(r"""<(input|meta)\b((?:[^>"']|"[^"]*"|'[^']*')*)>""", re.IGNORECASE)
+_ATTR_RE = re.compile(r"""([^\s"'>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+)))?""")
+
+
+# Parse the attributes of a start tag into a dict (names lowercased, values unescaped)
+def _parse_attrs(raw):
+    attrs = {}
+    for match in _ATTR_RE.finditer(raw):
+        name = match.group(1).lower()
+        if name in attrs:
+            continue  # first occurrence wins, like html.parser
+        value = match.group(2)
+        if value is None:
+            value = match.group(3)
+        if value is None:
+            value = match.group(4)
+        attrs[name] = unescape(value) if value is not None else ""
+    return attrs
+
+
+# Scan `html` for the CSRF token without building a DOM and stop at the first match.
+# Only the tags around occurrences of the field name are parsed.
+# mode "input": <input type="hidden" name=field value=...>
+# mode "meta":  <meta name=field content=...>
+# Returns the token, or None when no matching tag (or no value) was found.
+def find_csrf_token(html: str, mode: str, field: str):
+    if mode not in ["input", "meta"]:
+        return None
+    position = html.find(field)
+    while position != -1:
+        start = html.rfind("<", 0, position)
+        match = _TAG_RE.match(html, start) if start != -1 else None
+        if match is not None and match.end() > position:
+            if match.group(1).lower() == mode:
+                attrs = _parse_attrs(match.group(2))
+                if attrs.get("name") == field and (mode == "meta" or attrs.get("type") == "hidden"):
+                    return attrs.get("value" if mode == "input" else "content")
+            position = html.find(field, match.end())
+        else:
+            position = html.find(field, position + len(field))
+    return None
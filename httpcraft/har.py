@@ -0,0 +1,288 @@
+# subnet_musk
+
+import base64
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from .cache import get_header
+from .codec import get_codec
+from .columnar import response_body_bytes
+from .compression import open_file
+from .history import body_size, iter_json_array
+from .models import HttpCraftRequest, HttpCraftResponse, HttpCraftExchange, detect_response_type
+
+HAR_VERSION = "1.2"
+CREATOR = {"name": "httpcraft", "version": "0.1.0"}
+TEXT_TYPES = ("json", "html", "text")
+
+
+# (name, value) pairs of a payload dict, repeating list values like requests does
+def _pairs(payload):
+    if not isinstance(payload, dict):
+        return []
+    pairs = []
+    for key, value in payload.items():
+        values = value if isinstance(value, (list, tuple)) else [value]
+        pairs.extend((str(key), str(v)) for v in values if v is not None)
+    return pairs
+
+
+# Payload dict from (name, value) pairs; repeated names become lists
+def _from_pairs(pairs):
+    payload = {}
+    for name, value in pairs:
+        if name in payload:
+            if not isinstance(payload[name], list):
+                payload[name] = [payload[name]]
+            payload[name].append(value)
+        else:
+            payload[name] = value
+    return payload
+
+
+def _name_values(items):
+    return [{"name": str(name), "value": str(value)} for name, value in items]
+
+
+# ISO 8601 UTC timestamp with milliseconds
+def _iso(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+# Epoch seconds of an ISO 8601 timestamp (None if it cannot be parsed)
+def _epoch(value):
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3) if seconds is not None else -1
+
+
+# Full URL of a recorded request (GET/HEAD payloads become the query string)
+def _request_url(request):
+    base = request.url or ""
+    if request.port:
+        base += f":{request.port}"
+    url = f"{base}/{(request.path or '').lstrip('/')}"
+    if request.method in ["GET", "HEAD"] and request.payload:
+        url += ("&" if "?" in url else "?") + urlencode(_pairs(request.payload))
+    return url
+
+
+# HAR postData of a recorded request (None when there is no body)
+def _post_data(request):
+    if request.method in ["GET", "HEAD"] or request.payload in (None, {}, ""):
+        return None
+    mime_type = get_header(request.headers or {}, "Content-Type")
+    if request.payload_type == "json":
+        return {"mimeType": mime_type or "application/json", "text": get_codec().dumps(request.payload)}
+    if isinstance(request.payload, dict):
+        pairs = _pairs(request.payload)
+        return {"mimeType": mime_type or "application/x-www-form-urlencoded",
+                "params": _name_values(pairs), "text": urlencode(pairs)}
+    text = request.payload.decode("utf-8", errors="replace") if isinstance(request.payload, bytes) else str(request.payload)
+    return {"mimeType": mime_type or "text/plain", "text": text}
+
+
+# HAR entry of one exchange
+def exchange_to_entry(exchange, include_bodies: bool = True):
+    request, response = exchange.request, exchange.response
+    timings = response.timings or {}
+    reused = timings.get("connection_reused")
+    har_timings = {
+        "blocked": _ms(timings.get("rate_limit_wait")),
+        "dns": -1,
+        "connect": _ms(timings.get("connect")) if reused is False else -1,
+        "send": 0,
+        "wait": _ms(timings.get("ttfb", response.elapsed_time or 0.0)),
+        "receive": _ms(timings.get("transfer", 0.0)),
+        "ssl": -1
+    }
+    total = sum(value for value in har_timings.values() if value > 0)
+
+    post_data = _post_data(request)
+    har_request = {
+        "method": request.method,
+        "url": _request_url(request),
+        "httpVersion": "HTTP/1.1",
+        "cookies": _name_values((request.cookies or {}).items()),
+        "headers": _name_values((request.headers or {}).items()),
+        "queryString": _name_values(_pairs(request.payload)) if request.method in ["GET", "HEAD"] else [],
+        "headersSize": -1,
+        "bodySize": len(post_data["text"].encode("utf-8")) if post_data else 0
+    }
+    if post_data is not None:
+        har_request["postData"] = post_data
+
+    headers = response.raw_headers or {}
+    content = {"size": body_size(response), "mimeType": get_header(headers, "Content-Type") or ""}
+    if response.wire_body_bytes is not None and response.body_bytes is not None:
+        content["compression"] = response.body_bytes - response.wire_body_bytes  # bytes saved by content coding
+    if include_bodies and (response.raw_body is not None or response.response_body is not None):
+        if response.response_type in TEXT_TYPES:
+            content["text"] = response.text
+        else:
+            content["text"] = base64.b64encode(response_body_bytes(response)).decode("ascii")
+            content["encoding"] = "base64"
+
+    epoch = exchange.epoch
+    return {
+        "startedDateTime": _iso((epoch or 0.0) - (response.elapsed_time or 0.0)),
+        "time": total,
+        "request": har_request,
+        "response": {
+            "status": response.status_code,
+            "statusText": "",
+            "httpVersion": "HTTP/1.1",
+            "cookies": [],
+            "headers": _name_values(headers.items()),
+            "content": content,
+            "redirectURL": get_header(headers, "Location") or "",
+            "headersSize": -1,
+            "bodySize": response.wire_body_bytes if response.wire_body_bytes is not None else -1
+        },
+        "cache": {},
+        "timings": har_timings,
+        # custom fields (HAR reserves the "_" prefix for them)
+        "_httpcraft": {
+            "payload_type": request.payload_type,
+            "csrf_token_updated": exchange.csrf_token_updated,
+            "cache_status": exchange.cache_status,
+            "attempts": exchange.attempts,
+            "timings": timings,
+            "request_bytes": response.request_bytes,
+            "response_bytes": response.response_bytes
+        }
+    }
+
+
+# Write exchanges to a HAR 1.2 file one entry at a time (the document is never built in memory)
+def write_har(exchanges, filepath: str, include_bodies: bool = True):
+    count = 0
+    codec = get_codec()
+    with open_file(filepath, "w", encoding="utf-8") as f:
+        f.write('{"log": {"version": "%s", "creator": %s, "pages": [], "entries": [' % (HAR_VERSION, codec.dumps(CREATOR)))
+        for exchange in exchanges:
+            f.write(",\n" if count else "\n")
+            f.write(codec.dumps(exchange_to_entry(exchange, include_bodies)))
+            count += 1
+        f.write("\n]}}\n")
+    return count
+
+
+# HttpCraftRequest of a HAR request: GET/HEAD query strings become the payload,
+# other requests keep their query in the path and their body as payload
+def _request_from_entry(entry):
+    har_request = entry["request"]
+    method = har_request["method"].upper()
+    url = urlsplit(har_request["url"])
+    path = url.path or "/"
+    extra = entry.get("_httpcraft") or {}
+
+    post_data = har_request.get("postData")
+    if method in ["GET", "HEAD"]:
+        payload, payload_type = _from_pairs(parse_qsl(url.query, keep_blank_values=True)), "form"
+    else:
+        if url.query:
+            path += "?" + url.query
+        payload, payload_type = {}, extra.get("payload_type") or "form"
+        if post_data:
+            mime_type = (post_data.get("mimeType") or "").lower()
+            text = post_data.get("text")
+            if "json" in mime_type and text is not None:
+                try:
+                    payload, payload_type = get_codec().loads(text), "json"
+                except ValueError:
+                    payload = text
+            elif post_data.get("params"):
+                payload = _from_pairs((p["name"], p.get("value", "")) for p in post_data["params"])
+            elif "x-www-form-urlencoded" in mime_type and text is not None:
+                payload = _from_pairs(parse_qsl(text, keep_blank_values=True))
+            elif text is not None:
+                payload = text
+
+    return HttpCraftRequest(
+        url=f"{url.scheme}://{url.hostname}",
+        port=url.port,
+        path=path,
+        method=method,
+        headers={h["name"]: h["value"] for h in har_request.get("headers", []) if not h["name"].startswith(":")},
+        cookies={c["name"]: c["value"] for c in har_request.get("cookies", [])},
+        payload=payload,
+        payload_type=payload_type
+    )
+
+
+# HttpCraftExchange of a HAR entry
+def entry_to_exchange(entry):
+    request = _request_from_entry(entry)
+    har_response = entry["response"]
+    extra = entry.get("_httpcraft") or {}
+    headers = {h["name"]: h["value"] for h in har_response.get("headers", [])}
+    content = har_response.get("content") or {}
+    mime_type = content.get("mimeType") or get_header(headers, "Content-Type") or ""
+
+    raw_body, encoding = None, None
+    if "charset=" in mime_type.lower():
+        encoding = mime_type.lower().split("charset=", 1)[1].split(";")[0].strip() or None
+    if content.get("text") is not None:
+        if content.get("encoding") == "base64":
+            raw_body = base64.b64decode(content["text"])
+        else:
+            raw_body = content["text"].encode(encoding or "utf-8", errors="replace")
+
+    timings = extra.get("timings")
+    if timings is None:
+        har_timings = entry.get("timings") or {}
+        timings = {name: har_timings[key] / 1000 for name, key in
+                   [("connect", "connect"), ("ttfb", "wait"), ("transfer", "receive")]
+                   if har_timings.get(key, -1) >= 0}
+    elapsed = (entry.get("time") or 0) / 1000
+    started = _epoch(entry.get("startedDateTime"))
+
+    response = HttpCraftResponse(
+        status_code=har_response.get("status"),
+        elapsed_time=elapsed,
+        response_type=detect_response_type(mime_type),
+        raw_headers=headers,
+        raw_body=raw_body,
+        encoding=encoding,
+        timings=timings,
+        request_bytes=extra.get("request_bytes"),
+        response_bytes=extra.get("response_bytes"),
+        body_bytes=content.get("size") if content.get("size", -1) >= 0 else None,
+        wire_body_bytes=har_response.get("bodySize") if har_response.get("bodySize", -1) >= 0 else None
+    )
+    return HttpCraftExchange(
+        timestamp=started + elapsed if started is not None else None,
+        request=request,
+        response=response,
+        csrf_token_updated=extra.get("csrf_token_updated", False),
+        cache_status=extra.get("cache_status"),
+        attempts=extra.get("attempts")
+    )
+
+
+# Stream the raw entries of a HAR file without loading it whole
+def iter_har_entries(filepath: str):
+    return iter_json_array(filepath, ("log", "entries"))
+
+
+# Stream the entries of a HAR file as HttpCraftExchange objects
+def iter_har_exchanges(filepath: str):
+    for entry in iter_har_entries(filepath):
+        yield entry_to_exchange(entry)
+
+
+# Stream the requests of a HAR file as (method, path, payload, payload_type) specs for
+# send_many(); query strings of GET/HEAD requests become the payload, JSON bodies stay JSON
+def iter_har_requests(filepath: str):
+    for entry in iter_har_entries(filepath):
+        request = _request_from_entry(entry)
+        yield request.method, request.path, request.payload, request.payload_type
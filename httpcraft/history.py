@@ -0,0 +1,690 @@
+# subnet_musk
+
+import base64
+import bisect
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+from collections import deque
+from datetime import datetime
+
+from .models import HttpCraftExchange, TIMESTAMP_FORMAT
+from .spool import HttpCraftSpooledBody
+from .codec import get_codec
+from .compression import open_file
+
+
+BYTES_KEY = "__bytes__"  # marks a base64-encoded binary value in JSON files
+
+
+# JSON encoder fallback: keeps binary bodies and spooled bodies serializable
+def json_default(obj):
+    if isinstance(obj, (bytes, bytearray)):
+        return {BYTES_KEY: base64.b64encode(bytes(obj)).decode("ascii")}
+    if isinstance(obj, HttpCraftSpooledBody):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# JSON decoder hook: inverse of json_default for binary bodies
+def json_object_hook(obj):
+    if len(obj) == 1 and BYTES_KEY in obj:
+        return base64.b64decode(obj[BYTES_KEY])
+    return obj
+
+
+# Approximate in-memory size of a response body (spooled bodies live on disk)
+def body_size(response):
+    if isinstance(response.raw_body, (bytes, bytearray)):
+        return len(response.raw_body)  # no need to decode the body to size it
+    body = response.response_body
+    if body is None or isinstance(body, HttpCraftSpooledBody):
+        return 0
+    if isinstance(body, (bytes, bytearray, str)):
+        return len(body)
+    return len(get_codec().dumpb(body, default=json_default))
+
+
+# Decode one JSONL line into a HttpCraftExchange
+def _decode_line(line, codec=None):
+    return HttpCraftExchange.from_dict((codec or get_codec()).loads(line, object_hook=json_object_hook,
+                                                                    hook_key=BYTES_KEY))
+
+
+# Stream the exchanges of a JSONL history log (plain or gzip-compressed) one line at a time
+def iter_history_log(path: str, codec=None):
+    with open_file(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                return  # torn last line of an interrupted write
+            yield _decode_line(line, codec)
+
+
+# Pull-style reader of a JSON document in a text file: values are decoded one at a time
+# from a sliding buffer, so arbitrarily large documents never have to fit in memory
+class _JsonReader:
+    CHUNK_SIZE = 1 << 16
+    WHITESPACE = " \t\r\n"
+
+    def __init__(self, f, object_hook=None):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder(object_hook=object_hook)
+
+    # Read more text; at least as much as is already pending, so that re-decoding
+    # a value that spans many chunks stays linear overall
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = self.f.read(max(self.CHUNK_SIZE, len(self.buf) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    # Next non-whitespace character, not consumed ("" at the end of the file)
+    def peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in self.WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    # Consume one structural character
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' but found '{found}'")
+        self.pos += 1
+
+    # Decode the next complete value
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            if end == len(self.buf) and self._fill():
+                continue  # a number may go on in the next chunk
+            self.pos = end
+            return value
+
+
+# Stream the elements of a JSON array stored in a file (plain or gzip-compressed) without
+# loading the file whole; `keys` leads to the array through nested objects (e.g. ("log",
+# "entries") in a HAR file), other members on the way are decoded and skipped
+def iter_json_array(path: str, keys=(), object_hook=None):
+    with open_file(path, "r", encoding="utf-8-sig") as f:
+        reader = _JsonReader(f, object_hook)
+        for key in keys:
+            reader.expect("{")
+            while True:
+                if reader.peek() != '"':
+                    raise ValueError(f"'{path}' has no '{key}' member")
+                name = reader.value()
+                reader.expect(":")
+                if name == key:
+                    break
+                reader.value()
+                if reader.peek() == ",":
+                    reader.pos += 1
+        reader.expect("[")
+        if reader.peek() == "]":
+            return
+        while True:
+            yield reader.value()
+            if reader.peek() != ",":
+                reader.expect("]")
+                return
+            reader.pos += 1
+
+
+# Stream the exchanges of a file written by save_history_to_file (JSON array or JSONL log,
+# either one optionally gzip-compressed)
+def iter_history_file(path: str):
+    if path.endswith((".jsonl", ".jsonl.gz")):
+        yield from iter_history_log(path)
+        return
+    for data in iter_json_array(path, object_hook=json_object_hook):
+        yield HttpCraftExchange.from_dict(data)
+
+
+# Append-only JSONL log of exchanges, one exchange per line.
+# A sidecar "<path>.idx" file stores the byte offset of every line as a
+# little-endian uint64, so any entry can be located in O(1) and decoded alone
+# through a memory map of the log, without reading the rest of the file.
+class HttpCraftHistoryLog:
+    INDEX_SUFFIX = ".idx"
+    OFFSET = struct.Struct("<Q")
+
+    def __init__(self, path: str, codec=None):
+        assert not path.endswith(".gz"), "History logs are read at random offsets and cannot be gzip-compressed"
+        self.path = path
+        self.index_path = path + self.INDEX_SUFFIX
+        self.codec = codec or get_codec()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._file = open(path, "a+b")
+        if not self._index_is_valid():
+            self._rebuild_index()
+        self._index_file = open(self.index_path, "a+b")
+        self._count = os.path.getsize(self.index_path) // self.OFFSET.size
+        self._size = os.path.getsize(path)
+
+        self._data_map = None
+        self._index_map = None
+        self._index_mapped = 0
+
+    ''' ---------- INDEX ---------- '''
+    # Check the sidecar index against the log (missing, torn or stale indexes are rebuilt)
+    def _index_is_valid(self):
+        data_size = os.path.getsize(self.path)
+        if not os.path.isfile(self.index_path):
+            return data_size == 0
+        index_size = os.path.getsize(self.index_path)
+        if index_size % self.OFFSET.size:
+            return False
+        if index_size == 0:
+            return data_size == 0
+        with open(self.index_path, "rb") as f:
+            f.seek(-self.OFFSET.size, os.SEEK_END)
+            last = self.OFFSET.unpack(f.read(self.OFFSET.size))[0]
+        if last >= data_size:
+            return False
+        self._file.seek(last)
+        self._file.readline()
+        return self._file.tell() == data_size
+
+    # Scan the log once and write a fresh sidecar index, dropping a torn last line
+    def _rebuild_index(self):
+        offset = 0
+        with open(self.index_path, "wb") as index:
+            self._file.seek(0)
+            for line in self._file:
+                if not line.endswith(b"\n"):
+                    break
+                index.write(self.OFFSET.pack(offset))
+                offset += len(line)
+        self._file.truncate(offset)
+
+    # Byte offset of line `index`, read from the memory-mapped sidecar
+    def _offset(self, index):
+        if index >= self._index_mapped:
+            if self._index_map is not None:
+                self._index_map.close()
+            self._index_map = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._index_mapped = len(self._index_map) // self.OFFSET.size
+        return self.OFFSET.unpack_from(self._index_map, index * self.OFFSET.size)[0]
+
+    # Memory map of the log covering at least `end` bytes
+    def _data(self, end):
+        if self._data_map is None or len(self._data_map) < end:
+            if self._data_map is not None:
+                self._data_map.close()
+            self._data_map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._data_map
+    ''' -------------------------- '''
+
+    ''' ----------- LOG ----------- '''
+    # Append one exchange to the log and its offset to the index
+    def append(self, exchange):
+        line = self.codec.dumpb(exchange.to_dict(), default=json_default) + b"\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._index_file.write(self.OFFSET.pack(self._size))
+            self._index_file.flush()
+            self._size += len(line)
+            self._count += 1
+
+    # Decode only the line stored at `index`
+    def get_dict(self, index):
+        with self._lock:
+            if index < 0:
+                index += self._count
+            if index < 0 or index >= self._count:
+                raise IndexError("history log index out of range")
+            start = self._offset(index)
+            end = self._offset(index + 1) if index + 1 < self._count else self._size
+            line = self._data(end)[start:end]
+        return self.codec.loads(line, object_hook=json_object_hook, hook_key=BYTES_KEY)
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        return HttpCraftExchange.from_dict(self.get_dict(index))
+
+    def __iter__(self):
+        return self.iter_range(0, None)
+
+    # Lazily yield the exchanges in [start, stop), seeking straight to `start`
+    def iter_range(self, start: int = 0, stop: int = None):
+        with self._lock:
+            stop = self._count if stop is None else min(stop, self._count)
+            if start >= stop:
+                return
+            offset = self._offset(start)
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for _ in range(stop - start):
+                yield _decode_line(f.readline(), self.codec)
+
+    # Close the log and index files
+    def close(self):
+        with self._lock:
+            for handle in (self._data_map, self._index_map, self._file, self._index_file):
+                if handle is not None and not handle.closed:
+                    handle.close()
+            self._data_map = None
+            self._index_map = None
+            self._index_mapped = 0
+
+    # Close and delete the log and its index
+    def remove(self):
+        self.close()
+        for path in (self.path, self.index_path):
+            if os.path.exists(path):
+                os.remove(path)
+    ''' -------------------------- '''
+
+
+# Convert a since/until bound (epoch seconds, datetime or "YYYY-MM-DD HH:MM:SS[.mmm]") to epoch seconds
+def _epoch_bound(value):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return datetime.strptime(value, TIMESTAMP_FORMAT).timestamp()
+    except ValueError:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S").timestamp()
+
+
+# Secondary indexes over the exchanges of a history, maintained on append.
+# Every exchange gets a sequence number; compact per-sequence columns hold its
+# status, method, path and epoch, posting lists map each status, method and
+# path to the sequence numbers carrying it, and a sorted time index answers
+# since/until ranges by bisection. A query walks only the shortest candidate
+# list and checks the other criteria against the columns.
+class HttpCraftHistoryIndex:
+    def __init__(self, base: int = 0):
+        self.reset(base)
+
+    # Drop every entry; the next exchange added gets sequence number `base`
+    def reset(self, base: int = 0):
+        self.base = base          # sequence number of the first column entry
+        self.next_seq = base
+        self._status = array("i")
+        self._method = array("H")
+        self._path = array("I")
+        self._time = array("d")
+        self._by_status = {}
+        self._by_method = {}
+        self._by_path = {}
+        self._methods = {}        # method -> id
+        self._paths = {}          # path -> id
+        self._path_names = []     # id -> path
+        self._sorted_paths = []   # distinct paths, for prefix lookups
+        self._time_keys = array("d")  # epochs in ascending order ...
+        self._time_seqs = array("q")  # ... and the matching sequence numbers
+
+    # Id of a method/path in its symbol table, registering it on first sight
+    def _method_id(self, method):
+        if method not in self._methods:
+            self._methods[method] = len(self._methods)
+        return self._methods[method]
+
+    def _path_id(self, path):
+        if path not in self._paths:
+            self._paths[path] = len(self._path_names)
+            self._path_names.append(path)
+            bisect.insort(self._sorted_paths, path)
+        return self._paths[path]
+
+    # Index one exchange and return its sequence number
+    def add(self, exchange):
+        seq = self.next_seq
+        self.next_seq += 1
+        status = exchange.response.status_code or 0
+        method = self._method_id((exchange.request.method or "").upper())
+        path = self._path_id(exchange.request.path or "")
+        epoch = exchange.epoch
+        epoch = float("nan") if epoch is None else epoch
+
+        self._status.append(status)
+        self._method.append(method)
+        self._path.append(path)
+        self._time.append(epoch)
+        self._by_status.setdefault(status, array("q")).append(seq)
+        self._by_method.setdefault(method, array("q")).append(seq)
+        self._by_path.setdefault(path, array("q")).append(seq)
+        if epoch == epoch:  # exchanges without a parsable timestamp never match a time range
+            position = bisect.bisect_right(self._time_keys, epoch)  # almost always the end
+            self._time_keys.insert(position, epoch)
+            self._time_seqs.insert(position, seq)
+        return seq
+
+    # Candidate lists for one criterion: (estimated size, function building the sorted sequence numbers)
+    @staticmethod
+    def _union(lists):
+        lists = [seqs for seqs in lists if seqs]
+        size = sum(len(seqs) for seqs in lists)
+        if len(lists) == 1:
+            return size, lambda: lists[0]
+        return size, lambda: list(heapq.merge(*lists))
+
+    def _statuses(self, statuses):
+        return self._union([self._by_status.get(code) for code in statuses])
+
+    def _path_prefix(self, prefix):
+        start = bisect.bisect_left(self._sorted_paths, prefix)
+        lists = []
+        for path in self._sorted_paths[start:]:
+            if not path.startswith(prefix):
+                break
+            lists.append(self._by_path[self._paths[path]])
+        return self._union(lists)
+
+    def _time_range(self, since, until):
+        start = 0 if since is None else bisect.bisect_left(self._time_keys, since)
+        stop = len(self._time_keys) if until is None else bisect.bisect_left(self._time_keys, until)
+        return max(0, stop - start), lambda: sorted(self._time_seqs[start:stop])
+
+    # Sequence numbers (ascending) of the exchanges matching every given criterion:
+    # status (code or iterable of codes), method, exact path, path_prefix, since <= t < until
+    def query(self, status=None, method=None, path=None, path_prefix=None, since=None, until=None):
+        since, until = _epoch_bound(since), _epoch_bound(until)
+        statuses = None if status is None else ({status} if isinstance(status, int) else set(status))
+        method_id = None if method is None else self._methods.get(method.upper(), -1)
+        path_id = None if path is None else self._paths.get(path, -1)
+
+        candidates = []
+        if statuses is not None:
+            candidates.append(self._statuses(statuses))
+        if method_id is not None:
+            candidates.append(self._union([self._by_method.get(method_id)]))
+        if path_id is not None:
+            candidates.append(self._union([self._by_path.get(path_id)]))
+        if path_prefix is not None:
+            candidates.append(self._path_prefix(path_prefix))
+        if since is not None or until is not None:
+            candidates.append(self._time_range(since, until))
+        if not candidates:
+            return list(range(self.base, self.next_seq))
+        _, build = min(candidates, key=lambda candidate: candidate[0])
+
+        prefix_ok = {}  # path id -> startswith(path_prefix), computed once per distinct path
+        matches = []
+        for seq in build():
+            i = seq - self.base
+            if statuses is not None and self._status[i] not in statuses:
+                continue
+            if method_id is not None and self._method[i] != method_id:
+                continue
+            if path_id is not None and self._path[i] != path_id:
+                continue
+            if path_prefix is not None:
+                pid = self._path[i]
+                if pid not in prefix_ok:
+                    prefix_ok[pid] = self._path_names[pid].startswith(path_prefix)
+                if not prefix_ok[pid]:
+                    continue
+            if since is not None and not self._time[i] >= since:
+                continue
+            if until is not None and not self._time[i] < until:
+                continue
+            matches.append(seq)
+        return matches
+
+    def __len__(self):
+        return self.next_seq - self.base
+
+
+# Request/response history with an optional bound on memory use.
+# The newest exchanges live in an in-memory ring buffer; once it holds more
+# than `max_entries` exchanges or `max_body_bytes` of bodies, the oldest ones
+# are evicted. With a `spill_dir` they are moved to a temporary on-disk log
+# and stay reachable by index, otherwise they are dropped. With a `log_path`
+# every exchange is appended to that JSONL log as soon as it is recorded, and
+# evicted exchanges are read back from it. In `compact` mode header names and
+# values are interned and consecutive exchanges share unchanged header and
+# cookie snapshots (shared snapshots must not be modified in place).
+class HttpCraftHistory:
+    SNAPSHOT_KINDS = ("request_headers", "cookies", "response_headers")
+
+    def __init__(self, max_entries: int = None, max_body_bytes: int = None, spill_dir: str = None,
+                 log_path: str = None, compact: bool = False):
+        assert max_entries is None or max_entries > 0, "max_entries must be a positive integer"
+        assert max_body_bytes is None or max_body_bytes > 0, "max_body_bytes must be a positive integer"
+        assert spill_dir is None or log_path is None, "Use either spill_dir or log_path, not both"
+        self.max_entries = max_entries
+        self.max_body_bytes = max_body_bytes
+        self.spill_dir = spill_dir
+        self.log_path = log_path
+        self.compact = compact
+
+        self._entries = deque()
+        self._sizes = deque()
+        self._body_bytes = 0
+        self._dropped = 0
+        self._lock = threading.RLock()
+        self._snapshots = {}  # last snapshot of each kind, reused while unchanged (compact mode)
+        self._index = HttpCraftHistoryIndex()  # sequence number - _dropped = history index
+
+        # On-disk part: exchanges [_base, len(_store)) of the log belong to this history
+        self._store = HttpCraftHistoryLog(log_path) if log_path is not None else None
+        self._base = len(self._store) if self._store is not None else 0
+
+    ''' --------- POLICY --------- '''
+    # Whether any bound is configured
+    def is_bounded(self):
+        return self.max_entries is not None or self.max_body_bytes is not None
+
+    # Number of exchanges currently held in memory
+    def in_memory_count(self):
+        return len(self._entries)
+
+    # Number of exchanges only available on disk
+    def spilled_count(self):
+        return len(self) - len(self._entries)
+
+    # Number of exchanges evicted without any on-disk copy
+    def dropped_count(self):
+        return self._dropped
+
+    # Total size of the bodies held in memory
+    def in_memory_body_bytes(self):
+        return self._body_bytes
+
+    # The on-disk log backing this history, if any
+    def get_log(self):
+        return self._store
+    ''' -------------------------- '''
+
+    ''' --------- COMPACT -------- '''
+    # Snapshot of `mapping` for a new exchange: the previous snapshot of the same kind when
+    # nothing changed, otherwise a copy with interned string keys and values
+    def share(self, kind: str, mapping):
+        with self._lock:
+            last = self._snapshots.get(kind)
+            if last is not None and last == mapping:
+                return last
+            snapshot = {
+                sys.intern(key) if type(key) is str else key: sys.intern(value) if type(value) is str else value
+                for key, value in mapping.items()
+            }
+            self._snapshots[kind] = snapshot
+            return snapshot
+    ''' -------------------------- '''
+
+    ''' ---------- SPILL ---------- '''
+    # Move an evicted exchange to the temporary on-disk log
+    def _spill(self, exchange):
+        body = exchange.response.response_body
+        if isinstance(body, HttpCraftSpooledBody):
+            body.temporary = False  # the spilled record keeps pointing at the file
+        if self._store is None:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            fd, path = tempfile.mkstemp(prefix="httpcraft-history-", suffix=".jsonl", dir=self.spill_dir)
+            os.close(fd)
+            self._store = HttpCraftHistoryLog(path)
+        self._store.append(exchange)
+
+    # Evict the oldest in-memory exchanges until the policy is satisfied
+    def _evict(self):
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries) or
+            (self.max_body_bytes is not None and self._body_bytes > self.max_body_bytes)
+        ):
+            exchange = self._entries.popleft()
+            self._body_bytes -= self._sizes.popleft()
+            if self.log_path is not None:
+                continue  # already in the log
+            if self.spill_dir is not None:
+                self._spill(exchange)
+            else:
+                self._dropped += 1
+
+    # Number of history entries stored on disk
+    def _stored_count(self):
+        return len(self._store) - self._base if self._store is not None else 0
+
+    # Index of the first in-memory exchange
+    def _memory_start(self):
+        return len(self) - len(self._entries)
+    ''' -------------------------- '''
+
+    ''' ---------- QUERY --------- '''
+    # Rebuild the index once most of it refers to dropped exchanges (amortized O(1) per append)
+    def _prune_index(self):
+        stale = self._dropped - self._index.base
+        if stale > 0 and stale * 2 > len(self._index):
+            self._index.reset(self._dropped)
+            for exchange in self._entries:
+                self._index.add(exchange)
+
+    # History indexes of the exchanges matching every given criterion (see HttpCraftHistoryIndex.query)
+    def find_indices(self, status=None, method=None, path: str = None, path_prefix: str = None,
+                     since=None, until=None, limit: int = None):
+        with self._lock:
+            seqs = self._index.query(status=status, method=method, path=path, path_prefix=path_prefix,
+                                     since=since, until=until)
+            indices = [seq - self._dropped for seq in seqs if seq >= self._dropped]
+        return indices[:limit] if limit is not None else indices
+
+    # Exchanges matching every given criterion, oldest first:
+    # status (code or iterable of codes), method, exact path, path_prefix, since <= time < until
+    # (epoch seconds, datetime or timestamp string)
+    def find(self, status=None, method=None, path: str = None, path_prefix: str = None,
+             since=None, until=None, limit: int = None):
+        with self._lock:  # indices shift if exchanges are evicted meanwhile
+            indices = self.find_indices(status=status, method=method, path=path, path_prefix=path_prefix,
+                                        since=since, until=until, limit=limit)
+            return [self[index] for index in indices]
+    ''' -------------------------- '''
+
+    ''' ---------- LIST ---------- '''
+    # Record a new exchange
+    def append(self, exchange):
+        with self._lock:
+            if self.log_path is not None:
+                body = exchange.response.response_body
+                if isinstance(body, HttpCraftSpooledBody):
+                    body.temporary = False  # the log keeps pointing at the file
+                self._store.append(exchange)
+            size = body_size(exchange.response) if self.max_body_bytes is not None else 0
+            self._entries.append(exchange)
+            self._sizes.append(size)
+            self._body_bytes += size
+            self._index.add(exchange)
+            if self.is_bounded():
+                self._evict()
+                self._prune_index()
+
+    # Remove every exchange (a log at `log_path` is kept on disk, a spill log is deleted)
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._body_bytes = 0
+            self._dropped = 0
+            self._snapshots.clear()
+            self._index.reset()
+            if self._store is None:
+                return
+            if self.log_path is not None:
+                self._base = len(self._store)
+            else:
+                self._store.remove()
+                self._store = None
+
+    # Release the files backing this history
+    def close(self):
+        with self._lock:
+            if self._store is None:
+                return
+            if self.log_path is not None:
+                self._store.close()
+            else:
+                self._store.remove()
+            self._store = None
+
+    def __len__(self):
+        if self.log_path is not None:
+            return self._stored_count()
+        return self._stored_count() + len(self._entries)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        with self._lock:
+            total = len(self)
+            if index < 0:
+                index += total
+            if index < 0 or index >= total:
+                raise IndexError("history index out of range")
+            memory_start = self._memory_start()
+            if index >= memory_start:
+                return self._entries[index - memory_start]
+            return self._store[self._base + index]
+
+    def __iter__(self):
+        with self._lock:
+            memory_start = self._memory_start()
+            entries = list(self._entries)
+        if memory_start:
+            yield from self._store.iter_range(self._base, self._base + memory_start)
+        yield from entries
+
+    def __contains__(self, exchange):
+        if exchange in self._entries:
+            return True
+        if self._store is None:
+            return False
+        return any(e == exchange for e in self._store.iter_range(self._base, self._base + self._memory_start()))
+    ''' -------------------------- '''
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
@@ -0,0 +1,292 @@
+# subnet_musk
+
+from datetime import datetime
+
+from .spool import HttpCraftSpooledBody
+from .codec import get_codec
+
+# Metadata about the HTTP request
+class HttpCraftRequest:
+    __slots__ = ("url", "port", "path", "method", "headers", "cookies", "payload", "payload_type")
+
+    def __init__(self, url: str, port: int, path: str, method: str, headers: dict, cookies: dict,
+                 payload: dict, payload_type: str):
+        self.url = url
+        self.port = port
+        self.path = path
+        self.method = method
+        self.headers = headers
+        self.cookies = cookies
+        self.payload = payload
+        self.payload_type = payload_type
+
+    def to_dict(self):
+        return {
+            "url": self.url,
+            "port": self.port,
+            "path": self.path,
+            "method": self.method,
+            "headers": self.headers,
+            "cookies": self.cookies,
+            "payload": self.payload,
+            "payload_type": self.payload_type
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(
+            url=data.get("url"),
+            port=data.get("port"),
+            path=data.get("path"),
+            method=data.get("method"),
+            headers=data.get("headers", {}),
+            cookies=data.get("cookies", {}),
+            payload=data.get("payload", {}),
+            payload_type=data.get("payload_type", "json")
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, HttpCraftRequest):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"HttpCraftRequest({fields})"
+
+    def was_json(self):
+        return self.payload_type == "json"
+
+    def was_form(self):
+        return self.payload_type == "form"
+
+# Map a Content-Type header to one of "json", "html", "text", "binary", "unknown"
+def detect_response_type(content_type):
+    content_type = content_type.lower()
+    if "application/json" in content_type:
+        return "json"
+    elif "text/html" in content_type:
+        return "html"
+    elif "text" in content_type:
+        return "text"
+    elif "image" in content_type or "application/octet-stream" in content_type:
+        return "binary"
+    return "unknown"
+
+# Marker for a body that has not been decoded yet
+_UNDECODED = object()
+
+
+# Metadata about the HTTP response. The body is kept as raw bytes plus its
+# encoding and only decoded to text/JSON the first time `text` or
+# `response_body` is read; the decoded value is cached.
+class HttpCraftResponse:
+    __slots__ = ("status_code", "elapsed_time", "response_type", "raw_headers", "raw_body", "encoding",
+                 "timings", "request_bytes", "response_bytes", "body_bytes", "wire_body_bytes", "codec", "_body",
+                 "_text")
+
+    def __init__(self, status_code: int, elapsed_time: float, response_type: str, response_body=_UNDECODED,
+                 raw_headers: dict = None, raw_body=None, encoding: str = None, timings: dict = None,
+                 request_bytes: int = None, response_bytes: int = None, body_bytes: int = None,
+                 wire_body_bytes: int = None, codec=None):
+        self.status_code = status_code
+        self.elapsed_time = elapsed_time
+        self.response_type = response_type
+        self.raw_headers = raw_headers if raw_headers is not None else {}
+        self.raw_body = raw_body  # bytes, a HttpCraftSpooledBody, or None when built from a decoded body
+        self.encoding = encoding
+        # Phase breakdown in seconds: connect (pool wait + new connection setup), connection_reused,
+        # ttfb (request sent to headers received) and transfer (body download)
+        self.timings = timings if timings is not None else {}
+        self.request_bytes = request_bytes      # request line + headers + body as sent
+        self.response_bytes = response_bytes    # status line + headers + body as received on the wire
+        self.body_bytes = body_bytes            # body size after content decoding (gzip, deflate...)
+        self.wire_body_bytes = wire_body_bytes  # body size as received, before content decoding
+        self.codec = codec                      # JSON codec used to decode the body (None = default codec)
+        self._body = response_body
+        self._text = None
+
+    # Body decoded as text (cached)
+    @property
+    def text(self):
+        if self._text is None:
+            raw = self.raw_body
+            if raw is None:
+                raw = self.response_body  # built from an already decoded body
+                if isinstance(raw, str):
+                    self._text = raw
+                    return raw
+                if raw is None:
+                    return ""
+                if isinstance(raw, (dict, list)):
+                    self._text = (self.codec or get_codec()).dumps(raw)
+                    return self._text
+            if isinstance(raw, HttpCraftSpooledBody):
+                raw = raw.read()
+            self._text = bytes(raw).decode(self.encoding or "utf-8", errors="replace")
+        return self._text
+
+    # Body decoded according to response_type (cached): JSON -> dict/list, text/HTML -> str,
+    # anything else -> raw bytes. Streamed bodies stay a HttpCraftSpooledBody.
+    @property
+    def response_body(self):
+        if self._body is _UNDECODED:
+            if self.raw_body is None or isinstance(self.raw_body, HttpCraftSpooledBody):
+                self._body = self.raw_body
+            elif self.response_type == "json":
+                try:
+                    # UTF-8 (or undeclared: UTF-8/16/32 are detected) bodies are parsed straight from the bytes
+                    utf8 = self.encoding is None or self.encoding.lower().replace("_", "-") in ["utf-8", "utf8"]
+                    self._body = (self.codec or get_codec()).loads(self.raw_body if utf8 else self.text)
+                except Exception:
+                    self._body = self.text
+            elif self.response_type in ["html", "text"]:
+                self._body = self.text
+            else:
+                self._body = self.raw_body
+        return self._body
+
+    @response_body.setter
+    def response_body(self, value):
+        self._body = value
+        self._text = None
+
+    # Content-Encoding of the body as received (None when it was sent as it is)
+    @property
+    def content_encoding(self):
+        for key, value in self.raw_headers.items():
+            if key.lower() == "content-encoding":
+                return value.strip().lower() or None
+        return None
+
+    # Decoded body size divided by the size on the wire (None when either is unknown)
+    def compression_ratio(self):
+        if not self.body_bytes or not self.wire_body_bytes:
+            return None
+        return self.body_bytes / self.wire_body_bytes
+
+    # Whether the body has already been decoded
+    def is_decoded(self):
+        return self._body is not _UNDECODED
+
+    def to_dict(self):
+        return {
+            "status_code": self.status_code,
+            "elapsed_time": self.elapsed_time,
+            "response_type": self.response_type,
+            "response_body": self.response_body.to_dict() if isinstance(self.response_body, HttpCraftSpooledBody) else self.response_body,
+            "raw_headers": self.raw_headers,
+            "timings": self.timings,
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "body_bytes": self.body_bytes,
+            "wire_body_bytes": self.wire_body_bytes
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        body = data.get("response_body")
+        if isinstance(body, dict) and set(body) == {"spooled_file", "size"}:
+            body = HttpCraftSpooledBody(body["spooled_file"], body["size"])
+        return cls(
+            status_code=data.get("status_code"),
+            elapsed_time=data.get("elapsed_time", 0.0),
+            response_type=data.get("response_type", "unknown"),
+            response_body=body,
+            raw_headers=data.get("raw_headers", {}),
+            timings=data.get("timings", {}),
+            request_bytes=data.get("request_bytes"),
+            response_bytes=data.get("response_bytes"),
+            body_bytes=data.get("body_bytes"),
+            wire_body_bytes=data.get("wire_body_bytes")
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, HttpCraftResponse):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        body = self.response_body if self.is_decoded() else f"<{len(self.raw_body or b'')} undecoded bytes>"
+        return (f"HttpCraftResponse(status_code={self.status_code!r}, elapsed_time={self.elapsed_time!r}, "
+                f"response_type={self.response_type!r}, response_body={body!r}, raw_headers={self.raw_headers!r})")
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+# Format an epoch timestamp the way exchanges are displayed and saved (local time, milliseconds)
+def format_timestamp(epoch: float):
+    return datetime.fromtimestamp(epoch).strftime(TIMESTAMP_FORMAT)[:-3]
+
+
+# A request and its response. The timestamp is kept as an epoch value and only
+# formatted when `timestamp` is read; exchanges loaded from files keep the
+# string they were saved with.
+class HttpCraftExchange:
+    __slots__ = ("_epoch", "_timestamp", "request", "response", "csrf_token_updated", "cache_status", "attempts")
+
+    def __init__(self, timestamp, request: HttpCraftRequest, response: HttpCraftResponse,
+                 csrf_token_updated: bool = False, cache_status: str = None, attempts: list = None):
+        self.timestamp = timestamp  # formatted string or epoch seconds
+        self.request = request
+        self.response = response
+        self.csrf_token_updated = csrf_token_updated
+        self.cache_status = cache_status  # "hit", "revalidated" or "miss" when the response cache was consulted
+        self.attempts = attempts          # one dict per attempt when a retry policy is set (see HttpCraft._fetch_with_retry)
+
+    # Timestamp as "YYYY-MM-DD HH:MM:SS.mmm"
+    @property
+    def timestamp(self):
+        if self._timestamp is None and self._epoch is not None:
+            return format_timestamp(self._epoch)
+        return self._timestamp
+
+    @timestamp.setter
+    def timestamp(self, value):
+        if isinstance(value, (int, float)):
+            self._epoch, self._timestamp = float(value), None
+        else:
+            self._epoch, self._timestamp = None, value
+
+    # Timestamp as epoch seconds (None if the stored string cannot be parsed)
+    @property
+    def epoch(self):
+        if self._epoch is None and self._timestamp is not None:
+            try:
+                return datetime.strptime(self._timestamp, TIMESTAMP_FORMAT).timestamp()
+            except ValueError:
+                return None
+        return self._epoch
+
+    def to_dict(self):
+        return {
+            "timestamp": self.timestamp,
+            "request": self.request.to_dict(),
+            "response": self.response.to_dict(),
+            "csrf_token_updated": self.csrf_token_updated,
+            "cache_status": self.cache_status,
+            "attempts": self.attempts
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, HttpCraftExchange):
+            return NotImplemented
+        return (self.timestamp == other.timestamp and self.request == other.request and
+                self.response == other.response and self.csrf_token_updated == other.csrf_token_updated and
+                self.cache_status == other.cache_status and self.attempts == other.attempts)
+
+    def __repr__(self):
+        return (f"HttpCraftExchange(timestamp={self.timestamp!r}, request={self.request!r}, "
+                f"response={self.response!r}, csrf_token_updated={self.csrf_token_updated!r}, "
+                f"cache_status={self.cache_status!r}, attempts={self.attempts!r})")
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(
+            timestamp=data.get("timestamp"),
+            request=HttpCraftRequest.from_dict(data.get("request", {})),
+            response=HttpCraftResponse.from_dict(data.get("response", {})),
+            csrf_token_updated=data.get("csrf_token_updated", False),
+            cache_status=data.get("cache_status"),
+            attempts=data.get("attempts")
+        )
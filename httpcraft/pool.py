@@ -0,0 +1,33 @@
+# subnet_musk
+
+from requests import Request
+from requests.adapters import HTTPAdapter
+
+# statistics live apart so that they can be used without importing requests, and so do
+# the urllib3 pool classes (shared with the urllib3 transport)
+from .poolstats import HttpCraftPoolStats
+from .connpool import pool_classes, warm_up_pool
+
+
+# requests adapter with configurable pool sizes, keep-alive idle timeout and pool statistics
+class HttpCraftAdapter(HTTPAdapter):
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10, pool_block: bool = False,
+                 keepalive_timeout: float = None, stats: HttpCraftPoolStats = None, **kwargs):
+        self.keepalive_timeout = keepalive_timeout
+        self.stats = stats if stats is not None else HttpCraftPoolStats()
+        super().__init__(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                         pool_block=pool_block, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = pool_classes(self.stats, self.keepalive_timeout)
+
+    # Pool used by requests for `url` (same pool key as real requests)
+    def _pool_for(self, url: str, verify=True):
+        if hasattr(self, "get_connection_with_tls_context"):  # requests >= 2.32.2
+            return self.get_connection_with_tls_context(Request("GET", url).prepare(), verify)
+        return self.get_connection(url)
+
+    # Open up to `connections` connections to `url` and park them in its pool
+    def warm_up(self, url: str, connections: int, verify=True):
+        return warm_up_pool(self._pool_for(url, verify), min(connections, self._pool_maxsize))
@@ -0,0 +1,54 @@
+# subnet_musk
+
+import threading
+
+
+# Counters shared by all the connection pools of one adapter
+class HttpCraftPoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    # Zero every counter
+    def reset(self):
+        with self._lock:
+            self.acquisitions = 0    # connections taken from a pool
+            self.reused = 0          # ... that were still open (keep-alive hits)
+            self.new_connections = 0 # ... that had to (re)connect
+            self.idle_closed = 0     # kept-alive connections closed for exceeding the idle timeout
+
+    # Record one connection acquisition
+    def record(self, reused: bool, idle_closed: bool = False):
+        with self._lock:
+            self.acquisitions += 1
+            if reused:
+                self.reused += 1
+            else:
+                self.new_connections += 1
+            if idle_closed:
+                self.idle_closed += 1
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "acquisitions": self.acquisitions,
+                "reused": self.reused,
+                "new_connections": self.new_connections,
+                "idle_closed": self.idle_closed,
+                "reuse_ratio": self.reused / self.acquisitions if self.acquisitions else 0.0
+            }
+
+
+# Per-thread timing of the request in flight, filled by the pool and connection classes below
+_phase = threading.local()
+
+
+# Start collecting connection timings for a request sent from this thread
+def begin_phase_timing():
+    _phase.timing = {"connect": 0.0, "connection_reused": None}
+    return _phase.timing
+
+
+# Connection timings collected since begin_phase_timing (None outside a timed request)
+def current_phase_timing():
+    return getattr(_phase, "timing", None)
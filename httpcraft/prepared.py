@@ -0,0 +1,136 @@
+# subnet_musk
+
+import string
+from urllib.parse import quote, urlencode
+
+import requests
+
+
+# Serialized key=value fragment of a form/query string, encoded like requests
+def _form_fragment(key, value):
+    values = [value] if isinstance(value, (str, bytes)) or not hasattr(value, "__iter__") else value
+    return urlencode([(key, v) for v in values if v is not None], doseq=True)
+
+
+# A request whose URL, headers, cookies and payload skeleton are built once.
+# The payload is kept as one pre-serialized fragment per key: send(**fields)
+# only serializes the fields passed to it, joins the fragments and sends a
+# copy of the prepared template through the client's transport, so per-request
+# work is reduced to substitution plus I/O. Fields named like a "{placeholder}"
+# in the path fill the path instead of the payload.
+# Headers and cookies are captured when the request is prepared; call
+# refresh() to pick up later changes (e.g. a new CSRF token).
+class HttpCraftPreparedRequest:
+    def __init__(self, client, method: str, path: str = "", template_payload: dict = None, port: int = None):
+        self.client = client
+        self.method = method.upper()
+        self.path = path
+        self.port = port
+        self.template_payload = dict(template_payload if template_payload is not None else client.payload)
+        self.path_fields = {name for _, name, _, _ in string.Formatter().parse(path) if name}
+        self.refresh()
+
+    # Rebuild the template from the client's current headers, cookies and transport settings
+    def refresh(self):
+        client = self.client
+        payload = self.template_payload
+        if self.method in ["GET", "HEAD"] or client.payload_mode != "json":
+            self.payload_type = "form"
+        else:
+            self.payload_type = "json"
+        with client._lock:
+            headers, cookies = dict(client.headers), dict(client.cookies)
+
+        kwargs = {"headers": headers, "cookies": cookies}
+        if self.method in ["GET", "HEAD"]:
+            kwargs["params"] = payload
+        elif self.payload_type == "json":
+            kwargs["json"] = payload
+        else:
+            kwargs["data"] = payload
+        url = client._build_url(self._fill_path({}) if self.path_fields else self.path, override_port=self.port)
+        self.template = client.transport.prepare_request(requests.Request(self.method, url, **kwargs))
+        self.settings = client.transport.send_settings(self.template.url)
+
+        if self.payload_type == "json":
+            codec = client.json_codec
+            serialize = lambda key, value: codec.dumps({key: value})[1:-1]  # "key":value member
+            self._separator = codec.separator
+        else:
+            serialize, self._separator = _form_fragment, "&"
+        self._serialize = serialize
+        self._fragments = {key: serialize(key, value) for key, value in self.template_payload.items()}
+        self._base_url = self.template.url.split("?", 1)[0]
+
+    # Path with its placeholders replaced by URL-quoted field values (missing ones left empty)
+    def _fill_path(self, fields):
+        return self.path.format(**{name: quote(str(fields.get(name, "")), safe="") for name in self.path_fields})
+
+    # Serialized payload for the given field overrides (same bytes as serializing the merged dict)
+    def _serialize_payload(self, fields):
+        fragments = self._fragments
+        if fields:
+            fragments = dict(fragments)
+            for key, value in fields.items():
+                fragments[key] = self._serialize(key, value)
+        if self.payload_type == "json":
+            return "{" + self._separator.join(fragments.values()) + "}"
+        return self._separator.join(fragment for fragment in fragments.values() if fragment)
+
+    # Build the PreparedRequest for one call; returns (prepared, path fields, payload fields)
+    def _build(self, fields, headers=None):
+        fields = dict(fields)
+        path_fields = {k: fields.pop(k) for k in list(fields) if k in self.path_fields}
+        prepared = self.template.copy()
+        base_url = self._base_url
+        if self.path_fields:
+            base_url = self.client._build_url(self._fill_path(path_fields), override_port=self.port)
+        body = self._serialize_payload(fields)
+        if headers:
+            prepared.headers.update(headers)
+        if self.method in ["GET", "HEAD"]:
+            prepared.url = base_url + ("?" + body if body else "")
+        else:
+            prepared.url = base_url
+            encoded = {"data": body.encode("utf-8"), "headers": prepared.headers}
+            self.client._compress_body(encoded)  # no-op unless request compression is enabled
+            prepared.body = encoded["data"]
+            prepared.headers["Content-Length"] = str(len(prepared.body))
+        return prepared, path_fields, fields
+
+    # Build the requests.PreparedRequest for one call without sending it
+    def build(self, **fields):
+        return self._build(fields)[0]
+
+    # Send one request with `fields` substituted (and `headers` added); the exchange is
+    # returned and, if `record` is set, stored in the client's history
+    def _send(self, fields, headers=None, record=True):
+        client = self.client
+        prepared, path_fields, payload_fields = self._build(fields, headers)
+        path = self._fill_path(path_fields) if self.path_fields else self.path
+        payload_used = dict(self.template_payload, **payload_fields) if payload_fields else self.template_payload
+
+        def send_prepared(url, stream=True, **kwargs):
+            return client.transport.send(prepared, stream=stream, **self.settings)
+
+        if client.retry_policy is not None:
+            http_response, sent, attempts = client._fetch_with_retry(self.method, send_prepared, prepared.url, {})
+        else:
+            http_response, sent = client._fetch(send_prepared, prepared.url, {})
+            attempts = None
+
+        csrf_token_updated = False
+        if client.csrf_mode != "none" and http_response.response_type == "html":
+            csrf_token_updated = client._update_csrf_token(http_response.text)
+
+        return client._record_exchange(
+            path, self.port, self.method, sent.headers, payload_used, self.payload_type,
+            http_response, csrf_token_updated, attempts=attempts, record=record
+        )
+
+    # Send one request with the given fields substituted and record the exchange
+    def send(self, **fields):
+        return self._send(fields)
+
+    def __repr__(self):
+        return f"HttpCraftPreparedRequest({self.method} {self._base_url}, payload_type={self.payload_type!r})"
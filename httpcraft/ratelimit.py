@@ -0,0 +1,106 @@
+# subnet_musk
+
+import threading
+import time
+
+
+# Token bucket: `rate` tokens per second are added up to `burst` tokens.
+# Callers reserve a token and are told how long to wait for it; the bucket may
+# go into debt, so concurrent callers queue up behind each other in order and
+# nobody holds a lock while sleeping (which also makes it usable from asyncio).
+class HttpCraftTokenBucket:
+    def __init__(self, rate: float, burst: float = None):
+        assert rate > 0, "rate must be a positive number of requests per second"
+        assert burst is None or burst >= 1, "burst must allow at least one request"
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    # Take `tokens` tokens and return how many seconds to wait before using them
+    def reserve(self, tokens: float = 1):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= tokens
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+# Rate limiter with one token bucket per target ("host:port").
+# Every target gets the default rate/burst unless it has its own limit;
+# a default rate of None leaves the other targets unlimited.
+class HttpCraftRateLimiter:
+    def __init__(self, rate: float = None, burst: float = None):
+        self._limits = {}   # target -> (rate, burst)
+        self._buckets = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        self.set_default(rate, burst)
+
+    # Change the rate and burst of every target without a limit of its own
+    def set_default(self, rate: float = None, burst: float = None):
+        if rate is not None:
+            HttpCraftTokenBucket(rate, burst)  # validate
+        with self._lock:
+            self.rate = rate
+            self.burst = burst
+            for target in [t for t in self._buckets if t not in self._limits]:
+                del self._buckets[target]
+
+    # Give one target its own rate and burst
+    def set_limit(self, target: str, rate: float, burst: float = None):
+        bucket = HttpCraftTokenBucket(rate, burst)
+        with self._lock:
+            self._limits[target] = (rate, burst)
+            self._buckets[target] = bucket
+
+    # Reserve a request slot for `target` and return the wait in seconds
+    def reserve(self, target: str):
+        with self._lock:
+            if target not in self._buckets:
+                rate, burst = self._limits.get(target, (self.rate, self.burst))
+                self._buckets[target] = HttpCraftTokenBucket(rate, burst) if rate is not None else None
+            bucket = self._buckets[target]
+            stats = self._stats.setdefault(target, {"requests": 0, "waited_requests": 0,
+                                                    "total_wait": 0.0, "max_wait": 0.0})
+        wait = bucket.reserve() if bucket is not None else 0.0
+        with self._lock:
+            stats["requests"] += 1
+            if wait > 0:
+                stats["waited_requests"] += 1
+                stats["total_wait"] += wait
+                stats["max_wait"] = max(stats["max_wait"], wait)
+        return wait
+
+    # Block until `target` may be sent a request; returns the seconds waited
+    def acquire(self, target: str):
+        wait = self.reserve(target)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    # Awaitable flavour of acquire
+    async def acquire_async(self, target: str):
+        wait = self.reserve(target)
+        if wait > 0:
+            import asyncio  # only async clients get here, and they have imported it already
+            await asyncio.sleep(wait)
+        return wait
+
+    # Per-target counters: requests, waited_requests, total_wait, max_wait, mean_wait (seconds)
+    def stats(self):
+        with self._lock:
+            result = {}
+            for target, stats in self._stats.items():
+                bucket = self._buckets.get(target)
+                if bucket is not None:
+                    rate, burst = bucket.rate, bucket.burst
+                else:  # unlimited, or its bucket was reset by set_default: the limit it will get
+                    rate, burst = self._limits.get(target, (self.rate, self.burst))
+                    if rate is not None and burst is None:
+                        burst = max(1.0, rate)
+                result[target] = dict(stats, rate=rate, burst=burst,
+                                      mean_wait=stats["total_wait"] / stats["requests"] if stats["requests"] else 0.0)
+            return result
@@ -0,0 +1,228 @@
+# subnet_musk
+
+import functools
+import hashlib
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .bench import LatencyHistogram
+from .codec import get_codec
+from .compression import open_file
+from .history import iter_history_file, json_default
+from .spool import HttpCraftSpooledBody
+
+MODES = ("original", "scaled", "max")
+# headers computed again for every request (the cookies are sent separately, the
+# body is compressed again according to the replaying client's settings)
+RECOMPUTED_HEADERS = {"content-length", "host", "cookie", "transfer-encoding", "content-encoding"}
+
+
+# SHA-256 of a response body. JSON bodies are hashed in a canonical form, so that a
+# reply is only reported as changed when its content changes, not its formatting
+def body_hash(response):
+    try:
+        body = response.response_body
+        if isinstance(body, (dict, list)):
+            data = get_codec().dumpb(body, default=json_default, sort_keys=True)
+        elif isinstance(body, HttpCraftSpooledBody):
+            data = body.read()
+        elif isinstance(body, str):
+            data = body.encode("utf-8")
+        elif body is None:
+            data = b""
+        else:
+            data = bytes(body)
+    except Exception:
+        return None  # e.g. a spooled body whose file is gone
+    return hashlib.sha256(data).hexdigest()
+
+
+# Replays recorded exchanges against the target of `client` and compares the answers.
+# `source` is a file written by save_history_to_file (JSON or JSONL, read lazily) or an
+# iterable of exchanges. Each request is re-sent with its recorded method, path,
+# headers, cookies and payload; the client's own headers and cookies are applied on
+# top (e.g. credentials for the new target). Modes:
+#   "original"  requests start at their recorded offsets from the first one
+#   "scaled"    same, with the gaps divided by `speed` (speed=2 is twice as fast)
+#   "max"       no pacing, `max_workers` requests in flight
+# In every mode at most `max_workers` requests run at once; a paced request that
+# cannot start on time is sent late and the delay is reported as lag.
+class HttpCraftReplay:
+    def __init__(self, client, source, mode: str = "max", speed: float = 1.0, max_workers: int = 10,
+                 record: bool = False):
+        assert mode in MODES, f"mode must be one of {', '.join(MODES)}"
+        assert speed > 0, "speed must be a positive number"
+        assert max_workers > 0, "max_workers must be a positive integer"
+        self.client = client
+        self.source = source
+        self.mode = mode
+        self.speed = speed if mode == "scaled" else 1.0
+        self.max_workers = max_workers
+        self.record = record
+        self.lag = 0.0
+
+    # Re-send one recorded request; returns (HttpCraftResponse, None) or (None, error)
+    def _replay_one(self, recorded):
+        client = self.client
+        request = recorded.request
+        method = (request.method or "GET").upper()
+        with client._lock:
+            headers = {k: v for k, v in (request.headers or {}).items() if k.lower() not in RECOMPUTED_HEADERS}
+            headers.update(client.headers)
+            cookies = dict(request.cookies or {}, **client.cookies)
+
+        kwargs = {"headers": headers, "cookies": cookies}
+        payload = request.payload
+        if method in ["GET", "HEAD"]:
+            kwargs["params"] = payload or None
+        elif request.payload_type == "json":
+            client._encode_json_body(kwargs, payload)
+        else:
+            kwargs["data"] = payload
+        client._compress_body(kwargs)
+
+        url = client._build_url(request.path or "")
+        request_func = functools.partial(client.transport.request, method)
+        try:
+            if client.retry_policy is not None:
+                response, sent, attempts = client._fetch_with_retry(method, request_func, url, kwargs)
+            else:
+                response, sent = client._fetch(request_func, url, kwargs)
+                attempts = None
+        except Exception as e:
+            return None, f"{type(e).__name__}: {e}"
+        if self.record:
+            client._record_exchange(request.path or "", None, method, sent.headers, payload, request.payload_type,
+                                    response, False, attempts=attempts)
+        return response, None
+
+    # Diff record of one recorded exchange and its replay
+    @staticmethod
+    def _diff(index, recorded, response, error):
+        old = recorded.response
+        diff = {
+            "index": index,
+            "method": recorded.request.method,
+            "path": recorded.request.path,
+            "recorded_status": old.status_code,
+            "recorded_elapsed": old.elapsed_time,
+            "recorded_hash": body_hash(old),
+            "status": None,
+            "elapsed": None,
+            "hash": None,
+            "error": error
+        }
+        if response is not None:
+            diff.update(status=response.status_code, elapsed=response.elapsed_time, hash=body_hash(response))
+        diff["status_changed"] = diff["status"] != diff["recorded_status"]
+        diff["body_changed"] = diff["hash"] != diff["recorded_hash"]
+        if response is not None and old.elapsed_time is not None:
+            diff["latency_delta"] = response.elapsed_time - old.elapsed_time
+        else:
+            diff["latency_delta"] = None
+        return diff
+
+    # Seconds to wait before sending a request recorded at `sent_at`
+    def _pace(self, start, first, sent_at):
+        delay = start + (sent_at - first) / self.speed - time.perf_counter()
+        if delay < 0:
+            self.lag = max(self.lag, -delay)
+        return delay
+
+    # Replay the source and yield one diff record per exchange, in recorded order
+    def iter_diffs(self):
+        exchanges = iter_history_file(self.source) if isinstance(self.source, str) else iter(self.source)
+        self.client._ensure_pool_size(self.max_workers)
+        max_pending = self.max_workers * 2  # bound memory on very large histories
+        pending = deque()
+        start, first = time.perf_counter(), None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for index, recorded in enumerate(exchanges):
+                if self.mode != "max":
+                    epoch = recorded.epoch
+                    if epoch is not None:
+                        sent_at = epoch - (recorded.response.elapsed_time or 0.0)
+                        first = sent_at if first is None else first
+                        delay = self._pace(start, first, sent_at)
+                        # hand back finished diffs while waiting for the next send time
+                        while delay > 0 and pending and pending[0][2].done():
+                            yield self._diff(*self._pop(pending))
+                            delay = self._pace(start, first, sent_at)
+                        if delay > 0:
+                            time.sleep(delay)
+                pending.append((index, recorded, executor.submit(self._replay_one, recorded)))
+                while len(pending) >= max_pending or (pending and pending[0][2].done()):
+                    yield self._diff(*self._pop(pending))
+            while pending:
+                yield self._diff(*self._pop(pending))
+
+    @staticmethod
+    def _pop(pending):
+        index, recorded, future = pending.popleft()
+        response, error = future.result()
+        return index, recorded, response, error
+
+    # Replay everything and return the report: counts of replayed requests, errors, status
+    # and body changes, status transitions ("200->500": n), recorded vs. replayed latency
+    # and the worst pacing lag. Diff records are also written as JSONL to `output` and/or
+    # passed to callback(diff)
+    def run(self, output: str = None, callback=None):
+        recorded_latency, replayed_latency = LatencyHistogram(), LatencyHistogram()
+        report = {"replayed": 0, "errors": 0, "status_changed": 0, "body_changed": 0, "status_transitions": {}}
+        sink = open_file(output, "w", encoding="utf-8") if output else None
+        start = time.perf_counter()
+        try:
+            for diff in self.iter_diffs():
+                report["replayed"] += 1
+                if diff["recorded_elapsed"] is not None:
+                    recorded_latency.record(diff["recorded_elapsed"])
+                if diff["error"] is not None:
+                    report["errors"] += 1
+                else:
+                    replayed_latency.record(diff["elapsed"])
+                    report["body_changed"] += diff["body_changed"]
+                if diff["status_changed"]:
+                    report["status_changed"] += 1
+                    transition = f"{diff['recorded_status']}->{diff['status'] if diff['error'] is None else 'error'}"
+                    report["status_transitions"][transition] = report["status_transitions"].get(transition, 0) + 1
+                if sink is not None:
+                    sink.write(get_codec().dumps(diff) + "\n")
+                if callback is not None:
+                    callback(diff)
+        finally:
+            if sink is not None:
+                sink.close()
+
+        report.update(
+            target=self.client._build_url("").rstrip("/"),
+            mode=self.mode,
+            speed=self.speed,
+            duration=time.perf_counter() - start,
+            max_lag=self.lag,
+            recorded_latency=recorded_latency.to_dict(),
+            replayed_latency=replayed_latency.to_dict()
+        )
+        return report
+
+
+# Human-readable replay report
+def format_replay_report(report: dict):
+    def latency(summary):
+        return "  ".join(f"{key} {summary[key] * 1000:.2f}" for key in ["p50", "p90", "p99", "max", "mean"])
+
+    mode = report["mode"] + (f" x{report['speed']}" if report["mode"] == "scaled" else "")
+    lines = [
+        f"Target:          {report['target']} ({mode})",
+        f"Replayed:        {report['replayed']} in {report['duration']:.2f} s, {report['errors']} errors",
+        f"Status changes:  {report['status_changed']}" + (
+            " (" + ", ".join(f"{t}: {n}" for t, n in sorted(report["status_transitions"].items())) + ")"
+            if report["status_transitions"] else ""),
+        f"Body changes:    {report['body_changed']}",
+        f"Recorded (ms):   {latency(report['recorded_latency'])}",
+        f"Replayed (ms):   {latency(report['replayed_latency'])}"
+    ]
+    if report["mode"] != "max":
+        lines.append(f"Max lag:         {report['max_lag'] * 1000:.2f} ms")
+    return "\n".join(lines)
@@ -0,0 +1,157 @@
+# subnet_musk
+
+import random
+import time
+
+import requests
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+from .cache import get_header, parse_http_date
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS", "TRACE"}
+HEDGEABLE_METHODS = {"GET", "HEAD"}
+REJECTED_STATUSES = {429}  # the server refused the request without processing it
+
+
+# Whether a failed request never reached the server (safe to retry for any method)
+def request_not_sent(error):
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = error.args[0] if error.args else None
+    reason = getattr(reason, "reason", reason)  # MaxRetryError wraps the urllib3 error
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+# When and how to retry failed requests.
+# Statuses in `retry_statuses` and exceptions in `retry_exceptions` are retried
+# up to `max_attempts` attempts in total, waiting an exponential backoff
+# (backoff_base * 2^n, capped at backoff_max, randomized with full jitter) or
+# the server's Retry-After. Non-idempotent methods (POST, PATCH) are only
+# retried when the request was never sent or was rejected with 429, unless
+# `retry_non_idempotent` is set. With `hedge_after`, a GET/HEAD still pending
+# after that many seconds is duplicated and the first answer wins.
+class HttpCraftRetryPolicy:
+    def __init__(self, max_attempts: int = 3, backoff_base: float = 0.1, backoff_max: float = 10.0,
+                 jitter: bool = True, retry_statuses=(429, 502, 503, 504), retry_exceptions=None,
+                 respect_retry_after: bool = True, max_retry_after: float = 60.0,
+                 retry_non_idempotent: bool = False, hedge_after: float = None):
+        assert max_attempts > 0, "max_attempts must be a positive integer"
+        assert backoff_base >= 0 and backoff_max >= 0, "Backoff times cannot be negative"
+        assert hedge_after is None or hedge_after > 0, "hedge_after must be a positive number of seconds"
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.retry_statuses = set(retry_statuses)
+        self.retry_exceptions = tuple(retry_exceptions) if retry_exceptions is not None else (
+            requests.exceptions.ConnectionError, requests.exceptions.Timeout
+        )
+        self.respect_retry_after = respect_retry_after
+        self.max_retry_after = max_retry_after
+        self.retry_non_idempotent = retry_non_idempotent
+        self.hedge_after = hedge_after
+
+    # Whether `method` may be sent twice without side effects
+    def is_idempotent(self, method: str):
+        return self.retry_non_idempotent or method.upper() in IDEMPOTENT_METHODS
+
+    # Whether a response status deserves another attempt
+    def should_retry_status(self, method: str, status_code: int):
+        if status_code not in self.retry_statuses:
+            return False
+        return status_code in REJECTED_STATUSES or self.is_idempotent(method)
+
+    # Whether an exception deserves another attempt
+    def should_retry_error(self, method: str, error: Exception):
+        if not isinstance(error, self.retry_exceptions):
+            return False
+        return self.is_idempotent(method) or request_not_sent(error)
+
+    # Whether a request may be hedged
+    def can_hedge(self, method: str):
+        return self.hedge_after is not None and method.upper() in HEDGEABLE_METHODS
+
+    # Seconds to wait before attempt `attempt + 1`; None when the server asks to wait
+    # longer than max_retry_after (the response is returned as it is)
+    def delay(self, attempt: int, headers: dict = None):
+        retry_after = get_header(headers or {}, "Retry-After") if self.respect_retry_after else None
+        if retry_after is not None:
+            try:
+                seconds = float(retry_after)
+            except ValueError:
+                date = parse_http_date(retry_after)
+                seconds = date - time.time() if date is not None else None
+            if seconds is not None:
+                seconds = max(0.0, seconds)
+                return seconds if seconds <= self.max_retry_after else None
+        backoff = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        return random.uniform(0, backoff) if self.jitter else backoff
+
+    def to_dict(self):
+        return {
+            "max_attempts": self.max_attempts,
+            "backoff_base": self.backoff_base,
+            "backoff_max": self.backoff_max,
+            "jitter": self.jitter,
+            "retry_statuses": sorted(self.retry_statuses),
+            "retry_exceptions": [e.__name__ for e in self.retry_exceptions],
+            "respect_retry_after": self.respect_retry_after,
+            "max_retry_after": self.max_retry_after,
+            "retry_non_idempotent": self.retry_non_idempotent,
+            "hedge_after": self.hedge_after
+        }
+
+
+# The attempts of one request under a retry policy, shared by the sync and async clients:
+# iterating yields one record per attempt ({attempt, delay, elapsed, status_code, error,
+# hedged, winner}); the caller waits record["delay"] seconds, sends, and reports the outcome
+# with failed() or answered(), which tell whether to try again. `should_retry_error`
+# replaces policy.should_retry_error (the async client maps aiohttp errors with it)
+class HttpCraftRetryAttempts:
+    def __init__(self, policy: HttpCraftRetryPolicy, method: str, should_retry_error=None):
+        self.policy = policy
+        self.method = method
+        self.should_retry_error = should_retry_error or policy.should_retry_error
+        self.records = []
+        self._delay = 0.0
+
+    def __iter__(self):
+        for attempt in range(1, self.policy.max_attempts + 1):
+            record = {"attempt": attempt, "delay": self._delay, "elapsed": None, "status_code": None,
+                      "error": None, "hedged": False, "winner": None}
+            self.records.append(record)
+            yield record
+
+    # The attempt was hedged and settled by `winner` ("primary" or "hedge")
+    def settled_by(self, record, winner: str):
+        record["hedged"] = winner == "hedge"
+        record["winner"] = winner
+
+    # The attempt raised `error` after `elapsed` seconds; True when it should be retried
+    def failed(self, record, error, elapsed: float):
+        record["elapsed"] = elapsed
+        record["error"] = f"{type(error).__name__}: {error}"
+        if record["attempt"] == self.policy.max_attempts or not self.should_retry_error(self.method, error):
+            return False
+        self._delay = self.policy.delay(record["attempt"])
+        return True
+
+    # The attempt was answered with `response` after `elapsed` seconds; True when it should be retried
+    def answered(self, record, response, elapsed: float):
+        record["elapsed"] = elapsed
+        record["status_code"] = response.status_code
+        if record["attempt"] == self.policy.max_attempts or \
+                not self.policy.should_retry_status(self.method, response.status_code):
+            return False
+        self._delay = self.policy.delay(record["attempt"], response.raw_headers)
+        return self._delay is not None  # None: Retry-After beyond max_retry_after
+
+
+# The (future, "primary" or "hedge") settling a hedged request once `done` holds its completed
+# futures: the first successful answer, or the last failure; None while one is still pending.
+# Works with concurrent.futures and asyncio futures alike
+def hedge_winner(primary, hedge, done, pending):
+    for future, name in ((primary, "primary"), (hedge, "hedge")):
+        if future in done and (future.exception() is None or not pending):
+            return future, name
+    return None
@@ -0,0 +1,157 @@
+# subnet_musk
+
+import os
+import pickle
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .models import HttpCraftRequest, HttpCraftResponse, HttpCraftExchange
+
+
+# Compact record of an exchange sent from a worker process to the parent: a flat tuple
+# (no field names, no codec, no client) holding the raw body bytes, which the parent
+# decodes lazily like any other response. The request URL is the parent's target
+def pack_exchange(exchange):
+    request, response = exchange.request, exchange.response
+    body = response.raw_body
+    decoded = body is None  # e.g. built from a cached, already decoded body
+    if decoded:
+        body = response.response_body
+    return (
+        exchange.epoch, exchange.csrf_token_updated, exchange.cache_status, exchange.attempts,
+        request.port, request.path, request.method, request.headers, request.cookies, request.payload,
+        request.payload_type,
+        response.status_code, response.elapsed_time, response.response_type, response.raw_headers, body, decoded,
+        response.encoding, response.timings, response.request_bytes, response.response_bytes,
+        response.body_bytes, response.wire_body_bytes
+    )
+
+
+# Rebuild the exchange of a record made by pack_exchange
+def unpack_exchange(record, url: str, codec=None):
+    (epoch, csrf_token_updated, cache_status, attempts,
+     port, path, method, headers, cookies, payload, payload_type,
+     status_code, elapsed_time, response_type, raw_headers, body, decoded,
+     encoding, timings, request_bytes, response_bytes, body_bytes, wire_body_bytes) = record
+    request = HttpCraftRequest(url=url, port=port, path=path, method=method, headers=headers, cookies=cookies,
+                               payload=payload, payload_type=payload_type)
+    response = HttpCraftResponse(status_code=status_code, elapsed_time=elapsed_time, response_type=response_type,
+                                 raw_headers=raw_headers, encoding=encoding, timings=timings,
+                                 request_bytes=request_bytes, response_bytes=response_bytes,
+                                 body_bytes=body_bytes, wire_body_bytes=wire_body_bytes, codec=codec)
+    if decoded:
+        response.response_body = body
+    else:
+        response.raw_body = body
+    return HttpCraftExchange(timestamp=epoch, request=request, response=response,
+                             csrf_token_updated=csrf_token_updated, cache_status=cache_status, attempts=attempts)
+
+
+# State of a worker process: its client and the threads sending its requests
+_worker = {}
+
+
+# Worker process initializer: clone the parent's client from its configuration
+def _init_worker(config: dict, json_codec: str, max_workers: int, keepalive_timeout: float):
+    from .core import HttpCraft
+    client = HttpCraft(config["base_url"] or "http://localhost", pool_maxsize=max_workers,
+                       keepalive_timeout=keepalive_timeout)
+    client._apply_config(config)
+    client.set_json_codec(json_codec)
+    _worker["client"] = client
+    _worker["executor"] = ThreadPoolExecutor(max_workers=max_workers)
+
+
+# Exception of a failed request as sent back to the parent (the original one when it can be pickled)
+def _portable_error(error):
+    try:
+        pickle.dumps(error)
+        return error
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+
+
+# Send one spec in a worker; returns its record, or the exception it raised
+def _send_one(spec):
+    try:
+        return pack_exchange(_worker["client"]._send_spec(spec, record=False))
+    except Exception as e:
+        return _portable_error(e)
+
+
+# Send a chunk of specs in a worker and return their records, in order
+def _run_chunk(chunk):
+    return list(_worker["executor"].map(_send_one, chunk))
+
+
+# Runs (method, path[, payload[, payload_type]]) specs across `processes` worker processes, each
+# sending with `max_workers` threads, so that request building, response parsing
+# and CSRF scanning use several cores. Each worker clones `client` from its
+# configuration (target, headers, cookies, payload, CSRF, compression, JSON codec);
+# cookies and CSRF tokens then evolve separately in every worker and are not merged
+# back. Retry policy, rate limits and the response cache are not carried over.
+# Specs are handed out in chunks of `chunk_size` with at most two chunks per process
+# in flight, so large iterables are consumed lazily; results are yielded in
+# submission order.
+class HttpCraftShardRunner:
+    def __init__(self, client, processes: int = None, max_workers: int = 10, chunk_size: int = 64,
+                 start_method: str = None):
+        processes = processes if processes is not None else (os.cpu_count() or 1)
+        assert processes > 0, "processes must be a positive integer"
+        assert max_workers > 0, "max_workers must be a positive integer"
+        assert chunk_size > 0, "chunk_size must be a positive integer"
+        self.client = client
+        self.processes = processes
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.start_method = start_method  # multiprocessing start method (None = platform default)
+
+    def _executor(self):
+        kwargs = {}
+        if self.start_method is not None:
+            import multiprocessing
+            kwargs["mp_context"] = multiprocessing.get_context(self.start_method)
+        client = self.client
+        initargs = (client._config_dict(), client.get_json_codec(), self.max_workers, client.keepalive_timeout)
+        return ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker, initargs=initargs,
+                                   **kwargs)
+
+    # Next chunk of specs (empty at the end of the input)
+    def _chunk(self, specs):
+        chunk = []
+        for spec in specs:
+            chunk.append(tuple(spec))
+            if len(chunk) >= self.chunk_size:
+                break
+        return chunk
+
+    # Merge a record into the parent: rebuild the exchange and store it when `record` is set
+    def _merge(self, item, record):
+        if isinstance(item, Exception):
+            raise item
+        client = self.client
+        exchange = unpack_exchange(item, client.base_url, client.json_codec)
+        if record:
+            with client._lock:
+                client._store_exchange(exchange)
+        return exchange
+
+    # Send every spec and yield the exchanges in submission order. A failed request raises
+    # its exception when its turn comes, as in HttpCraft.send_many
+    def run(self, requests, record: bool = True):
+        specs = iter(requests)
+        max_pending = self.processes * 2
+        pending = deque()
+        with self._executor() as executor:
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < max_pending:
+                    chunk = self._chunk(specs)
+                    if not chunk:
+                        exhausted = True
+                        break
+                    pending.append(executor.submit(_run_chunk, chunk))
+                if not pending:
+                    return
+                for item in pending.popleft().result():
+                    yield self._merge(item, record)
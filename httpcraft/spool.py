@@ -0,0 +1,96 @@
+# subnet_musk
+
+import mmap
+import os
+import shutil
+
+
+# Response body kept on disk instead of in memory (used by streaming requests).
+# The file is memory-mapped lazily on first access, so indexing and slicing
+# only page in the bytes actually touched.
+class HttpCraftSpooledBody:
+    def __init__(self, path: str, size: int, temporary: bool = False):
+        self.path = path
+        self.size = size
+        self.temporary = temporary  # True when the file is a temp spool we own
+        self._file = None
+        self._mmap = None
+
+    # Memory-map the spooled file on first access
+    def _view(self):
+        if self._mmap is None:
+            if self.size == 0:
+                return b""
+            self._file = open(self.path, "rb")
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, key):
+        return self._view()[key]
+
+    def __bytes__(self):
+        return self.read()
+
+    def __str__(self):
+        return f"<spooled body: {self.size} bytes at '{self.path}'>"
+
+    __repr__ = __str__
+
+    # Check whether the body starts with the given bytes
+    def startswith(self, prefix: bytes):
+        return bytes(self[:len(prefix)]) == prefix
+
+    # Read the whole body (or the first `size` bytes) into memory
+    def read(self, size: int = -1):
+        end = self.size if size is None or size < 0 else min(size, self.size)
+        return bytes(self[:end])
+
+    # Decode the whole body to text
+    def decode(self, encoding: str = "utf-8", errors: str = "replace"):
+        return self.read().decode(encoding, errors=errors)
+
+    # Open the spooled file for streaming reads
+    def open(self):
+        return open(self.path, "rb")
+
+    # Release the memory map (the file stays on disk)
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # Move a temporary spool to `filepath`, or hardlink a kept file there (copy as last resort)
+    def save_to(self, filepath: str):
+        self.close()
+        if os.path.abspath(filepath) == os.path.abspath(self.path):
+            return filepath
+        if self.temporary:
+            shutil.move(self.path, filepath)
+            self.path = filepath
+            self.temporary = False
+        else:
+            try:
+                os.link(self.path, filepath)
+            except OSError:
+                shutil.copyfile(self.path, filepath)
+        return filepath
+
+    def to_dict(self):
+        return {
+            "spooled_file": self.path,
+            "size": self.size
+        }
+
+    def __del__(self):
+        try:
+            self.close()
+            if self.temporary and os.path.exists(self.path):
+                os.remove(self.path)
+        except Exception:
+            pass
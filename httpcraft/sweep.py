@@ -0,0 +1,157 @@
+# subnet_musk
+
+import re
+import threading
+import time
+
+from .codec import get_codec
+from .compression import open_file
+from .history import body_size, json_default
+
+
+# Lazily yield the lines of a wordlist file (plain or gzip-compressed), without line endings and
+# skipping blank lines. Undecodable bytes are replaced rather than aborting a long run halfway through
+def iter_wordlist(path: str, encoding: str = "utf-8"):
+    with open_file(path, "r", encoding=encoding, errors="replace") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if line:
+                yield line
+
+
+# Payload/path/header sweep over a lazily consumed stream of values.
+# Every value is substituted into a prepared request template (see HttpCraft.prepare)
+# at `position`: a payload field, a "{placeholder}" of the path or a header, all
+# named `field`; a dict value substitutes several fields at once. `max_workers`
+# threads pull values one at a time from the shared iterator, so at most
+# `max_workers` values and responses are alive at once whatever the input size.
+# Responses are not stored in the history (unless `record` is set): only those
+# passing every filter (status, body size, regex on the body) are reported, as
+# JSONL lines in `output` and/or through callback(value, exchange), which is
+# never called concurrently.
+class HttpCraftSweep:
+    POSITIONS = ("payload", "path", "header")
+
+    def __init__(self, client, method: str, path: str = "", field: str = None, position: str = "payload",
+                 template_payload: dict = None, port: int = None, match_status=None, match_size=None,
+                 match_regex=None):
+        assert position in self.POSITIONS, f"position must be one of {', '.join(self.POSITIONS)}"
+        if position == "path" and field is not None:
+            assert "{" + field + "}" in path, f"Path has no '{{{field}}}' placeholder"
+        self.field = field
+        self.position = position
+        self.prepared = client.prepare(method, path, template_payload, port)
+
+        if isinstance(match_status, int):
+            match_status = [match_status]
+        self.match_status = set(match_status) if match_status is not None else None
+        if isinstance(match_size, int):
+            match_size = (match_size, match_size)
+        self.match_size = match_size  # (min, max), either end may be None
+        self.match_regex = re.compile(match_regex) if isinstance(match_regex, (str, bytes)) else match_regex
+
+    # Split one input value into (fields, headers) for the prepared request
+    def _substitution(self, value):
+        if not isinstance(value, dict):
+            assert self.field is not None, "Give a field name or dict values"
+            value = {self.field: value}
+        if self.position == "header":
+            return {}, {name: str(v) for name, v in value.items()}
+        return value, None
+
+    # Whether a response passes every configured filter
+    def matches(self, response):
+        if self.match_status is not None and response.status_code not in self.match_status:
+            return False
+        if self.match_size is not None:
+            low, high = self.match_size
+            size = body_size(response)
+            if (low is not None and size < low) or (high is not None and size > high):
+                return False
+        if self.match_regex is not None:
+            text = response.text
+            if isinstance(self.match_regex.pattern, bytes):
+                text = text.encode("utf-8")
+            if not self.match_regex.search(text):
+                return False
+        return True
+
+    # JSONL record of a result
+    @staticmethod
+    def _line(value, exchange=None, error=None):
+        record = {"value": value}
+        if exchange is not None:
+            response = exchange.response
+            record.update(path=exchange.request.path, status=response.status_code, size=body_size(response),
+                          elapsed=response.elapsed_time)
+        else:
+            record["error"] = error
+        return get_codec().dumps(record, default=json_default) + "\n"
+
+    # Consume `values` and return a summary: sent, matched, errors, duration, throughput.
+    # Failed requests are counted (and written to `output` with an "error" field);
+    # the sweep stops early once `max_matches` matches have been found
+    def run(self, values, max_workers: int = 10, callback=None, output: str = None, max_matches: int = None,
+            record: bool = False):
+        assert max_workers > 0, "max_workers must be a positive integer"
+        client = self.prepared.client
+        client._ensure_pool_size(max_workers)
+        if isinstance(values, str):
+            values = iter_wordlist(values)
+        values = iter(values)
+
+        source_lock = threading.Lock()
+        sink_lock = threading.Lock()
+        counts = {"sent": 0, "matched": 0, "errors": 0}
+        stop = threading.Event()
+        sink = open_file(output, "w", encoding="utf-8") if output else None
+
+        def next_value():
+            with source_lock:
+                return next(values, stop)  # the stop event doubles as end-of-input marker
+
+        def report(value, exchange=None, error=None):
+            with sink_lock:
+                if stop.is_set():
+                    return
+                if sink is not None:
+                    sink.write(self._line(value, exchange, error))
+                if exchange is not None:
+                    counts["matched"] += 1
+                    if callback is not None:
+                        callback(value, exchange)
+                    if max_matches is not None and counts["matched"] >= max_matches:
+                        stop.set()
+
+        def worker():
+            while not stop.is_set():
+                value = next_value()
+                if value is stop:
+                    return
+                fields, headers = self._substitution(value)
+                try:
+                    exchange = self.prepared._send(fields, headers, record=record)
+                except Exception as e:
+                    with sink_lock:
+                        counts["sent"] += 1
+                        counts["errors"] += 1
+                    report(value, error=f"{type(e).__name__}: {e}")
+                    continue
+                with sink_lock:
+                    counts["sent"] += 1
+                if self.matches(exchange.response):
+                    report(value, exchange)
+
+        start = time.perf_counter()
+        try:
+            threads = [threading.Thread(target=worker, daemon=True) for _ in range(max_workers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            if sink is not None:
+                sink.close()
+        duration = time.perf_counter() - start
+
+        return dict(counts, duration=duration, throughput=counts["sent"] / duration if duration > 0 else 0.0)
@@ -1,4 +1,8 @@
 from flask import Flask, request, jsonify, render_template_string, make_response
+import json
+import time
+import zlib
+from urllib.parse import parse_qs
 
 app = Flask(__name__)
 CSRF_TOKEN = "secure123"
@@ -44,5 +48,85 @@ def set_cookie():
     resp.set_cookie("sessionid", "abc123")
     return resp
 
+@app.route("/bytes/<int:size>")
+def random_bytes(size):
+    def generate():
+        chunk = bytes(range(256)) * 256
+        sent = 0
+        while sent < size:
+            part = chunk[:size - sent]
+            sent += len(part)
+            yield part
+    return app.response_class(generate(), mimetype="application/octet-stream")
+
+@app.route("/delay/<float:seconds>")
+def delay(seconds):
+    time.sleep(seconds)
+    return jsonify({"delay": seconds})
+
+@app.route("/cached", methods=["GET", "POST"])
+def cached():
+    if request.method == "POST":
+        return jsonify({"updated": True})
+    etag = '"v1"'
+    cache_control = f"max-age={request.args.get('max_age', 0)}"
+    if request.headers.get("If-None-Match") == etag:
+        return app.response_class(status=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    resp = jsonify({"version": 1, "served_at": time.time()})
+    resp.headers["ETag"] = etag
+    resp.headers["Cache-Control"] = cache_control
+    return resp
+
+FLAKY_CALLS = {}
+
+@app.route("/flaky/<key>", methods=["GET", "POST"])
+def flaky(key):
+    # fail the first `fail` calls for `key` with `status` (and an optional Retry-After)
+    calls = FLAKY_CALLS[key] = FLAKY_CALLS.get(key, 0) + 1
+    if calls <= int(request.args.get("fail", 1)):
+        resp = jsonify({"call": calls})
+        resp.status_code = int(request.args.get("status", 503))
+        if "retry_after" in request.args:
+            resp.headers["Retry-After"] = request.args["retry_after"]
+        return resp
+    return jsonify({"call": calls})
+
+@app.route("/slow_first/<key>")
+def slow_first(key):
+    # the first call for `key` hangs for `delay` seconds, later calls answer at once
+    calls = FLAKY_CALLS[key] = FLAKY_CALLS.get(key, 0) + 1
+    if calls == 1:
+        time.sleep(float(request.args.get("delay", 1.0)))
+    return jsonify({"call": calls})
+
+@app.route("/compressed/<int:items>")
+def compressed(items):
+    # JSON list of `items` records, gzip/deflate-encoded when the client accepts that coding
+    body = json.dumps([{"id": i, "name": f"item{i}"} for i in range(items)]).encode("utf-8")
+    coding = request.args.get("coding", "gzip")
+    accepted = [c.split(";")[0].strip() for c in request.headers.get("Accept-Encoding", "").split(",")]
+    headers = {"Content-Type": "application/json"}
+    if coding in accepted:
+        wbits = 31 if coding == "gzip" else 15
+        compressor = zlib.compressobj(6, zlib.DEFLATED, wbits)
+        body = compressor.compress(body) + compressor.flush()
+        headers["Content-Encoding"] = coding
+    if request.args.get("chunked"):
+        return app.response_class((body[i:i + 1024] for i in range(0, len(body), 1024)), headers=headers)
+    return app.response_class(body, headers=headers)
+
+@app.route("/inflate", methods=["POST", "PUT"])
+def inflate():
+    # decode a gzip/deflate request body and report what was received
+    raw = request.get_data()
+    coding = request.headers.get("Content-Encoding")
+    body = zlib.decompress(raw, 31 if coding == "gzip" else 15) if coding in ["gzip", "deflate"] else raw
+    if request.mimetype == "application/json":
+        decoded = json.loads(body)
+    else:
+        decoded = {k: v[0] for k, v in parse_qs(body.decode("utf-8")).items()}
+    return jsonify({"content_encoding": coding, "received_bytes": len(raw), "decoded_bytes": len(body),
+                    "payload": decoded})
+
 if __name__ == "__main__":
     app.run(port=5000)
\ No newline at end of file
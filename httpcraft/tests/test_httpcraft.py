@@ -1,7 +1,46 @@
 import unittest
+import argparse
+import asyncio
+import gc
+import itertools
+import json
 import os
+import socket
+import subprocess
 import sys
-from httpcraft import HttpCraft
+import tempfile
+import threading
+import time
+import uuid
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from httpcraft import HttpCraft, AsyncHttpCraft, HttpCraftExchange, HttpCraftRequest, HttpCraftResponse
+from httpcraft.spool import HttpCraftSpooledBody
+from httpcraft.history import (HttpCraftHistory, HttpCraftHistoryLog, iter_history_file, iter_history_log, json_default,
+                               json_object_hook)
+from httpcraft.bench import LatencyHistogram, load_client, run_bench
+from httpcraft.har import iter_har_exchanges, iter_har_requests
+from httpcraft.codec import get_codec
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Parse verbosity flag
 VERBOSE = "--verbose" in sys.argv or os.getenv("HTTPCRAFT_VERBOSE", "false").lower() == "true"
@@ -127,6 +166,1112 @@ class TestHttpCraftFull(unittest.TestCase):
         self.assertEqual(exchange.request.payload_type, "json")
         log("  - Payload and type tracked correctly")
 
+class TestLazyDecoding(unittest.TestCase):
+    def setUp(self):
+        self.client = HttpCraft("http://127.0.0.1:5000")
+
+    def test_body_decoded_on_first_access(self):
+        log("TEST: response body decoded lazily")
+        exchange = self.client.post("/echo", json={"lazy": True})
+        response = exchange.response
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.is_decoded())
+        log("  - Status available without decoding")
+        body = response.response_body
+        self.assertTrue(body["json"]["lazy"])
+        self.assertIs(response.response_body, body)
+        log("  - Body decoded once and cached")
+
+    def test_binary_body_not_decoded(self):
+        log("TEST: binary body returned as raw bytes")
+        exchange = self.client.get("/bytes/16")
+        self.assertEqual(exchange.response.response_body, bytes(range(16)))
+        log("  - Raw bytes returned as-is")
+
+    def test_round_trip_through_dict(self):
+        log("TEST: lazy response survives to_dict/from_dict")
+        exchange = self.client.get("/form")
+        restored = HttpCraftExchange.from_dict(exchange.to_dict())
+        self.assertEqual(restored, exchange)
+        self.assertIn("csrf_token", restored.response.text)
+        log("  - Restored exchange equals the original")
+
+class TestCsrfExtraction(unittest.TestCase):
+    def setUp(self):
+        self.client = HttpCraft("http://127.0.0.1:5000")
+
+    def test_fast_input_scan(self):
+        log("TEST: fast CSRF scan for hidden inputs")
+        self.client.set_csrf("input", field="csrf_token")
+        html = (
+            "<p>csrf_token is set below</p>"
+            "<input type='text' name='csrf_token' value='visible'>"
+            "<INPUT value=\"a&amp;b>c\" NAME=\"csrf_token\" type=hidden>"
+        )
+        self.assertEqual(self.client.extract_csrf_token(html), "a&b>c")
+        self.assertEqual(self.client.extract_csrf_token(html), self.client._extract_csrf_token_soup(html))
+        log("  - Token matches the BeautifulSoup result")
+
+    def test_fast_meta_scan(self):
+        log("TEST: fast CSRF scan for meta tags")
+        self.client.set_csrf("meta", field="csrf-token")
+        html = '<head><meta name="csrf-token" content="meta123"/></head>'
+        self.assertEqual(self.client.extract_csrf_token(html), "meta123")
+        self.assertIsNone(self.client.extract_csrf_token("<head></head>"))
+        log("  - Meta token found, missing token returns None")
+
+    def test_csrf_skipped_for_json(self):
+        log("TEST: CSRF extraction skipped on JSON responses")
+        self.client.set_csrf("input", field="csrf_token")
+        exchange = self.client.post("/echo", json={"csrf_token": "<input type='hidden' name='csrf_token' value='x'>"})
+        self.assertFalse(exchange.csrf_token_updated)
+        log("  - JSON body not scanned")
+
+class TestHttpCraftStreaming(unittest.TestCase):
+    def setUp(self):
+        self.client = HttpCraft("http://127.0.0.1:5000")
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.client.set_spool_dir(self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_stream_to_spool_and_move(self):
+        log("TEST: streamed GET spooled to a temp file")
+        size = 300000
+        exchange = self.client.get("/bytes/%d" % size, stream=True)
+        body = exchange.response.response_body
+        self.assertIsInstance(body, HttpCraftSpooledBody)
+        self.assertEqual(len(body), size)
+        self.assertEqual(body[256:260], bytes([0, 1, 2, 3]))
+        log("  - Body spooled and memory-mapped lazily")
+        spool_path = body.path
+        target = os.path.join(self.tmpdir.name, "out.bin")
+        self.client.save_response_to_file(exchange, target)
+        self.assertFalse(os.path.exists(spool_path))
+        self.assertEqual(os.path.getsize(target), size)
+        self.assertEqual(body.path, target)
+        log("  - Spool file moved instead of copied")
+
+    def test_download_to_file_and_hardlink(self):
+        log("TEST: download() straight to a target file")
+        target = os.path.join(self.tmpdir.name, "download.bin")
+        exchange = self.client.download("/bytes/1024", filepath=target)
+        self.assertEqual(os.path.getsize(target), 1024)
+        self.assertEqual(exchange.response.response_type, "binary")
+        copy = os.path.join(self.tmpdir.name, "copy.bin")
+        self.client.save_response_to_file(exchange, copy)
+        self.assertTrue(os.path.exists(target))
+        self.assertEqual(os.stat(copy).st_nlink, 2)
+        self.assertEqual(exchange.response.to_dict()["response_body"]["size"], 1024)
+        log("  - Saved response hardlinked to the downloaded file")
+
+class TestHttpCraftHistoryPolicy(unittest.TestCase):
+    def setUp(self):
+        self.client = HttpCraft("http://127.0.0.1:5000")
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.client.reset_history()
+        self.tmpdir.cleanup()
+
+    def test_ring_buffer_eviction(self):
+        log("TEST: bounded history drops the oldest exchanges")
+        self.client.set_history_policy(max_entries=3)
+        for i in range(5):
+            self.client.post("/echo", json={"n": i})
+        self.assertEqual(len(self.client.history), 3)
+        self.assertEqual(self.client.history.dropped_count(), 2)
+        self.assertEqual(self.client.get_exchange(0).request.payload["n"], 2)
+        log("  - Only the newest exchanges are kept")
+
+    def test_compact_history(self):
+        log("TEST: compact history shares unchanged snapshots")
+        self.client.set_history_policy(compact=True)
+        self.client.add_cookie("sessionid", "abc123")
+        for i in range(3):
+            self.client.get("/echo", params={"n": i})
+        first, second, third = self.client.history[0], self.client.history[1], self.client.history[2]
+        self.assertIs(first.request.cookies, second.request.cookies)
+        self.assertIs(second.request.headers, third.request.headers)
+        self.assertIsInstance(first.epoch, float)
+        restored = HttpCraftExchange.from_dict(json.loads(json.dumps(second.to_dict())))
+        self.assertEqual(restored.to_dict(), second.to_dict())
+        self.assertAlmostEqual(restored.epoch, second.epoch, delta=0.001)
+        self.assertFalse(hasattr(first, "__dict__"))
+        log("  - Snapshots shared, timestamps stored as epoch, to_dict unchanged")
+
+    def test_spill_to_disk(self):
+        log("TEST: bounded history spills to disk")
+        self.client.set_history_policy(max_entries=2, spill_dir=self.tmpdir.name)
+        for i in range(5):
+            self.client.post("/echo", json={"n": i})
+        self.assertEqual(len(self.client.history), 5)
+        self.assertEqual(self.client.history.in_memory_count(), 2)
+        self.assertEqual(self.client.history.spilled_count(), 3)
+        self.assertEqual(self.client.get_exchange(1).response.response_body["json"]["n"], 1)
+        self.assertEqual([e.request.payload["n"] for e in self.client.history], list(range(5)))
+        log("  - Spilled exchanges readable by index and iteration")
+        path = os.path.join(self.tmpdir.name, "history.json")
+        self.client.save_history_to_file(path)
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(len(json.load(f)), 5)
+        log("  - save_history_to_file covers spilled exchanges")
+
+    def test_body_bytes_bound(self):
+        log("TEST: history bounded by body bytes")
+        self.client.set_history_policy(max_body_bytes=1500, spill_dir=self.tmpdir.name)
+        for _ in range(4):
+            self.client.get("/bytes/1000")
+        self.assertEqual(self.client.history.in_memory_count(), 1)
+        self.assertEqual(self.client.get_exchange(0).response.response_body, bytes(range(256)) * 3 + bytes(range(232)))
+        log("  - Binary bodies spilled and restored intact")
+
+    def test_history_log_write_through(self):
+        log("TEST: history appended to a JSONL log with offset index")
+        path = os.path.join(self.tmpdir.name, "history.jsonl")
+        self.client.set_history_policy(max_entries=1, log_path=path)
+        for i in range(4):
+            self.client.post("/echo", json={"n": i})
+        self.assertEqual(len(self.client.history), 4)
+        self.assertEqual(os.path.getsize(path + ".idx"), 4 * 8)
+        self.assertEqual(self.client.get_exchange(2).request.payload["n"], 2)
+        log("  - Evicted exchanges read back through the index")
+        self.assertEqual([e.request.payload["n"] for e in iter_history_log(path)], list(range(4)))
+        log("  - Streaming reader yields every exchange")
+        self.client.history.close()
+        reopened = HttpCraftHistoryLog(path)
+        self.assertEqual(len(reopened), 4)
+        self.assertEqual(reopened[-1].response.response_body["json"]["n"], 3)
+        self.assertEqual([e.request.payload["n"] for e in reopened.iter_range(1, 3)], [1, 2])
+        reopened.close()
+        log("  - Log reopened with random access")
+
+    def test_history_log_keeps_spooled_bodies(self):
+        log("TEST: spooled bodies of logged exchanges survive eviction")
+        path = os.path.join(self.tmpdir.name, "history.jsonl")
+        self.client.set_history_policy(max_entries=1, log_path=path)
+        self.client.download("/bytes/1000")
+        self.client.get("/echo")
+        gc.collect()
+        self.assertEqual(bytes(self.client.history[0].response.response_body), bytes(range(256)) * 3 + bytes(range(232)))
+        log("  - Spool file kept for the log record")
+
+    def test_history_log_recovers_torn_line(self):
+        log("TEST: history log index rebuilt after a torn write")
+        path = os.path.join(self.tmpdir.name, "torn.jsonl")
+        self.client.post("/echo", json={"n": 0})
+        self.client.post("/echo", json={"n": 1})
+        self.client.save_history_to_file(path)
+        with open(path, "ab") as f:
+            f.write(b'{"timestamp": "partial')
+        os.remove(path + ".idx")
+        recovered = HttpCraftHistoryLog(path)
+        self.assertEqual(len(recovered), 2)
+        self.assertEqual(recovered[1].request.payload["n"], 1)
+        recovered.close()
+        log("  - Torn line dropped and index rebuilt")
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    # The Flask mock server always closes connections, so pooling tests use this one
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class TestHttpCraftPooling(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = "http://127.0.0.1:%d" % cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_connection_reuse_stats(self):
+        log("TEST: pool statistics count reused connections")
+        client = HttpCraft(self.url)
+        for _ in range(5):
+            client.get("/")
+        stats = client.get_pool_stats()
+        self.assertEqual(stats["acquisitions"], 5)
+        self.assertEqual(stats["new_connections"], 1)
+        self.assertEqual(stats["reused"], 4)
+        self.assertAlmostEqual(stats["reuse_ratio"], 0.8)
+        log("  - One connection opened and reused")
+
+    def test_keepalive_idle_timeout(self):
+        log("TEST: idle kept-alive connections are closed")
+        client = HttpCraft(self.url, keepalive_timeout=0.1)
+        client.get("/")
+        time.sleep(0.2)
+        client.get("/")
+        stats = client.get_pool_stats()
+        self.assertEqual(stats["idle_closed"], 1)
+        self.assertEqual(stats["new_connections"], 2)
+        log("  - Idle connection replaced")
+
+    def test_warm_up(self):
+        log("TEST: warm-up pre-opens connections")
+        client = HttpCraft(self.url, pool_maxsize=4, pool_block=True)
+        self.assertEqual(client.warm_up(), 4)
+        list(client.send_many([("GET", "/")] * 8, max_workers=4))
+        self.assertEqual(client.get_pool_stats()["new_connections"], 0)
+        self.assertEqual(client.get_pool_options()["pool_maxsize"], 4)
+        log("  - Requests served by warmed connections")
+
+    def test_phase_timings(self):
+        log("TEST: per-phase timings and byte counts")
+        client = HttpCraft(self.url)
+        first = client.get("/").response
+        second = client.get("/").response
+        self.assertFalse(first.timings["connection_reused"])
+        self.assertTrue(second.timings["connection_reused"])
+        for res in (first, second):
+            phases = res.timings["connect"] + res.timings["ttfb"] + res.timings["transfer"]
+            self.assertLessEqual(phases, res.elapsed_time + 1e-6)
+            self.assertGreater(res.request_bytes, 0)
+            self.assertGreater(res.response_bytes, len(res.raw_body))
+        restored = HttpCraftResponse.from_dict(second.to_dict())
+        self.assertEqual(restored.timings, second.timings)
+        self.assertEqual(restored.response_bytes, second.response_bytes)
+        log("  - New vs reused connection and phase breakdown recorded")
+
+def make_exchange(epoch, method, path, status):
+    request = HttpCraftRequest("http://127.0.0.1", 5000, path, method, {}, {}, {}, "json")
+    return HttpCraftExchange(epoch, request, HttpCraftResponse(status, 0.0, "json", raw_body=b"{}"))
+
+class TestHistoryQuery(unittest.TestCase):
+    def fill(self, history, count=1000):
+        for i in range(count):
+            method = "POST" if i % 2 else "GET"
+            path = ["/api/users", "/api/items", "/login"][i % 3]
+            status = 500 if i % 10 == 0 else 200
+            history.append(make_exchange(1000.0 + i, method, path, status))
+
+    def test_find_by_criteria(self):
+        log("TEST: indexed history queries")
+        history = HttpCraftHistory()
+        self.fill(history)
+        found = history.find(status=500, method="GET", path_prefix="/api")
+        expected = [i for i in range(1000) if i % 10 == 0 and i % 2 == 0 and i % 3 != 2]
+        self.assertEqual(history.find_indices(status=500, method="GET", path_prefix="/api"), expected)
+        self.assertTrue(all(e.response.status_code == 500 and e.request.path.startswith("/api") for e in found))
+        self.assertEqual(history.find_indices(since=1100, until=1105), list(range(100, 105)))
+        self.assertEqual(history.find_indices(status=range(500, 600), path="/login", limit=2), [20, 50])
+        self.assertEqual(history.find(method="PUT"), [])
+        log("  - Status, method, path prefix and time filters combined")
+
+    def test_find_after_eviction(self):
+        log("TEST: indexes follow evicted and spilled exchanges")
+        history = HttpCraftHistory(max_entries=100)
+        self.fill(history)
+        self.assertEqual(history.find_indices(status=500), list(range(0, 100, 10)))
+        self.assertEqual(history.find(status=500)[0].epoch, 1900.0)
+        self.assertLess(len(history._index), 300)
+        with tempfile.TemporaryDirectory() as directory:
+            spilled = HttpCraftHistory(max_entries=10, spill_dir=directory)
+            self.fill(spilled, 50)
+            self.assertEqual(spilled.find_indices(status=500, since=1015), [20, 30, 40])
+            self.assertEqual(spilled.find(path="/login", status=500)[0].request.path, "/login")
+            spilled.close()
+        log("  - Query results map to current history indexes")
+
+@unittest.skipIf(numpy is None, "numpy not installed")
+class TestColumnarExport(unittest.TestCase):
+    def setUp(self):
+        self.client = HttpCraft("http://127.0.0.1:5000")
+        for i in range(100):
+            exchange = make_exchange(1000.0 + i, "GET", "/slow" if i % 4 == 0 else "/fast", 500 if i % 10 == 0 else 200)
+            exchange.response.elapsed_time = (i + 1) / 1000.0
+            exchange.response.response_bytes = 10 + i
+            self.client.history.append(exchange)
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_history_stats(self):
+        log("TEST: vectorized history statistics")
+        stats = self.client.history_stats()
+        self.assertEqual(stats["count"], 100)
+        self.assertAlmostEqual(stats["latency"]["p50"], 0.050)
+        self.assertAlmostEqual(stats["latency"]["p99"], 0.099)
+        self.assertEqual(stats["by_status"]["500"]["count"], 10)
+        self.assertAlmostEqual(stats["by_status"]["500"]["p90"], 0.081)
+        self.assertEqual(stats["by_path"]["/slow"]["count"], 25)
+        self.assertAlmostEqual(stats["by_path"]["/slow"]["max"], 0.097)
+        self.assertAlmostEqual(stats["throughput"], 100 / (1099.0 - 999.999))
+        log("  - Percentiles per status and per path")
+
+    def test_export_npz(self):
+        log("TEST: export history to .npz")
+        path = os.path.join(self.tmpdir.name, "history.npz")
+        self.client.export_history(path, include_bodies=True)
+        data = numpy.load(path)
+        self.assertEqual(data["status"].tolist().count(500), 10)
+        self.assertEqual(data["path_labels"][data["path"][0]], "/slow")
+        self.assertEqual(data["response_bytes"][5], 15)
+        offsets = data["body_offsets"]
+        self.assertEqual(bytes(data["body"][offsets[3]:offsets[4]]), b"{}")
+        log("  - Numeric columns, coded strings and body buffer saved")
+
+    @unittest.skipIf(pyarrow is None, "pyarrow not installed")
+    def test_export_parquet_and_arrow(self):
+        log("TEST: export history to Parquet and Arrow")
+        import pyarrow.feather
+        import pyarrow.parquet
+        parquet_path = os.path.join(self.tmpdir.name, "history.parquet")
+        arrow_path = os.path.join(self.tmpdir.name, "history.arrow")
+        self.client.export_history(parquet_path)
+        self.client.export_history(arrow_path)
+        table = pyarrow.parquet.read_table(parquet_path)
+        self.assertEqual(table.num_rows, 100)
+        self.assertNotIn("body", table.column_names)
+        self.assertEqual(table.column("timestamp")[1].as_py(), 1001.0)
+        arrow = pyarrow.feather.read_table(arrow_path)
+        self.assertEqual(arrow.column("method").to_pylist()[0], "GET")
+        log("  - Columns round-trip without bodies")
+
+class TestHttpCraftCache(unittest.TestCase):
+    def setUp(self):
+        self.client = HttpCraft("http://127.0.0.1:5000")
+        self.client.enable_cache()
+
+    def test_fresh_hit(self):
+        log("TEST: fresh responses are served from cache")
+        first = self.client.get("/cached", params={"max_age": 60})
+        second = self.client.get("/cached", params={"max_age": 60})
+        self.assertEqual(first.cache_status, "miss")
+        self.assertEqual(second.cache_status, "hit")
+        self.assertEqual(second.response.response_body, first.response.response_body)
+        self.assertEqual(second.response.response_bytes, 0)
+        self.assertEqual(self.client.get_cache_stats()["hits"], 1)
+        log("  - Second GET did not touch the network")
+
+    def test_revalidation(self):
+        log("TEST: stale responses are revalidated with If-None-Match")
+        first = self.client.get("/cached")
+        second = self.client.get("/cached")
+        self.assertEqual(second.cache_status, "revalidated")
+        self.assertEqual(second.request.headers.get("If-None-Match"), '"v1"')
+        self.assertEqual(second.response.status_code, 200)
+        self.assertEqual(second.response.response_body, first.response.response_body)
+        log("  - 304 served from cache")
+
+    def test_disk_store_and_invalidation(self):
+        log("TEST: disk-backed cache survives clients and unsafe methods invalidate")
+        with tempfile.TemporaryDirectory() as directory:
+            self.client.enable_cache(cache_dir=directory)
+            self.client.get("/cached", params={"max_age": 60})
+            other = HttpCraft("http://127.0.0.1:5000")
+            other.enable_cache(cache_dir=directory)
+            self.assertEqual(other.get("/cached", params={"max_age": 60}).cache_status, "hit")
+            self.client.get("/cached")
+            self.client.post("/cached", json={})
+            self.assertIsNone(self.client.history[-1].cache_status)
+            self.assertEqual(self.client.get("/cached").cache_status, "miss")
+            self.client.clear_cache()
+            self.assertEqual(os.listdir(directory), [])
+        log("  - Entries reloaded from disk and cleared")
+
+class TestRetryPolicy(unittest.TestCase):
+    def setUp(self):
+        self.client = HttpCraft("http://127.0.0.1:5000")
+        self.client.set_retry_policy(max_attempts=3, backoff_base=0.01, jitter=False)
+        self.key = uuid.uuid4().hex
+
+    def test_retry_status_with_backoff(self):
+        log("TEST: retryable statuses are retried with backoff")
+        exchange = self.client.get(f"/flaky/{self.key}", params={"fail": 2, "status": 503})
+        self.assertEqual(exchange.response.status_code, 200)
+        self.assertEqual([a["status_code"] for a in exchange.attempts], [503, 503, 200])
+        self.assertEqual([a["delay"] for a in exchange.attempts], [0.0, 0.01, 0.02])
+        log("  - Two 503s retried, third attempt succeeded")
+
+    def test_retry_after_and_idempotency(self):
+        log("TEST: Retry-After is honored and POST is not retried on 503")
+        exchange = self.client.get(f"/flaky/{self.key}", params={"fail": 1, "status": 429, "retry_after": "0.2"})
+        self.assertEqual(exchange.attempts[1]["delay"], 0.2)
+        post = self.client.post(f"/flaky/{self.key}-post?fail=1&status=503", json={})
+        self.assertEqual(post.response.status_code, 503)
+        self.assertEqual(len(post.attempts), 1)
+        log("  - Waited Retry-After, non-idempotent request sent once")
+
+    def test_retry_connection_errors(self):
+        log("TEST: connection errors are retried then raised")
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        client = HttpCraft(f"http://127.0.0.1:{port}")
+        client.set_retry_policy(max_attempts=2, backoff_base=0.0)
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            client.post("/")  # never sent, so retried even though POST is not idempotent
+        self.assertEqual(client.get_pool_stats()["acquisitions"], 2)
+        self.assertEqual(len(client.history), 0)
+        log("  - Exception raised after the last attempt")
+
+    def test_hedged_request(self):
+        log("TEST: hedged GET cuts a slow first response")
+        self.client.set_retry_policy(max_attempts=1, hedge_after=0.1)
+        exchange = self.client.get(f"/slow_first/{self.key}", params={"delay": 1.0})
+        self.assertEqual(exchange.response.response_body["call"], 2)
+        self.assertTrue(exchange.attempts[0]["hedged"])
+        self.assertEqual(exchange.attempts[0]["winner"], "hedge")
+        self.assertLess(exchange.attempts[0]["elapsed"], 0.8)
+        log("  - Duplicate request answered first")
+
+class TestRateLimit(unittest.TestCase):
+    def test_token_bucket_paces_requests(self):
+        log("TEST: token bucket paces requests per target")
+        client = HttpCraft("http://127.0.0.1:5000")
+        client.set_rate_limit(20, burst=2)
+        start = time.perf_counter()
+        exchanges = list(client.send_many([("GET", "/echo")] * 8, max_workers=4))
+        elapsed = time.perf_counter() - start
+        self.assertGreaterEqual(elapsed, 0.25)  # 2 burst + 6 paced at 20/s
+        stats = client.get_rate_limit_stats()["127.0.0.1:5000"]
+        self.assertEqual(stats["requests"], 8)
+        self.assertEqual(stats["waited_requests"], 6)
+        self.assertGreater(stats["max_wait"], 0.0)
+        self.assertTrue(all("rate_limit_wait" in e.response.timings for e in exchanges))
+        log("  - Burst sent at once, the rest paced")
+
+    def test_per_target_limit(self):
+        log("TEST: per-target limits leave other targets alone")
+        client = HttpCraft("http://127.0.0.1:5000")
+        client.set_rate_limit(1, target="127.0.0.1:5001")
+        for _ in range(3):
+            client.get("/echo")
+        self.assertEqual(client.get_rate_limit_stats()["127.0.0.1:5000"]["waited_requests"], 0)
+        limiter = client.rate_limiter
+        self.assertEqual(limiter.reserve("127.0.0.1:5001"), 0.0)
+        self.assertAlmostEqual(limiter.reserve("127.0.0.1:5001"), 1.0, delta=0.05)
+        log("  - Only the configured target is limited")
+
+    def test_default_limit_changed_after_traffic(self):
+        log("TEST: rate limit stats after the default limit changes")
+        client = HttpCraft("http://127.0.0.1:5000")
+        client.set_rate_limit(50)
+        client.get("/echo")
+        client.set_rate_limit(100, burst=5)
+        stats = client.get_rate_limit_stats()["127.0.0.1:5000"]
+        self.assertEqual((stats["requests"], stats["rate"], stats["burst"]), (1, 100, 5))
+        client.get("/echo")
+        self.assertEqual(client.get_rate_limit_stats()["127.0.0.1:5000"]["requests"], 2)
+        log("  - Counters kept, new limit reported")
+
+class TestPreparedRequest(unittest.TestCase):
+    def setUp(self):
+        self.client = HttpCraft("http://127.0.0.1:5000")
+
+    def test_json_template(self):
+        log("TEST: prepared JSON request substitutes fields")
+        prepared = self.client.prepare("POST", "/echo", {"user": "admin", "password": "", "n": [1, 2]})
+        request = prepared.build(password="pä\"ss", extra=None)
+        expected = self.client.json_codec.dumpb({"user": "admin", "password": "pä\"ss", "n": [1, 2], "extra": None})
+        self.assertEqual(request.body, expected)
+        self.assertEqual(request.headers["Content-Length"], str(len(request.body)))
+
+        exchange = prepared.send(password="secret")
+        self.assertEqual(exchange.response.response_body["json"]["password"], "secret")
+        self.assertEqual(exchange.request.payload["password"], "secret")
+        self.assertEqual(len(self.client.history), 1)
+        log("  - Body matches the codec output for the merged payload")
+
+    def test_form_and_query_templates(self):
+        log("TEST: prepared form and query requests")
+        self.client.set_payload({}, mode="form")
+        prepared = self.client.prepare("POST", "/echo", {"a": "1", "tags": ["x", "y"]})
+        exchange = prepared.send(a="&=")
+        self.assertEqual(exchange.response.response_body["form"]["a"], "&=")
+        self.assertEqual(exchange.request.payload_type, "form")
+
+        prepared = self.client.prepare("GET", "/echo", {"q": ""})
+        exchange = prepared.send(q="a b")
+        self.assertEqual(exchange.response.response_body["args"], {"q": "a b"})
+        log("  - Form body and query string encoded like requests")
+
+    def test_path_placeholders(self):
+        log("TEST: path placeholders are filled from fields")
+        key = uuid.uuid4().hex
+        prepared = self.client.prepare("GET", "/flaky/{key}", {"fail": 0})
+        first, second = prepared.send(key=key), prepared.send(key=key)
+        self.assertEqual(second.response.response_body["call"], 2)
+        self.assertEqual(first.request.path, f"/flaky/{key}")
+        log("  - Placeholder substituted per call")
+
+class TestSweep(unittest.TestCase):
+    def setUp(self):
+        self.client = HttpCraft("http://127.0.0.1:5000")
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_cli_match_size_range(self):
+        log("TEST: sweep CLI parses exact sizes and MIN:MAX ranges")
+        from httpcraft.cli import parse_size_range
+        self.assertEqual([parse_size_range(v) for v in ["10", "1:", ":20", "3:9"]], [10, (1, None), (None, 20), (3, 9)])
+        for value in ["a", ":", "1:x"]:
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_size_range(value)
+        log("  - Ranges mapped to the (min, max) tuples sweep() takes")
+
+    def test_wordlist_sweep_to_jsonl(self):
+        log("TEST: wordlist sweep streams matches to JSONL")
+        wordlist = os.path.join(self.tmpdir.name, "words.txt")
+        with open(wordlist, "w", encoding="utf-8") as f:
+            f.write("\n".join(f"word{i}" for i in range(40)) + "\nsecret\n\n")
+        output = os.path.join(self.tmpdir.name, "matches.jsonl")
+        summary = self.client.sweep("POST", "/echo", wordlist, field="password",
+                                    template_payload={"username": "admin", "password": ""},
+                                    max_workers=4, match_regex=r'"password":\s*"secret"', output=output)
+        self.assertEqual(summary["sent"], 41)
+        self.assertEqual(summary["matched"], 1)
+        self.assertEqual(summary["errors"], 0)
+        self.assertEqual(len(self.client.history), 0)
+        with open(output, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]["value"], "secret")
+        self.assertEqual(lines[0]["status"], 200)
+        log("  - Only the matching value kept, history untouched")
+
+    def test_header_sweep_with_callback(self):
+        log("TEST: header sweep stops after max_matches on an endless generator")
+        found = []
+        summary = self.client.sweep("GET", "/echo", itertools.count(), field="X-Probe", position="header",
+                                    max_workers=2, match_regex=r'"X-Probe":\s*"\d*[05]"', max_matches=3,
+                                    callback=lambda value, exchange: found.append(value))
+        self.assertEqual(summary["matched"], 3)
+        self.assertEqual(len(found), 3)
+        self.assertTrue(all(value % 5 == 0 for value in found))
+        self.assertLess(summary["sent"], 40)
+        log("  - Values consumed lazily, callback called per match")
+
+class TestHar(unittest.TestCase):
+    def setUp(self):
+        self.client = HttpCraft("http://127.0.0.1:5000")
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "session.har")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_export_and_import_roundtrip(self):
+        log("TEST: HAR export and incremental re-import")
+        self.client.get("/echo", params={"q": "a b", "tags": ["x", "y"]})
+        self.client.post("/echo", json={"user": "admin", "n": [1, 2]})
+        self.client.get("/bytes/64")
+        self.client.save_history_to_har(self.path)
+
+        with open(self.path, encoding="utf-8") as f:
+            document = json.load(f)
+        self.assertEqual(document["log"]["version"], "1.2")
+        entries = document["log"]["entries"]
+        self.assertEqual(len(entries), 3)
+        self.assertEqual(entries[0]["request"]["url"], "http://127.0.0.1:5000/echo?q=a+b&tags=x&tags=y")
+        self.assertEqual(entries[1]["request"]["postData"]["mimeType"], "application/json")
+        self.assertEqual(entries[2]["response"]["content"]["encoding"], "base64")
+
+        restored = HttpCraft("http://127.0.0.1:5000")
+        restored.load_history_from_har(self.path)
+        self.assertEqual(len(restored.history), 3)
+        for original, loaded in zip(self.client.history, restored.history):
+            self.assertEqual(loaded.request.method, original.request.method)
+            self.assertEqual(loaded.request.path, original.request.path)
+            self.assertEqual(loaded.request.payload, original.request.payload)
+            self.assertEqual(loaded.response.status_code, original.response.status_code)
+            self.assertEqual(loaded.response.response_body, original.response.response_body)
+            self.assertAlmostEqual(loaded.epoch, original.epoch, delta=0.002)
+        log("  - Requests, bodies and timestamps survive the round trip")
+
+    def test_browser_har_replay(self):
+        log("TEST: browser HAR entries become replayable specs")
+        entry = {
+            "startedDateTime": "2026-10-16T12:00:00.000Z", "time": 12.5,
+            "request": {"method": "POST", "url": "https://example.com/login?next=%2Fhome",
+                        "headers": [{"name": ":authority", "value": "example.com"},
+                                    {"name": "Content-Type", "value": "application/x-www-form-urlencoded"}],
+                        "cookies": [{"name": "sid", "value": "1"}],
+                        "postData": {"mimeType": "application/x-www-form-urlencoded", "text": "user=a&pw=b"}},
+            "response": {"status": 302, "headers": [{"name": "Location", "value": "/home"}],
+                         "content": {"size": 0, "mimeType": "text/html"}},
+            "timings": {"wait": 10, "receive": 2.5}
+        }
+        json_entry = dict(entry, request=dict(entry["request"], postData={"mimeType": "application/json",
+                                                                          "text": '{"user": "a", "n": [1]}'}))
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"log": {"version": "1.2", "pages": [{"id": "entries"}], "entries": [entry, json_entry]}}, f)
+
+        exchange = next(iter_har_exchanges(self.path))
+        self.assertEqual(exchange.request.headers, {"Content-Type": "application/x-www-form-urlencoded"})
+        self.assertEqual(exchange.request.cookies, {"sid": "1"})
+        self.assertEqual(exchange.response.timings, {"ttfb": 0.01, "transfer": 0.0025})
+        specs = list(iter_har_requests(self.path))
+        self.assertEqual(specs[0], ("POST", "/login?next=%2Fhome", {"user": "a", "pw": "b"}, "form"))
+        self.assertEqual(specs[1], ("POST", "/login?next=%2Fhome", {"user": "a", "n": [1]}, "json"))
+
+        replayed = list(self.client.send_many([("POST", "/echo", specs[0][2])], max_workers=1))
+        self.assertEqual(replayed[0].response.response_body["json"], {"user": "a", "pw": "b"})
+        self.client.set_payload({}, mode="form")
+        replayed = list(self.client.send_many([("POST", "/echo") + spec[2:] for spec in specs], max_workers=1))
+        self.assertEqual(replayed[0].response.response_body["form"], {"user": "a", "pw": "b"})
+        self.assertEqual(replayed[1].response.response_body["json"], {"user": "a", "n": [1]})
+        log("  - Pseudo-headers dropped, form body parsed, spec replayed")
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        self.client = HttpCraft("http://127.0.0.1:5000")
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    # Record a short session whose last request fails now and succeeds when replayed
+    def record_session(self):
+        self.client.reset_history()
+        self.client.get("/echo", params={"q": "1"})
+        self.client.post("/echo", json={"user": "admin"})
+        self.client.get(f"/flaky/{uuid.uuid4().hex}", params={"fail": 1})
+
+    def test_replay_saved_history(self):
+        log("TEST: replay a saved history and diff the answers")
+        for filename in ["history.json", "history.jsonl"]:
+            self.record_session()
+            path = os.path.join(self.tmpdir.name, filename)
+            self.client.save_history_to_file(path)
+            diffs = []
+            target = HttpCraft("http://127.0.0.1:5000")
+            report = target.replay_history(path, max_workers=2, callback=diffs.append)
+            self.assertEqual(report["replayed"], 3)
+            self.assertEqual(report["errors"], 0)
+            self.assertEqual(report["status_changed"], 1)
+            self.assertEqual(report["status_transitions"], {"503->200": 1})
+            self.assertEqual([d["index"] for d in diffs], [0, 1, 2])
+            self.assertEqual([d["body_changed"] for d in diffs], [False, False, True])
+            self.assertEqual(len(target.history), 0)
+        log("  - Status transition and body change reported, from JSON and JSONL")
+
+    def test_replay_compressed_requests(self):
+        log("TEST: replayed bodies compressed again")
+        self.client.set_request_compression("gzip", min_size=0)
+        self.client.post("/inflate", json={"data": "x" * 2000})
+        path = os.path.join(self.tmpdir.name, "history.jsonl")
+        self.client.save_history_to_file(path)
+        diffs = []
+        for compression in [True, False]:
+            target = HttpCraft("http://127.0.0.1:5000")
+            if compression:
+                target.set_request_compression("gzip", min_size=0)
+            target.replay_history(path, callback=diffs.append, record=True)
+            body = target.history[0].response.response_body
+            self.assertEqual(body["content_encoding"], "gzip" if compression else None)
+            self.assertEqual(body["payload"], {"data": "x" * 2000})
+        self.assertEqual([d["status_changed"] for d in diffs], [False, False])
+        log("  - Content-Encoding decided by the replaying client")
+
+    def test_scaled_timing(self):
+        log("TEST: scaled replay keeps the recorded gaps")
+        recorded = [make_exchange(1000.0 + i * 0.2, "GET", "/echo", 200) for i in range(4)]
+        report = self.client.replay_history(recorded, mode="scaled", speed=2.0)
+        self.assertEqual(report["replayed"], 4)
+        self.assertGreaterEqual(report["duration"], 0.3)  # 0.6 s of gaps at x2
+        report = self.client.replay_history(recorded, mode="max")
+        self.assertLess(report["duration"], 0.3)
+        log("  - Gaps divided by the speed factor, max mode unpaced")
+
+class TestJsonCodec(unittest.TestCase):
+    DOCUMENT = {"user": "pä", "n": [1, 2.5, None], "ok": True, "nested": {"a": {}}}
+
+    def test_stdlib_codec(self):
+        log("TEST: standard library codec")
+        codec = get_codec("json")
+        self.assertEqual(codec.dumps(self.DOCUMENT), '{"user":"pä","n":[1,2.5,null],"ok":true,"nested":{"a":{}}}')
+        self.assertEqual(codec.loads(codec.dumpb(self.DOCUMENT)), self.DOCUMENT)
+        self.assertEqual(codec.loads(codec.dumps(self.DOCUMENT, pretty=True)), self.DOCUMENT)
+        log("  - Compact UTF-8 output, pretty output parses back")
+
+    @unittest.skipIf(orjson is None, "orjson not installed")
+    def test_orjson_codec(self):
+        log("TEST: orjson codec matches the standard library")
+        fast, stdlib = get_codec("orjson"), get_codec("json")
+        self.assertEqual(get_codec("auto"), fast)
+        self.assertEqual(fast.dumpb(self.DOCUMENT), stdlib.dumpb(self.DOCUMENT))
+        self.assertEqual(fast.dumps({1: "a", "big": 2 ** 70}), stdlib.dumps({1: "a", "big": 2 ** 70}))  # fallback
+        self.assertEqual(fast.loads('{"a": "\\ud800"}'), {"a": "\ud800"})  # lone surrogate: fallback
+        encoded = fast.dumpb({"body": b"\x00\xff"}, default=json_default)
+        self.assertEqual(fast.loads(encoded, object_hook=json_object_hook, hook_key="__bytes__"),
+                         {"body": b"\x00\xff"})
+        log("  - Same bytes, fallbacks and object hooks")
+
+    def test_client_codec(self):
+        log("TEST: client uses its codec for requests and responses")
+        client = HttpCraft("http://127.0.0.1:5000")
+        client.set_json_codec("json")
+        self.assertEqual(client.get_json_codec(), "json")
+        exchange = client.post("/echo", json={"user": "admin", "n": [1, 2]})
+        self.assertEqual(exchange.response.response_body["json"], {"user": "admin", "n": [1, 2]})
+        self.assertEqual(exchange.request.headers["Content-Type"], "application/json")
+        self.assertEqual(exchange.request.headers["Content-Length"], str(len('{"user":"admin","n":[1,2]}')))
+        self.assertIs(exchange.response.codec, client.json_codec)
+        log("  - Compact request body, response decoded")
+
+    def test_saved_files_keep_indent(self):
+        log("TEST: payload, header and cookie files keep their 4-space indent")
+        client = HttpCraft("http://127.0.0.1:5000")
+        client.set_payload(dict(self.DOCUMENT))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "payload.json")
+            for codec in ["json"] + (["orjson"] if orjson is not None else []):
+                client.set_json_codec(codec)
+                client.save_payload_to_file(path)
+                with open(path, encoding="utf-8") as f:
+                    self.assertEqual(f.read(), json.dumps(self.DOCUMENT, indent=4, ensure_ascii=False))
+        log("  - Same file format with every codec")
+
+class TestCompression(unittest.TestCase):
+    def setUp(self):
+        self.client = HttpCraft("http://127.0.0.1:5000")
+        self.tmpdir = tempfile.mkdtemp()
+
+    def test_request_compression(self):
+        log("TEST: request bodies compressed above the threshold")
+        self.client.set_request_compression("gzip", min_size=1000)
+        big = self.client.post("/inflate", json={"data": "x" * 5000})
+        self.assertEqual(big.request.headers["Content-Encoding"], "gzip")
+        self.assertEqual(big.response.response_body["payload"], {"data": "x" * 5000})
+        self.assertLess(big.response.response_body["received_bytes"], 200)
+        small = self.client.post("/inflate", json={"data": "x"})
+        self.assertNotIn("Content-Encoding", small.request.headers)
+        self.client.set_request_compression("deflate", min_size=0)
+        form = self.client.post("/inflate", data={"user": "admin"})
+        self.assertEqual(form.response.response_body["content_encoding"], "deflate")
+        self.assertEqual(form.response.response_body["payload"], {"user": "admin"})
+        prepared = self.client.prepare("POST", "/inflate", {"q": ""}).send(q="abc")
+        self.assertEqual(prepared.response.response_body["payload"], {"q": "abc"})
+        log("  - gzip/deflate bodies decoded by the server, small bodies sent as they are")
+
+    def test_response_sizes(self):
+        log("TEST: wire and decoded sizes of compressed responses")
+        for query in ["", "&chunked=1"]:
+            response = self.client.get(f"/compressed/1000?coding=gzip{query}").response
+            self.assertEqual(response.content_encoding, "gzip")
+            self.assertEqual(len(response.response_body), 1000)
+            self.assertEqual(response.body_bytes, len(response.raw_body))
+            self.assertLess(response.wire_body_bytes * 3, response.body_bytes)
+        self.client.set_accept_encoding("identity")
+        response = self.client.get("/compressed/1000").response
+        self.assertIsNone(response.content_encoding)
+        self.assertEqual(response.wire_body_bytes, response.body_bytes)
+        with self.assertRaises(AssertionError):
+            self.client.set_accept_encoding("compress")
+        log("  - Sizes recorded for plain and chunked bodies, identity negotiated")
+
+    def test_gzip_files(self):
+        log("TEST: gzip-compressed history and config files")
+        self.client.set_request_compression(min_size=10)
+        self.client.get("/bytes/300")
+        self.client.post("/echo", json={"user": "admin"})
+        for name in ["history.json.gz", "history.jsonl.gz"]:
+            path = os.path.join(self.tmpdir, name)
+            self.client.save_history_to_file(path)
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(2), b"\x1f\x8b")
+            loaded = list(iter_history_file(path))
+            self.assertEqual([e.to_dict() for e in loaded], [e.to_dict() for e in self.client.history])
+        config = os.path.join(self.tmpdir, "config.json.gz")
+        self.client.save_config_to_file(config)
+        clone = HttpCraft("http://localhost")
+        clone.load_config_from_file(config)
+        self.assertEqual(clone.get_request_compression(), self.client.get_request_compression())
+        with self.assertRaises(AssertionError):
+            HttpCraftHistoryLog(os.path.join(self.tmpdir, "log.jsonl.gz"))
+        log("  - Files written compressed and read back unchanged")
+
+class TestTransport(unittest.TestCase):
+    def setUp(self):
+        self.client = HttpCraft("http://127.0.0.1:5000")
+        self.client.set_headers({"X-Test": "1"})
+        self.client.set_cookies({"sessionid": "abc123"})
+
+    def test_exchanges_match_requests_transport(self):
+        log("TEST: urllib3 transport fills exchanges like the requests transport")
+        exchanges = {}
+        for name in ["requests", "urllib3"]:
+            self.client.set_transport(name)
+            self.assertEqual(self.client.get_transport(), name)
+            self.client.set_payload({"user": "admin"}, mode="form")
+            exchanges[name] = [
+                self.client.get("/echo", params={"q": ["a", "b"], "n": 1}),
+                self.client.post("/echo", data={"user": "admin"}),
+                self.client.post("/echo", json={"user": "admin", "n": [1, 2]})
+            ]
+        for default, lean in zip(exchanges["requests"], exchanges["urllib3"]):
+            body, lean_body = default.response.response_body, lean.response.response_body
+            for key in ["method", "args", "form", "json", "cookies"]:
+                self.assertEqual(lean_body[key], body[key])
+            self.assertEqual(lean.request.headers, default.request.headers)
+            self.assertEqual(lean.request.headers["X-Test"], "1")
+            self.assertEqual(lean.response.request_bytes, default.response.request_bytes)
+            self.assertEqual(lean.response.body_bytes, default.response.body_bytes)
+            self.assertEqual(set(lean.response.timings), set(default.response.timings))
+        log("  - Same payloads, headers, cookies, byte counts and timings")
+
+    def test_urllib3_transport_pool_and_errors(self):
+        log("TEST: urllib3 transport pooling, compression, prepared requests and errors")
+        self.client.set_transport("urllib3")
+        self.assertEqual(self.client.warm_up(2), 2)
+        for _ in range(3):
+            self.client.get("/bytes/100")
+        self.assertEqual(self.client.get_pool_stats()["new_connections"], 2)
+        response = self.client.get("/compressed/1000?coding=gzip&chunked=1").response
+        self.assertEqual(len(response.response_body), 1000)
+        self.assertLess(response.wire_body_bytes * 3, response.body_bytes)
+        self.client.set_payload({}, mode="json")
+        prepared = self.client.prepare("POST", "/echo", {"user": ""}).send(user="root")
+        self.assertEqual(prepared.response.response_body["json"], {"user": "root"})
+        self.client.set_retry_policy(max_attempts=2, backoff_base=0)
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.client.get("/echo", port=1)
+        with self.assertRaises(AssertionError):
+            self.client.set_transport("curl")
+        transport = self.client.transport
+        with transport.request("GET", "http://127.0.0.1:5000/delay/0.5", timeout=5) as response:
+            self.assertEqual(response.status_code, 200)
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            transport.request("GET", "http://127.0.0.1:5000/delay/0.5", timeout=(1, 0.1))
+        with self.assertRaisesRegex(TypeError, "does not support proxies, verify"):
+            transport.request("GET", "http://127.0.0.1:5000/echo", verify=False, proxies={})
+        log("  - Connections reused, bodies decoded, requests exceptions raised, options checked")
+
+    def test_transport_saved_with_config(self):
+        log("TEST: transport saved with the configuration")
+        self.client.set_transport("urllib3")
+        path = os.path.join(tempfile.mkdtemp(), "config.json")
+        self.client.save_config_to_file(path)
+        clone = HttpCraft("http://localhost")
+        clone.load_config_from_file(path)
+        self.assertEqual(clone.get_transport(), "urllib3")
+        log("  - Transport restored from the config file")
+
+class TestLazyImports(unittest.TestCase):
+    def test_heavy_modules_loaded_on_first_use(self):
+        log("TEST: heavy dependencies imported on first use")
+        code = ("import sys; from httpcraft import HttpCraft; client = HttpCraft('http://127.0.0.1:5000'); "
+                "heavy = ['requests', 'bs4', 'aiohttp', 'mimetypes']; "
+                "print([m for m in heavy if m in sys.modules]); client.session; print('requests' in sys.modules)")
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+        output = subprocess.check_output([sys.executable, "-c", code], env=dict(os.environ, PYTHONPATH=root),
+                                         universal_newlines=True)
+        self.assertEqual(output.split("\n")[:2], ["[]", "True"])
+        import httpcraft
+        self.assertIn("AsyncHttpCraft", dir(httpcraft))
+        with self.assertRaises(AttributeError):
+            httpcraft.missing_name
+        log("  - requests loaded with the first session, bs4/aiohttp/mimetypes not at all")
+
+class TestHttpCraftBatch(unittest.TestCase):
+    def setUp(self):
+        self.client = HttpCraft("http://127.0.0.1:5000")
+
+    def test_send_many_ordered(self):
+        log("TEST: send_many in submission order")
+        specs = [("POST", "/echo", {"n": i}) for i in range(20)]
+        exchanges = list(self.client.send_many(specs, max_workers=8))
+        self.assertEqual([e.response.response_body["json"]["n"] for e in exchanges], list(range(20)))
+        self.assertEqual(len(self.client.history), 20)
+        log("  - Results yielded in submission order and all recorded")
+
+    def test_send_many_completion_order(self):
+        log("TEST: send_many in completion order")
+        specs = [("GET", "/delay/0.4"), ("GET", "/delay/0.0")]
+        exchanges = list(self.client.send_many(specs, max_workers=2, ordered=False))
+        self.assertEqual(exchanges[0].request.path, "/delay/0.0")
+        log("  - Fastest exchange yielded first")
+
+    def test_send_many_concurrency(self):
+        log("TEST: send_many runs requests concurrently")
+        start = time.time()
+        list(self.client.send_many([("GET", "/delay/0.2")] * 10, max_workers=10))
+        self.assertLess(time.time() - start, 1.0)
+        log("  - 10 delayed requests completed concurrently")
+
+    def test_send_many_csrf(self):
+        log("TEST: send_many with CSRF updates")
+        self.client.set_csrf("input", field="csrf_token")
+        exchanges = list(self.client.send_many([("GET", "/form")] * 10, max_workers=5))
+        self.assertTrue(all(e.csrf_token_updated for e in exchanges))
+        self.assertEqual(self.client.get_cookie("csrf_token"), "secure123")
+        log("  - CSRF cookie updated consistently")
+
+    def test_send_sharded(self):
+        log("TEST: send_sharded across worker processes")
+        self.client.set_header_entry("X-Shard", "1")
+        self.client.add_cookie("session", "abc")
+        self.client.set_history_policy(compact=True)
+        specs = [("POST", "/echo", {"n": i}) for i in range(30)] + [("GET", "/echo", {"q": "x"})]
+        exchanges = list(self.client.send_sharded(specs, processes=2, max_workers=3, chunk_size=4))
+        self.assertEqual([e.response.response_body["json"]["n"] for e in exchanges[:30]], list(range(30)))
+        self.assertEqual(exchanges[30].response.response_body["args"], {"q": "x"})
+        self.assertEqual(len(self.client.history), 31)
+        body = exchanges[0].response.response_body
+        self.assertEqual(body["headers"]["X-Shard"], "1")
+        self.assertEqual(body["cookies"], {"session": "abc"})
+        self.assertEqual(exchanges[0].request.url, self.client.base_url)
+        self.assertIsNotNone(exchanges[0].epoch)
+        log("  - Worker clones use the parent's config; history merged in submission order")
+
+    def test_send_sharded_error(self):
+        log("TEST: send_sharded raises failed requests in order")
+        client = HttpCraft("http://127.0.0.1:1")
+        with self.assertRaises(Exception):
+            list(client.send_sharded([("GET", "/")], processes=1))
+        log("  - Worker exception raised in the parent")
+
+class TestBench(unittest.TestCase):
+    def test_histogram_percentiles(self):
+        log("TEST: latency histogram percentiles")
+        histogram = LatencyHistogram()
+        for ms in range(1, 1001):
+            histogram.record(ms / 1000.0)
+        self.assertLessEqual(len(histogram.counts), 400)
+        for percent, expected in [(50, 0.5), (90, 0.9), (99, 0.99), (99.9, 0.999)]:
+            self.assertAlmostEqual(histogram.percentile(percent), expected, delta=expected * 0.02)
+        self.assertEqual(histogram.to_dict()["max"], 1.0)
+        log("  - Percentiles within 2% using bounded buckets")
+
+    def test_run_bench_from_config(self):
+        log("TEST: bench run from a saved config")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "config.json")
+            HttpCraft("http://127.0.0.1:5000").save_config_to_file(path)
+            client = load_client(path)
+        result = run_bench(client, "GET", "/echo", concurrency=4, requests=40)
+        self.assertEqual(result["requests"], 40)
+        self.assertEqual(result["status_codes"], {"200": 40})
+        self.assertEqual(result["latency"]["count"], 40)
+        self.assertLessEqual(len(client.history), 1)
+        json.dumps(result)
+        log("  - Counts, latency and JSON report produced")
+
+    def test_load_client_gzip_config(self):
+        log("TEST: bench client loaded from a gzip-compressed config")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "config.json.gz")
+            source = HttpCraft("http://127.0.0.1:5000")
+            source.set_header_entry("X-Bench", "1")
+            source.save_config_to_file(path)
+            client = load_client(path)
+        self.assertEqual((client.base_url, client.port), ("http://127.0.0.1", 5000))
+        self.assertEqual(client.get_header_entry("X-Bench"), "1")
+        log("  - base_url and headers read from the compressed file")
+
+@unittest.skipIf(aiohttp is None, "aiohttp not installed")
+class TestAsyncHttpCraft(unittest.TestCase):
+    def setUp(self):
+        self.client = AsyncHttpCraft("http://127.0.0.1:5000", max_concurrency=10)
+
+    def _run(self, coro):
+        async def runner():
+            try:
+                return await coro
+            finally:
+                await self.client.close()
+        return asyncio.run(runner())
+
+    def test_async_post_json(self):
+        log("TEST: async POST /echo with JSON")
+        self.client.set_payload({"user": "async"}, mode="json")
+        exchange = self._run(self.client.post("/echo"))
+        self.assertEqual(exchange.response.status_code, 200)
+        self.assertEqual(exchange.response.response_body.get("json", {}).get("user"), "async")
+        self.assertIn(exchange, self.client.history)
+        log("  - JSON payload echoed and exchange recorded")
+
+    def test_async_concurrent_requests(self):
+        log("TEST: async concurrent GET /delay")
+        async def burst():
+            return await asyncio.gather(*[self.client.get("/delay/0.2") for _ in range(10)])
+        start = time.time()
+        exchanges = self._run(burst())
+        elapsed = time.time() - start
+        self.assertTrue(all(e.response.status_code == 200 for e in exchanges))
+        self.assertEqual(len(self.client.history), 10)
+        self.assertLess(elapsed, 1.0)
+        log("  - 10 delayed requests completed concurrently")
+
+    def test_async_concurrency_limit(self):
+        log("TEST: async concurrency limit")
+        self.client.set_concurrency(1)
+        async def burst():
+            return await asyncio.gather(*[self.client.get("/delay/0.1") for _ in range(3)])
+        start = time.time()
+        self._run(burst())
+        self.assertGreaterEqual(time.time() - start, 0.3)
+        log("  - Requests serialized with concurrency=1")
+
+    def test_async_send_many(self):
+        log("TEST: async send_many in submission order")
+        async def collect():
+            return [e async for e in self.client.send_many([("POST", "/echo", {"n": i}) for i in range(5)])]
+        exchanges = self._run(collect())
+        self.assertEqual([e.response.response_body["json"]["n"] for e in exchanges], list(range(5)))
+        log("  - Results yielded in submission order")
+
+    def test_async_rate_limit(self):
+        log("TEST: async requests share the rate limiter")
+        self.client.set_rate_limit(20, burst=1)
+        async def burst():
+            return await asyncio.gather(*[self.client.get("/echo") for _ in range(5)])
+        start = time.perf_counter()
+        self._run(burst())
+        self.assertGreaterEqual(time.perf_counter() - start, 0.2)
+        self.assertEqual(self.client.get_rate_limit_stats()["127.0.0.1:5000"]["waited_requests"], 4)
+        log("  - Concurrent coroutines paced by the token bucket")
+
+    def test_async_csrf(self):
+        log("TEST: async CSRF token extraction")
+        self.client.set_csrf("input", field="csrf_token")
+        exchange = self._run(self.client.get("/form"))
+        self.assertTrue(exchange.csrf_token_updated)
+        self.assertEqual(self.client.get_cookie("csrf_token"), "secure123")
+        log("  - CSRF token extracted successfully")
+
+    def test_async_retry_policy(self):
+        log("TEST: async requests honour the retry policy")
+        self.client.set_retry_policy(max_attempts=3, backoff_base=0)
+        key = uuid.uuid4().hex
+        exchange = self._run(self.client.get(f"/flaky/{key}", params={"fail": 2, "status": 503}))
+        self.assertEqual(exchange.response.status_code, 200)
+        self.assertEqual([a["status_code"] for a in exchange.attempts], [503, 503, 200])
+        self.client.set_retry_policy(max_attempts=2, backoff_base=0)
+        with self.assertRaises(aiohttp.ClientConnectionError):
+            self._run(self.client.get("/echo", port=1))
+        log("  - Failed statuses and connection errors retried")
+
+    def test_sync_only_apis_rejected(self):
+        log("TEST: synchronous engines rejected by the async client")
+        calls = [("download", ("/bytes/16",)), ("prepare", ("GET", "/echo")), ("sweep", ("GET", "/echo", ["a"])),
+                 ("replay_history", ("history.jsonl",)), ("send_sharded", ([("GET", "/echo")],)), ("warm_up", ())]
+        for name, args in calls:
+            with self.assertRaisesRegex(TypeError, f"{name}\\(\\) is not supported on AsyncHttpCraft"):
+                getattr(self.client, name)(*args)
+        log("  - Clear TypeError instead of a broken call")
+
 if __name__ == "__main__":
     runner = unittest.TextTestRunner(verbosity=0 if not VERBOSE else 2)
     suite = unittest.defaultTestLoader.discover("tests")
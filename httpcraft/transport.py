@@ -0,0 +1,325 @@
+# subnet_musk
+
+import re
+from urllib.parse import urlencode, urlsplit
+
+import urllib3
+from urllib3.util.request import ACCEPT_ENCODING
+
+# Accept-Encoding sent by default, formatted like requests' default header
+DEFAULT_ACCEPT_ENCODING = ", ".join(re.split(r",\s*", ACCEPT_ENCODING))
+
+
+# requests' default User-Agent, read from the package metadata so that requests is not imported
+def _default_user_agent():
+    try:
+        from importlib.metadata import version
+        return f"python-requests/{version('requests')}"
+    except Exception:  # requests not installed, or Python < 3.8
+        return f"python-urllib3/{urllib3.__version__}"
+
+
+USER_AGENT = _default_user_agent()
+
+
+# Transport sending requests through the client's requests.Session (the default): full
+# requests semantics (environment proxies and certificates, cookie jar, redirects, hooks)
+class HttpCraftRequestsTransport:
+    name = "requests"
+
+    def __init__(self, client):
+        self.client = client
+
+    # Send a request; returns a requests.Response with its body not read yet when `stream` is set
+    def request(self, method: str, url: str, stream: bool = True, **kwargs):
+        kwargs.setdefault("allow_redirects", method.upper() != "HEAD")  # as Session.head/get/post...
+        return self.client.session.request(method, url, stream=stream, **kwargs)
+
+    # Build a PreparedRequest from a requests.Request with the session's defaults merged in
+    def prepare_request(self, request):
+        return self.client.session.prepare_request(request)
+
+    # Keyword arguments send() needs for a prepared request to `url`
+    def send_settings(self, url: str):
+        settings = self.client.session.merge_environment_settings(url, {}, True, None, None)
+        settings.pop("stream", None)
+        return settings
+
+    # Send a prepared request
+    def send(self, prepared, stream: bool = True, **settings):
+        return self.client.session.send(prepared, stream=stream, **settings)
+
+    # Headers sent with every request unless overridden
+    def default_headers(self):
+        return dict(self.client.session.headers)
+
+    # Pool options changed: the session's adapter is remounted by HttpCraft._mount_adapter
+    def configure_pool(self):
+        pass
+
+    # Pre-open up to `connections` connections to `url`; returns how many are open
+    def warm_up(self, url: str, connections: int):
+        session = self.client.session
+        adapter = session.get_adapter(url)
+        # resolve `verify` like Session.send does, so the warmed pool is the one requests will use
+        verify = session.merge_environment_settings(url, {}, None, None, None)["verify"]
+        return adapter.warm_up(url, connections, verify=verify)
+
+    def close(self):
+        pass
+
+
+# Serialize query/form parameters like requests: lists give repeated keys, None values are dropped
+def encode_params(params):
+    if isinstance(params, (str, bytes)):
+        return params
+    pairs = []
+    for key, values in (params.items() if hasattr(params, "items") else params):
+        if isinstance(values, (str, bytes)) or not hasattr(values, "__iter__"):
+            values = [values]
+        pairs.extend((key, value) for value in values if value is not None)
+    return urlencode(pairs, doseq=True)
+
+
+# Merge request headers over defaults, case-insensitively, keeping the defaults' order;
+# headers set to None are removed (as requests merges session and request headers)
+def merge_headers(defaults: dict, headers: dict = None):
+    merged = {name.lower(): (name, value) for name, value in defaults.items()}
+    for name, value in (headers or {}).items():
+        merged[name.lower()] = (name, value)
+    return {name: value for name, value in merged.values() if value is not None}
+
+
+# Text encoding declared by a Content-Type header, with requests' defaults
+# (ISO-8859-1 for text/*, UTF-8 for JSON, None otherwise)
+def encoding_from_content_type(content_type: str):
+    if not content_type:
+        return None
+    media_type, *params = content_type.split(";")
+    for param in params:
+        key, _, value = param.strip().partition("=")
+        if key.strip().lower() == "charset":
+            return value.strip().strip("'\"")
+    media_type = media_type.strip().lower()
+    if "text" in media_type:
+        return "ISO-8859-1"
+    if "application/json" in media_type:
+        return "utf-8"
+    return None
+
+
+# The request as sent by HttpCraftUrllib3Transport (the attributes of a requests.PreparedRequest
+# HttpCraft reads)
+class HttpCraftRawRequest:
+    __slots__ = ("method", "url", "headers", "body")
+
+    def __init__(self, method: str, url: str, headers: dict, body: bytes = None):
+        self.method = method
+        self.url = url
+        self.headers = headers
+        self.body = body
+
+    # Path and query string, as sent in the request line
+    @property
+    def path_url(self):
+        parts = urlsplit(self.url)
+        return (parts.path or "/") + ("?" + parts.query if parts.query else "")
+
+
+# A urllib3 response with the parts of the requests.Response interface HttpCraft reads.
+# Errors are raised as the requests exceptions the default transport would raise, so
+# retry policies treat both transports alike (requests is imported on the first error only)
+class HttpCraftRawResponse:
+    def __init__(self, raw, request: HttpCraftRawRequest):
+        self.raw = raw
+        self.request = request
+        self.status_code = raw.status
+        self.reason = raw.reason
+        self.headers = raw.headers  # case-insensitive HTTPHeaderDict
+        self.encoding = encoding_from_content_type(raw.headers.get("Content-Type"))
+
+    # Decoded body chunks of at most `chunk_size` bytes
+    def iter_content(self, chunk_size: int = 1):
+        try:
+            yield from self.raw.stream(chunk_size, decode_content=True)
+        except Exception as e:
+            raise _requests_error(e, body=True)
+
+    # Whole decoded body
+    @property
+    def content(self):
+        try:
+            return self.raw.read(decode_content=True)
+        except Exception as e:
+            raise _requests_error(e, body=True)
+
+    # Release the connection to its pool, or close it when the body was not read to the end
+    def close(self):
+        if not self.raw.isclosed():
+            self.raw.close()
+        self.raw.release_conn()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+# requests exception matching a urllib3 error (mapped as requests' HTTPAdapter does)
+def _requests_error(error, body: bool = False):
+    from urllib3 import exceptions
+    import requests
+    if isinstance(error, exceptions.MaxRetryError):
+        reason = error.reason
+        if isinstance(reason, exceptions.ConnectTimeoutError) and not isinstance(reason, exceptions.NewConnectionError):
+            return requests.exceptions.ConnectTimeout(error)
+        if isinstance(reason, exceptions.SSLError):
+            return requests.exceptions.SSLError(error)
+        if isinstance(reason, exceptions.ProxyError):
+            return requests.exceptions.ProxyError(error)
+        return requests.exceptions.ConnectionError(error)
+    if isinstance(error, exceptions.ReadTimeoutError):
+        return requests.exceptions.ConnectionError(error) if body else requests.exceptions.ReadTimeout(error)
+    if isinstance(error, exceptions.ProtocolError):
+        return requests.exceptions.ChunkedEncodingError(error) if body else requests.exceptions.ConnectionError(error)
+    if isinstance(error, exceptions.DecodeError):
+        return requests.exceptions.ContentDecodingError(error)
+    if isinstance(error, exceptions.SSLError):
+        return requests.exceptions.SSLError(error)
+    if isinstance(error, (exceptions.ClosedPoolError, OSError)):
+        return requests.exceptions.ConnectionError(error)
+    return error
+
+
+# Lean transport built directly on a urllib3 PoolManager with persistent connections.
+# Requests are encoded the way requests encodes them (same headers in the same order,
+# same query strings and bodies), so exchanges and their byte counts and timings are
+# filled exactly like with the default transport; what it leaves out is the per-request
+# machinery of requests: no cookie jar (only the client's cookies are sent, cookies set
+# by the server are not kept), no environment proxies or .netrc, no hooks. Redirects are
+# followed by urllib3 (up to 30, not for HEAD); certificates are checked against certifi
+# when installed, else the system store. Of requests' per-request options only `timeout`
+# and `allow_redirects` are supported; the others raise TypeError.
+class HttpCraftUrllib3Transport:
+    name = "urllib3"
+    MAX_REDIRECTS = 30
+
+    def __init__(self, client):
+        self.client = client
+        # no retries (HttpCraft has its own retry policy), redirects handled here
+        self._retries = urllib3.Retry(total=None, connect=0, read=False, status=0, other=0,
+                                      redirect=self.MAX_REDIRECTS, raise_on_redirect=False)
+        self.pool_manager = None
+        self.configure_pool()
+
+    # (Re)build the pool manager from the client's pool options
+    def configure_pool(self):
+        from .connpool import pool_classes
+        client = self.client
+        kwargs = {}
+        try:
+            import certifi
+            kwargs["ca_certs"] = certifi.where()
+        except ImportError:
+            pass
+        pool_manager = urllib3.PoolManager(num_pools=client.pool_connections, maxsize=client.pool_maxsize,
+                                           block=client.pool_block, **kwargs)
+        pool_manager.pool_classes_by_scheme = pool_classes(client.pool_stats, client.keepalive_timeout)
+        old, self.pool_manager = self.pool_manager, pool_manager
+        if old is not None:
+            old.clear()
+
+    def default_headers(self):
+        return {
+            "User-Agent": USER_AGENT,
+            "Accept-Encoding": self.client.accept_encoding or DEFAULT_ACCEPT_ENCODING,
+            "Accept": "*/*",
+            "Connection": "keep-alive"
+        }
+
+    # Build the request to send, in the order requests prepares it: URL and query string,
+    # merged headers, Cookie header, then Content-Length and (form bodies) Content-Type
+    def _build(self, method, url, headers=None, cookies=None, params=None, data=None, json=None):
+        method = method.upper()
+        if params:
+            query = encode_params(params)
+            if query:
+                url += ("&" if urlsplit(url).query else "?") + query
+        headers = merge_headers(self.default_headers(), headers)
+        names = {name.lower() for name in headers}
+        if cookies and "cookie" not in names:
+            headers["Cookie"] = "; ".join(f"{name}={value}" for name, value in cookies.items())
+
+        content_type = None
+        if json is not None:
+            body = self.client.json_codec.dumpb(json)
+            content_type = "application/json"
+        elif data:
+            body = encode_params(data)
+            if not isinstance(data, (str, bytes)):
+                content_type = "application/x-www-form-urlencoded"
+        else:
+            body = None
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if body is not None:
+            headers["Content-Length"] = str(len(body))
+        elif method not in ["GET", "HEAD"]:
+            headers["Content-Length"] = "0"
+        if content_type is not None and "content-type" not in names:
+            headers["Content-Type"] = content_type
+        return HttpCraftRawRequest(method, url, headers, body)
+
+    # urlopen keyword arguments for requests' `timeout` and `allow_redirects` options
+    def _options(self, method: str, options: dict):
+        unsupported = sorted(set(options) - {"timeout", "allow_redirects"})
+        if unsupported:
+            raise TypeError(f"The urllib3 transport does not support {', '.join(unsupported)}: "
+                            f"use the requests transport for them")
+        kwargs = {"redirect": options.get("allow_redirects", method != "HEAD")}
+        timeout = options.get("timeout")
+        if timeout is not None:
+            connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+            kwargs["timeout"] = urllib3.Timeout(connect=connect, read=read)
+        return kwargs
+
+    def _send(self, request: HttpCraftRawRequest, options: dict):
+        kwargs = self._options(request.method, options)
+        try:
+            raw = self.pool_manager.urlopen(request.method, request.url, body=request.body, headers=request.headers,
+                                            retries=self._retries, preload_content=False, decode_content=True,
+                                            **kwargs)
+        except Exception as e:
+            raise _requests_error(e)
+        return HttpCraftRawResponse(raw, request)
+
+    # Send a request; same arguments as HttpCraftRequestsTransport.request (the body is never
+    # read up front, whatever `stream` says)
+    def request(self, method: str, url: str, stream: bool = True, headers=None, cookies=None, params=None,
+                data=None, json=None, **options):
+        return self._send(self._build(method, url, headers, cookies, params, data, json), options)
+
+    # Prepare a requests.Request with this transport's default headers
+    def prepare_request(self, request):
+        request.headers = merge_headers(self.default_headers(), request.headers)
+        return request.prepare()
+
+    def send_settings(self, url: str):
+        return {}
+
+    # Send a requests.PreparedRequest
+    def send(self, prepared, stream: bool = True, **settings):
+        body = prepared.body.encode("utf-8") if isinstance(prepared.body, str) else prepared.body
+        return self._send(HttpCraftRawRequest(prepared.method, prepared.url, dict(prepared.headers), body), settings)
+
+    def warm_up(self, url: str, connections: int):
+        from .connpool import warm_up_pool
+        pool = self.pool_manager.connection_from_url(url)
+        return warm_up_pool(pool, min(connections, self.client.pool_maxsize))
+
+    def close(self):
+        self.pool_manager.clear()
+
+
+TRANSPORTS = {"requests": HttpCraftRequestsTransport, "urllib3": HttpCraftUrllib3Transport}
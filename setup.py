@@ -17,7 +17,10 @@ setup(
         "beautifulsoup4"
     ],
     extras_require={
-        "dev": ["flask", "pytest"],
+        "dev": ["flask", "pytest", "aiohttp", "numpy", "pyarrow", "orjson"],
+        "async": ["aiohttp"],
+        "columnar": ["numpy", "pyarrow"],
+        "fast": ["orjson"],
     },
     entry_points={
         "console_scripts": [